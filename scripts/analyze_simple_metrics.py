@@ -5,12 +5,19 @@ Analisa métricas coletadas com /usr/bin/time -v
 
 import os
 import re
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 import numpy as np
 
+from bootstrap_ci import imprimir_intervalos, intervalos_bootstrap
+from changepoint import detectar_mudancas, imprimir_alarmes
+from memoria_testes import carregar_memoria, imprimir_memoria
+from perf_counters import derivadas as derivadas_contadores, ler_bloco
+from power_model import energia_execucoes
+
 def parse_time_output(filepath):
     """Parse do output do /usr/bin/time -v"""
     with open(filepath, 'r') as f:
@@ -27,6 +34,77 @@ def parse_time_output(filepath):
     if runid_match:
         metrics['run_id'] = runid_match.group(1)
     
+    # Início da execução (ordem cronológica do histórico)
+    ts_match = re.search(r'^Timestamp:\s+(\S+)', content, re.MULTILINE)
+    if ts_match:
+        metrics['timestamp'] = ts_match.group(1)
+    
+    # Host/runner que executou (sharding entre máquinas)
+    host_match = re.search(r'^Host:\s+(.+?)\s*$', content, re.MULTILINE)
+    if host_match:
+        metrics['host'] = host_match.group(1)
+    
+    # Commit do checkout (a primeira execução após trocá-lo parte a frio)
+    commit_match = re.search(r'^Commit:\s+([0-9a-f]+)', content, re.MULTILINE)
+    if commit_match:
+        metrics['commit'] = commit_match.group(1)
+    
+    # Rodada do benchmark e número de workers do xdist
+    rodada_match = re.search(r'^Rodada:\s+(\d+)', content, re.MULTILINE)
+    if rodada_match:
+        metrics['rodada'] = int(rodada_match.group(1))
+    workers_match = re.search(r'^Workers:.*?\((\d+) cores\)', content, re.MULTILINE)
+    if workers_match:
+        metrics['workers'] = int(workers_match.group(1))
+    
+    # TIA + xdist (tia_parallel.py): etapa de seleção e workers escolhidos
+    selecao_match = re.search(r'^Seleção TIA:\s+(\d+\.\d+)s \(CPU (\d+\.\d+)s\), (\d+)/(\d+)',
+                              content, re.MULTILINE)
+    if selecao_match:
+        metrics['selecao_tia_s'] = float(selecao_match.group(1))
+        metrics['selecao_tia_cpu_s'] = float(selecao_match.group(2))
+        metrics['testes_afetados'] = int(selecao_match.group(3))
+    escolhidos_match = re.search(r'^Workers escolhidos:\s+(\d+)', content, re.MULTILINE)
+    if escolhidos_match:
+        metrics['workers'] = int(escolhidos_match.group(1))
+    
+    # Pool de threads (pytest_threads.py): threads, GIL e testes fora do pool
+    threads_match = re.search(r'^Threads:\s+(\d+) \(GIL (\w+)\); (\d+) testes no pool em '
+                              r'\d+\.\d+s, (\d+) sequenciais', content, re.MULTILINE)
+    if threads_match:
+        metrics['workers'] = int(threads_match.group(1))
+        metrics['gil_ativo'] = threads_match.group(2) == 'ativo'
+        metrics['testes_pool'] = int(threads_match.group(3))
+        metrics['testes_sequenciais'] = int(threads_match.group(4))
+    
+    # Cobertura de linhas (pytest_cobertura.py, sys.monitoring)
+    cobertura_match = re.search(r'^Cobertura \(sys\.monitoring\): \d+/\d+ linhas \((\d+\.\d+)%\)',
+                                content, re.MULTILINE)
+    if cobertura_match:
+        metrics['cobertura_pct'] = float(cobertura_match.group(1))
+    
+    # Afinidade, governor, turbo e frequência durante a execução (cpu_pinning.py)
+    afinidade_match = re.search(r'^Afinidade:\s+(\S+)', content, re.MULTILINE)
+    if afinidade_match:
+        metrics['afinidade'] = afinidade_match.group(1)
+    governor_match = re.search(r'^Governor:\s+(\S+)', content, re.MULTILINE)
+    if governor_match:
+        metrics['governor'] = governor_match.group(1)
+    turbo_match = re.search(r'^Turbo:\s+(\w+)', content, re.MULTILINE)
+    if turbo_match:
+        metrics['turbo'] = turbo_match.group(1)
+    freq_match = re.search(r'^Frequência \(GHz\): mín (\d+\.\d+), média (\d+\.\d+), máx (\d+\.\d+)',
+                           content, re.MULTILINE)
+    if freq_match:
+        metrics['freq_min_ghz'] = float(freq_match.group(1))
+        metrics['freq_media_ghz'] = float(freq_match.group(2))
+        metrics['freq_max_ghz'] = float(freq_match.group(3))
+    
+    # Estado do cache do testmon antes da execução (TIA)
+    cache_match = re.search(r'^Cache TIA:\s+(\w+)', content, re.MULTILINE)
+    if cache_match:
+        metrics['cache_tia'] = cache_match.group(1).lower()
+    
     # Extrair métricas do /usr/bin/time -v
     # Elapsed (wall clock) time (h:mm:ss or m:ss): 0:01.23
     elapsed_match = re.search(r'Elapsed.*?:\s+(\d+):(\d+\.\d+)', content)
@@ -56,6 +134,11 @@ def parse_time_output(filepath):
         metrics['mem_max_kb'] = int(mem_match.group(1))
         metrics['mem_max_mb'] = metrics['mem_max_kb'] / 1024
     
+    # Memória da árvore (MB): pico 123.4 (backend local; soma todos os processos)
+    arvore_match = re.search(r'^Memória da árvore \(MB\): pico (\d+\.\d+)', content, re.MULTILINE)
+    if arvore_match:
+        metrics['mem_arvore_mb'] = float(arvore_match.group(1))
+    
     # Voluntary context switches: 123
     vol_ctx_match = re.search(r'Voluntary context switches.*?:\s+(\d+)', content)
     if vol_ctx_match:
@@ -66,10 +149,32 @@ def parse_time_output(filepath):
     if invol_ctx_match:
         metrics['ctx_switches_invol'] = int(invol_ctx_match.group(1))
     
+    # Major/Minor page faults (time -v e backend local)
+    maj_match = re.search(r'Major \(requiring I/O\) page faults:\s+(\d+)', content)
+    min_match = re.search(r'Minor \(reclaiming a frame\) page faults:\s+(\d+)', content)
+    if maj_match and min_match:
+        metrics['page_faults_rusage'] = int(maj_match.group(1)) + int(min_match.group(1))
+    
+    # Contadores de desempenho (perf_counters.py): instruções, ciclos, cache...
+    metrics.update(ler_bloco(content))
+    
     # Contar número de testes
     tests_match = re.findall(r'(\d+) passed', content)
     if tests_match:
         metrics['testes_executados'] = int(tests_match[-1])
+    failed_match = re.findall(r'(\d+) failed', content)
+    if failed_match:
+        metrics['testes_falhos'] = int(failed_match[-1])
+    
+    # Priorização (pytest_priorizacao.py): duração da sessão e primeira falha
+    sessao_match = re.search(r'^Sessão de testes:\s+(\d+\.\d+)s', content, re.MULTILINE)
+    if sessao_match:
+        metrics['sessao_s'] = float(sessao_match.group(1))
+    falha_match = re.search(r'^Primeira falha:\s+(\d+\.\d+)s \(teste (\d+)', content,
+                            re.MULTILINE)
+    if falha_match:
+        metrics['primeira_falha_s'] = float(falha_match.group(1))
+        metrics['testes_ate_falha'] = int(falha_match.group(2))
     
     return metrics
 
@@ -93,23 +198,133 @@ def load_all_metrics(data_dir='data/raw'):
     
     return pd.DataFrame(results)
 
-def calcular_metricas_derivadas(df):
+def calcular_metricas_derivadas(df, modelos=None, raw_dir='data/raw'):
     """Calcula métricas adicionais"""
     # CPU total
     df['cpu_total_s'] = df['cpu_user_s'] + df['cpu_sys_s']
     
-    # Energia estimada (J) = CPU_time × CPU_cores × TDP_estimado
-    # Assumindo TDP médio de ~15W por core em uso
-    TDP_PER_CORE = 15  # Watts
-    df['energia_estimada_j'] = df['cpu_total_s'] * TDP_PER_CORE
+    # Energia estimada (J) pelo modelo de potência calibrado do host
+    # (ociosa × tempo de parede + dinâmica por core ocupado; ver
+    # power_model.py). Host sem calibração: 15 W por core em uso
+    df['energia_estimada_j'], df['modelo_energia'] = energia_execucoes(df, modelos, raw_dir)
     
     # EDP (Energy-Delay Product)
     df['edp'] = df['energia_estimada_j'] * df['tempo_s']
     
+    # TIA + xdist: energia da seleção pelo mesmo modelo do host, sem série
+    if 'selecao_tia_s' in df.columns:
+        selecao = df[['selecao_tia_s', 'selecao_tia_cpu_s']].set_axis(['tempo_s', 'cpu_total_s'], axis=1)
+        if 'host' in df.columns:
+            selecao['host'] = df['host']
+        df['energia_selecao_j'] = energia_execucoes(selecao, modelos)[0]
+        df['energia_execucao_j'] = df['energia_estimada_j'] - df['energia_selecao_j']
+    
+    # Contadores: sem bloco, page faults e trocas de contexto caem para o
+    # rusage; IPC, % de faltas de cache e instruções por joule só com PMU
+    if 'page_faults_rusage' in df.columns:
+        df['page_faults'] = df.get('page_faults', df['page_faults_rusage']).fillna(df['page_faults_rusage'])
+    if 'ctx_switches_vol' in df.columns:
+        rusage = df['ctx_switches_vol'] + df['ctx_switches_invol']
+        df['trocas_contexto'] = df.get('trocas_contexto', rusage).fillna(rusage)
+    df = derivadas_contadores(df)
+    
+    # Até a primeira falha (builds vermelhos): partida do processo + trecho
+    # da sessão até a falha, com a potência média da execução
+    if 'primeira_falha_s' in df.columns:
+        df['tempo_primeira_falha_s'] = df['tempo_s'] - df['sessao_s'] + df['primeira_falha_s']
+        df['energia_primeira_falha_j'] = (df['energia_estimada_j'] * df['tempo_primeira_falha_s']
+                                          / df['tempo_s'])
+    
+    return df
+
+def normalizar_por_host(df, colunas=('tempo_s', 'cpu_total_s', 'energia_estimada_j', 'edp')):
+    """
+    Divide cada métrica pela mediana do baseline no mesmo host (<col>_rel),
+    removendo diferenças de hardware entre máquinas do experimento.
+    """
+    if 'host' not in df.columns:
+        df['host'] = 'desconhecido'
+    df['host'] = df['host'].fillna('desconhecido')
+    
+    referencia = df[df['estrategia'] == 'baseline'].groupby('host')[list(colunas)].median()
+    for col in colunas:
+        df[f'{col}_rel'] = df[col] / df['host'].map(referencia[col])
     return df
 
+LIMIAR_MAD = 3.5  # Escore z modificado (Iglewicz & Hoaglin)
+
+def filtrar_execucoes(df, colunas=('tempo_s', 'cpu_total_s'), limiar=LIMIAR_MAD,
+                      descartar_primeira=False):
+    """
+    Marca execuções a excluir (colunas `excluido` e `motivo_exclusao`)
+    sem remover linhas, para que a análise rode no conjunto bruto ou no
+    filtrado:
+      - partida a frio: cache do testmon ausente (`Cache TIA: miss`) ou
+        primeira execução do host depois de um checkout de outro commit
+        (linha `Commit:`); com `descartar_primeira` (dados sem essas
+        linhas), também a primeira de cada estratégia em cada host;
+      - outliers: |0.6745·(x - mediana)/MAD| > limiar por estratégia e
+        host, calculado só sobre as execuções aquecidas.
+    """
+    host = df['host'].fillna('desconhecido') if 'host' in df.columns else 'desconhecido'
+    run = pd.to_numeric(df['run_id'], errors='coerce')
+    ts = df['timestamp'].fillna('').astype(str) if 'timestamp' in df.columns else ''
+    ordem = pd.DataFrame({'host': host, 'ts': ts, 'run': run}, index=df.index)
+    motivos = pd.Series([[] for _ in range(len(df))], index=df.index)
+    
+    if 'cache_tia' in df.columns:
+        for i in df.index[df['cache_tia'] == 'miss']:
+            motivos[i].append('cache frio (.testmondata ausente)')
+    if 'commit' in df.columns:
+        ordem['commit'] = df['commit']
+        sequencia = ordem[ordem['commit'].notna()].sort_values(['ts', 'run'])
+        anterior = sequencia.groupby('host')['commit'].shift()
+        for i in sequencia.index[sequencia['commit'] != anterior]:
+            motivos[i].append(f"primeira execução no commit {sequencia.at[i, 'commit'][:7]}")
+    if descartar_primeira:
+        ordem['estrategia'] = df['estrategia']
+        primeiras = ordem.sort_values(['ts', 'run']).groupby(['estrategia', 'host']).head(1).index
+        for i in primeiras:
+            motivos[i].append('primeira execução (aquecimento)')
+    
+    aquecidas = motivos.map(len) == 0
+    for col in [c for c in colunas if c in df.columns]:
+        grupos = df.loc[aquecidas, col].groupby([df['estrategia'], ordem['host']])
+        mediana = grupos.transform('median')
+        mad = grupos.transform(lambda x: (x - x.median()).abs().median())
+        z = 0.6745 * (df.loc[aquecidas, col] - mediana) / mad.where(mad > 0)
+        for i in z.index[z.abs() > limiar]:
+            motivos[i].append(f'outlier {col} (z={z[i]:+.1f})')
+    
+    df['excluido'] = motivos.map(len) > 0
+    df['motivo_exclusao'] = motivos.map('; '.join)
+    return df
+
+def imprimir_exclusoes(df):
+    """
+    Resumo das execuções marcadas por filtrar_execucoes, com o estado da
+    CPU de cada uma (governor, turbo, frequência) quando registrado
+    """
+    excluidas = df[df['excluido']]
+    print(f"\n🧹 Filtro: {len(excluidas)}/{len(df)} execuções marcadas para exclusão")
+    for _, linha in excluidas.iterrows():
+        print(f"   • {linha['estrategia']} run {linha['run_id']}: {linha['motivo_exclusao']}")
+        contexto = [f"{c} {linha[c]}" for c in ('governor', 'turbo')
+                    if c in linha and pd.notna(linha[c])]
+        if 'freq_media_ghz' in linha and pd.notna(linha['freq_media_ghz']):
+            contexto.append(f"{linha['freq_min_ghz']:.2f}–{linha['freq_max_ghz']:.2f} GHz "
+                            f"(média {linha['freq_media_ghz']:.2f})")
+        if contexto:
+            print(f"     CPU: {', '.join(contexto)}")
+
 def teste_hipoteses(df):
-    """Testa H1 e H2"""
+    """
+    Testa H1 (TIA vs baseline), H2 (paralelo vs baseline) e H4 (threads
+    vs paralelo), cada uma só com as estratégias dela presentes.
+    Retorna uma lista de dicts (hipotese, metrica, alternative, p_value, n)
+    com os testes que puderam ser calculados.
+    """
+    resultados = []
     print("\n" + "="*60)
     print("TESTES DE HIPÓTESE")
     print("="*60)
@@ -117,15 +332,14 @@ def teste_hipoteses(df):
     baseline = df[df['estrategia'] == 'baseline']
     parallel = df[df['estrategia'] == 'parallel']
     tia = df[df['estrategia'] == 'tia']
-    
-    if len(baseline) == 0 or len(tia) == 0:
-        print("⚠️ Dados insuficientes para testes estatísticos")
-        return
+    threads = df[df['estrategia'] == 'threads']
     
     # H1: TIA reduz tempo vs Baseline
     print("\n📊 H1: TIA vs Baseline (Tempo)")
     if len(baseline) >= 3 and len(tia) >= 3:
         stat, p_value = stats.mannwhitneyu(baseline['tempo_s'], tia['tempo_s'], alternative='greater')
+        resultados.append({'hipotese': 'H1', 'metrica': 'tempo_s', 'alternative': 'greater',
+                           'p_value': p_value, 'n': min(len(baseline), len(tia))})
         reducao = ((baseline['tempo_s'].mean() - tia['tempo_s'].mean()) / baseline['tempo_s'].mean()) * 100
         print(f"   Redução média: {reducao:.1f}%")
         print(f"   p-value: {p_value:.4f}")
@@ -137,10 +351,33 @@ def teste_hipoteses(df):
     if len(baseline) >= 3 and len(parallel) >= 3:
         print("\n📊 H2: Paralelo vs Baseline (EDP)")
         stat, p_value = stats.mannwhitneyu(baseline['edp'], parallel['edp'])
+        resultados.append({'hipotese': 'H2', 'metrica': 'edp', 'alternative': 'two-sided',
+                           'p_value': p_value, 'n': min(len(baseline), len(parallel))})
         diff = ((parallel['edp'].mean() - baseline['edp'].mean()) / baseline['edp'].mean()) * 100
         print(f"   Diferença no EDP: {diff:+.1f}%")
         print(f"   p-value: {p_value:.4f}")
         print(f"   Conclusão: {'✅ Diferença significativa' if p_value < 0.05 else '⚠️ Sem diferença significativa'}")
+    
+    # H4: pool de threads num processo vs processos do xdist. A memória é a
+    # da árvore inteira: o Maximum resident set size é só do maior processo
+    # e não vê os workers do xdist
+    if len(parallel) >= 3 and len(threads) >= 3:
+        print("\n📊 H4: Threads vs Paralelo (memória, CPU, energia)")
+        for metrica in ['mem_arvore_mb', 'cpu_total_s', 'energia_estimada_j']:
+            a = parallel.get(metrica, pd.Series(dtype=float)).dropna()
+            b = threads.get(metrica, pd.Series(dtype=float)).dropna()
+            if len(a) < 3 or len(b) < 3:
+                print(f"   {metrica}: ⚠️ dados insuficientes (paralelo: {len(a)}, threads: {len(b)})")
+                continue
+            stat, p_value = stats.mannwhitneyu(a, b)
+            resultados.append({'hipotese': 'H4', 'metrica': metrica, 'alternative': 'two-sided',
+                               'p_value': p_value, 'n': min(len(a), len(b))})
+            diff = ((b.mean() - a.mean()) / a.mean()) * 100
+            print(f"   {metrica}: {diff:+.1f}% (p-value: {p_value:.4f})")
+    
+    if not resultados:
+        print("\n⚠️ Dados insuficientes para testes estatísticos")
+    return resultados
 
 def gerar_relatorio(df):
     """Relatório descritivo"""
@@ -148,7 +385,7 @@ def gerar_relatorio(df):
     print("ESTATÍSTICAS DESCRITIVAS")
     print("="*60)
     
-    for estrategia in ['baseline', 'parallel', 'tia']:
+    for estrategia in ['baseline', 'parallel', 'tia', 'prioritized', 'tia_parallel', 'threads']:
         subset = df[df['estrategia'] == estrategia]
         if len(subset) == 0:
             continue
@@ -158,10 +395,30 @@ def gerar_relatorio(df):
         print(f"   CPU Total (s):    {subset['cpu_total_s'].mean():.2f} ± {subset['cpu_total_s'].std():.2f}")
         print(f"   CPU %:            {subset['cpu_pct'].mean():.0f} ± {subset['cpu_pct'].std():.0f}")
         print(f"   Memória (MB):     {subset['mem_max_mb'].mean():.1f} ± {subset['mem_max_mb'].std():.1f}")
+        if 'mem_arvore_mb' in subset.columns and subset['mem_arvore_mb'].notna().any():
+            print(f"   Memória árvore:   {subset['mem_arvore_mb'].mean():.1f} ± "
+                  f"{subset['mem_arvore_mb'].std():.1f}")
         print(f"   Energia Est. (J): {subset['energia_estimada_j'].mean():.1f} ± {subset['energia_estimada_j'].std():.1f}")
         print(f"   EDP (J·s):        {subset['edp'].mean():.1f} ± {subset['edp'].std():.1f}")
         if 'testes_executados' in subset.columns:
             print(f"   Testes:           {subset['testes_executados'].mean():.0f}")
+        if 'ipc' in subset.columns and subset['ipc'].notna().any():
+            print(f"   IPC:              {subset['ipc'].mean():.2f} ± {subset['ipc'].std():.2f} "
+                  f"({subset['instrucoes_por_j'].mean() / 1e9:.2f} G instruções/J)")
+        if 'page_faults' in subset.columns and subset['page_faults'].notna().any():
+            print(f"   Page faults:      {subset['page_faults'].mean():.0f} "
+                  f"(trocas de contexto: {subset['trocas_contexto'].mean():.0f})")
+        if 'energia_selecao_j' in subset.columns and subset['energia_selecao_j'].notna().any():
+            print(f"   Seleção TIA (J):  {subset['energia_selecao_j'].mean():.1f} "
+                  f"(execução: {subset['energia_execucao_j'].mean():.1f})")
+        if 'testes_pool' in subset.columns and subset['testes_pool'].notna().any():
+            gil = 'ativo' if subset['gil_ativo'].dropna().all() else 'desativado'
+            print(f"   Pool de threads:  {subset['testes_pool'].mean():.0f} testes "
+                  f"({subset['testes_sequenciais'].mean():.0f} sequenciais), GIL {gil}")
+        if 'energia_primeira_falha_j' in subset.columns and subset['energia_primeira_falha_j'].notna().any():
+            vermelhos = subset.dropna(subset=['energia_primeira_falha_j'])
+            print(f"   Até a 1ª falha:   {vermelhos['tempo_primeira_falha_s'].mean():.2f}s, "
+                  f"{vermelhos['energia_primeira_falha_j'].mean():.1f} J (n={len(vermelhos)})")
 
 def visualizar(df, output_dir='data/plots'):
     """Gera gráficos"""
@@ -203,6 +460,8 @@ def visualizar(df, output_dir='data/plots'):
         print(f"✅ Gráfico salvo: {output_dir}/edp_boxplot.png")
 
 def main():
+    # --filtrado: relatório, testes e gráficos sem as execuções excluídas
+    filtrado = '--filtrado' in sys.argv
     print("🔍 Analisando Métricas Simples (time -v)...")
     print("")
     
@@ -221,19 +480,42 @@ def main():
     
     # Calcular métricas derivadas
     df = calcular_metricas_derivadas(df)
+    df = normalizar_por_host(df)
+    if df['host'].nunique() > 1:
+        print(f"🖥️  {df['host'].nunique()} hosts: métricas *_rel normalizadas pelo baseline de cada host")
+    df = filtrar_execucoes(df)
+    imprimir_exclusoes(df)
     
-    # Salvar CSV
+    # Salvar CSV (todas as execuções, com as marcações do filtro)
     df.to_csv('data/resultados_simple.csv', index=False)
     print(f"✅ Dados salvos: data/resultados_simple.csv")
     
+    # Detecção de mudanças: só as execuções ainda não vistas alimentam o CUSUM
+    imprimir_alarmes(detectar_mudancas(df))
+    
+    # Conjunto analisado: bruto (padrão) ou filtrado
+    dados = df[~df['excluido']] if filtrado else df
+    print(f"\n📋 Conjunto analisado: {'filtrado' if filtrado else 'bruto'} ({len(dados)} execuções)")
+    
     # Relatório
-    gerar_relatorio(df)
+    gerar_relatorio(dados)
+    
+    # Memória por teste (execuções com o perfil do pytest_memoria.py)
+    memoria, _ = carregar_memoria()
+    if not memoria.empty:
+        imprimir_memoria(memoria[memoria['run_id'].astype(str).isin(dados['run_id'].astype(str))])
     
     # Testes estatísticos
-    teste_hipoteses(df)
+    teste_hipoteses(dados)
+    
+    # Intervalos de confiança (bootstrap BCa)
+    intervalos = intervalos_bootstrap(dados)
+    imprimir_intervalos(intervalos)
+    intervalos.to_csv('data/intervalos_bootstrap.csv', index=False)
+    print(f"✅ Intervalos salvos: data/intervalos_bootstrap.csv")
     
     # Gráficos
-    visualizar(df)
+    visualizar(dados)
     
     print("\n✅ Análise Completa!")
 
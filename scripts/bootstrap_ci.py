@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Intervalos de confiança BCa (bootstrap) para comparações entre estratégias.
+
+Para cada par de estratégias e cada métrica calcula diferença de médias,
+diferença de medianas, redução percentual, razão de médias (ex.: razão de
+EDP) e o delta de Cliff. Todas as reamostragens de um par saem de uma
+única matriz de índices (B × n), aplicada de uma vez a todas as métricas.
+"""
+
+import itertools
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+METRICAS = ['tempo_s', 'cpu_total_s', 'energia_estimada_j', 'edp']
+ESTATISTICAS = ['dif_media', 'dif_mediana', 'reducao_pct', 'razao', 'cliff_delta']
+N_BOOT = 20_000
+CONFIANCA = 0.95
+BLOCO = 25_000  # Máximo de reamostragens por bloco
+ELEMENTOS_BLOCO = 5_000_000  # Limite de B × n × m por bloco (memória)
+
+def _montar(media_a, media_b, mediana_a, mediana_b, cliff):
+    """Empilha as estatísticas na ordem de ESTATISTICAS: (..., S, m)"""
+    return np.stack(np.broadcast_arrays(
+        media_b - media_a,
+        mediana_b - mediana_a,
+        (media_a - media_b) / media_a * 100,
+        media_b / media_a,
+        cliff,
+    ), axis=-2)
+
+def _posicoes(a, b):
+    """
+    Para cada a[i, j]: quantos b[:, j] são menores (lo) e menores ou
+    iguais (hi). Com isso Σ_k sinal(b_k - a_i) = (nb - hi) - lo, sem
+    montar a matriz de pares na × nb.
+    """
+    ordenado = np.sort(b, axis=0)
+    lo = np.column_stack([np.searchsorted(ordenado[:, j], a[:, j], 'left')
+                          for j in range(a.shape[1])])
+    hi = np.column_stack([np.searchsorted(ordenado[:, j], a[:, j], 'right')
+                          for j in range(a.shape[1])])
+    return lo, hi
+
+def estatisticas(a, b):
+    """
+    Estatísticas de `b` (tratamento) contra `a` (referência).
+    a: (na, m), b: (nb, m) -> (len(ESTATISTICAS), m)
+    """
+    na, nb = len(a), len(b)
+    lo, hi = _posicoes(a, b)
+    # Delta de Cliff: P(b > a) - P(b < a) sobre todos os pares
+    cliff = ((nb - hi) - lo).sum(axis=0) / (na * nb)
+    return _montar(a.mean(axis=0), b.mean(axis=0),
+                   np.median(a, axis=0), np.median(b, axis=0), cliff)
+
+def _contagens(idx, n):
+    """Quantas vezes cada observação aparece em cada reamostragem: (B, n)"""
+    linhas = np.arange(len(idx))[:, None] * n
+    cont = np.bincount((idx + linhas).ravel(), minlength=len(idx) * n)
+    return cont.astype(np.int32).reshape(len(idx), n)
+
+def _acumulado(cont, ordem):
+    """Soma acumulada das contagens na ordem crescente dos valores: (B, n + 1)"""
+    acumulado = np.zeros((len(cont), cont.shape[1] + 1), dtype=np.int32)
+    np.cumsum(cont[:, ordem], axis=1, out=acumulado[:, 1:])
+    return acumulado
+
+def _mediana_contagens(acumulado, ordenado):
+    """Mediana de cada reamostragem a partir da soma acumulada das contagens"""
+    B, largura = acumulado.shape
+    n = int(acumulado[0, -1])
+    # Cada linha é crescente de 0 a n: com deslocamento por linha o array
+    # achatado também é, e um único searchsorted acha os postos centrais
+    deslocamento = np.arange(B, dtype=np.int64) * (n + 1)
+    plano = (acumulado[:, 1:] + deslocamento[:, None]).ravel()
+    centrais = []
+    for r in ((n - 1) // 2 + 1, n // 2 + 1):  # Postos (1-based); iguais para n ímpar
+        pos = np.searchsorted(plano, deslocamento + r) - np.arange(B) * (largura - 1)
+        centrais.append(ordenado[pos])
+    return (centrais[0] + centrais[1]) / 2
+
+def _estatisticas_boot(a, b, idx_a, idx_b):
+    """
+    `estatisticas` para um bloco de reamostragens (B, n) de índices.
+    Tudo sai das contagens de cada índice, sem materializar as amostras
+    (B, n, m): média = contagens · x / n; mediana e delta de Cliff pela
+    soma acumulada das contagens na ordem dos valores. Para o Cliff, as
+    posições de cada a_i entre os b ordenados são fixas, então
+    delta* = Σ_i c_a[i]·(#b* > a_i - #b* < a_i) / (na·nb), O(B·n) por
+    métrica em vez de B × na × nb comparações.
+    """
+    na, nb, m = len(a), len(b), a.shape[1]
+    cont_a, cont_b = _contagens(idx_a, na), _contagens(idx_b, nb)
+    media_a, media_b = cont_a @ a / na, cont_b @ b / nb
+    lo, hi = _posicoes(a, b)
+    ordem_a, ordem_b = np.argsort(a, axis=0), np.argsort(b, axis=0)
+    mediana_a, mediana_b, cliff = (np.empty((len(idx_a), m)) for _ in range(3))
+    for j in range(m):
+        acum_a = _acumulado(cont_a, ordem_a[:, j])
+        acum_b = _acumulado(cont_b, ordem_b[:, j])
+        mediana_a[:, j] = _mediana_contagens(acum_a, a[ordem_a[:, j], j])
+        mediana_b[:, j] = _mediana_contagens(acum_b, b[ordem_b[:, j], j])
+        menores = acum_b[:, lo[:, j]]
+        maiores = nb - acum_b[:, hi[:, j]]
+        cliff[:, j] = (cont_a * (maiores - menores)).sum(axis=1) / (na * nb)
+    return _montar(media_a, media_b, mediana_a, mediana_b, cliff)
+
+def _mediana_sem_um(x):
+    """Mediana de x sem a linha i, para cada i (fechada pela ordenação): (n, m)"""
+    n = len(x)
+    ordenado = np.sort(x, axis=0)
+    posto = np.empty_like(x, dtype=np.int64)
+    np.put_along_axis(posto, np.argsort(x, axis=0, kind='stable'),
+                      np.arange(n)[:, None], axis=0)
+
+    def restante(k):
+        # k-ésimo menor valor sem a linha i: pula o próprio elemento
+        return np.where(k < posto, ordenado[k], ordenado[min(k + 1, n - 1)])
+
+    k = (n - 1) // 2
+    return restante(k) if (n - 1) % 2 else (restante(k - 1) + restante(k)) / 2
+
+def _jackknife(a, b):
+    """
+    Valores leave-one-out de cada amostra: ((na, S, m), (nb, S, m)),
+    por fórmulas fechadas (média, mediana e somas de sinais por linha).
+    """
+    na, nb = len(a), len(b)
+    lo, hi = _posicoes(a, b)
+    linhas = (nb - hi) - lo            # Σ_k sinal(b_k - a_i)
+    lo_b, hi_b = _posicoes(b, a)
+    colunas = lo_b - (na - hi_b)       # Σ_i sinal(b_k - a_i)
+    total = linhas.sum(axis=0)
+
+    media_a, media_b = a.mean(axis=0), b.mean(axis=0)
+    mediana_a, mediana_b = np.median(a, axis=0), np.median(b, axis=0)
+    jack_a = _montar((a.sum(axis=0) - a) / (na - 1), media_b, _mediana_sem_um(a),
+                     mediana_b, (total - linhas) / ((na - 1) * nb))
+    jack_b = _montar(media_a, (b.sum(axis=0) - b) / (nb - 1), mediana_a,
+                     _mediana_sem_um(b), (total - colunas) / (na * (nb - 1)))
+    return jack_a, jack_b
+
+def _aceleracao(jack_a, jack_b):
+    """Aceleração BCa para duas amostras independentes (Efron & Tibshirani, 1993)"""
+    num = np.zeros(jack_a.shape[1:])
+    den = np.zeros(jack_a.shape[1:])
+    for jack in (jack_a, jack_b):
+        n = len(jack)
+        u = (n - 1) * (jack.mean(axis=0) - jack)
+        num += (u ** 3).sum(axis=0) / n ** 3
+        den += (u ** 2).sum(axis=0) / n ** 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        acc = num / (6 * den ** 1.5)
+    return np.nan_to_num(acc)
+
+def bca(a, b, n_boot=N_BOOT, confianca=CONFIANCA, rng=None):
+    """
+    Estimativa e IC BCa de todas as estatísticas para todas as métricas.
+    a: (na, m), b: (nb, m). Retorna (estimativa, inferior, superior), cada (S, m).
+    """
+    rng = rng if rng is not None else np.random.default_rng(0)
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    theta = estatisticas(a, b)
+
+    idx_a = rng.integers(0, len(a), size=(n_boot, len(a)))
+    idx_b = rng.integers(0, len(b), size=(n_boot, len(b)))
+    bloco = max(1, min(BLOCO, ELEMENTOS_BLOCO // (max(len(a), len(b)) * a.shape[1])))
+    boot = np.concatenate([
+        _estatisticas_boot(a, b, idx_a[i:i + bloco], idx_b[i:i + bloco])
+        for i in range(0, n_boot, bloco)
+    ])  # (B, S, m)
+
+    # Viés (z0) com empates contados pela metade (estatísticas discretas)
+    # (igualdade com tolerância: a soma em outra ordem muda o último bit)
+    empate = np.isclose(boot, theta, rtol=1e-9, atol=0)
+    prop = (((boot < theta) & ~empate).sum(axis=0) + 0.5 * empate.sum(axis=0)) / n_boot
+    z0 = norm.ppf(np.clip(prop, 1 / n_boot, 1 - 1 / n_boot))
+    acc = _aceleracao(*_jackknife(a, b))
+
+    z = norm.ppf([(1 - confianca) / 2, (1 + confianca) / 2])[:, None, None]
+    q = norm.cdf(z0 + (z0 + z) / (1 - acc * (z0 + z)))  # (2, S, m)
+    q = np.nan_to_num(q, nan=0.5)
+
+    boot.sort(axis=0)
+    pos = np.clip(np.round(q * (n_boot - 1)).astype(int), 0, n_boot - 1)
+    limites = np.take_along_axis(boot, pos, axis=0)
+    return theta, limites[0], limites[1]
+
+def _blocos_validos(a, b):
+    """
+    Métricas agrupadas pelas mesmas linhas sem NaN em `a` e em `b`:
+    [(colunas, linhas_a, linhas_b)]. Sem NaN é um só bloco (uma só
+    matriz de índices para todas as métricas, como antes).
+    """
+    validos_a, validos_b = ~np.isnan(a), ~np.isnan(b)
+    blocos = {}
+    for j in range(a.shape[1]):
+        chave = (validos_a[:, j].tobytes(), validos_b[:, j].tobytes())
+        blocos.setdefault(chave, []).append(j)
+    return [(colunas, validos_a[:, colunas[0]], validos_b[:, colunas[0]])
+            for colunas in blocos.values()]
+
+def intervalos_bootstrap(df, metricas=METRICAS, referencia='baseline',
+                         n_boot=N_BOOT, confianca=CONFIANCA, seed=0):
+    """
+    Tabela longa (par, metrica, estatistica, estimativa, ic_inf, ic_sup)
+    para a referência contra cada estratégia e para os demais pares. NaNs
+    saem por métrica e por grupo; métricas com menos de 2 valores em um
+    dos grupos ficam de fora do par.
+    """
+    metricas = [m for m in metricas if m in df.columns]
+    estrategias = [e for e in df['estrategia'].dropna().unique() if e != referencia]
+    estrategias = ([referencia] if referencia in set(df['estrategia']) else []) + sorted(estrategias)
+    grupos = {e: df.loc[df['estrategia'] == e, metricas].to_numpy(dtype=float)
+              for e in estrategias}
+
+    rng = np.random.default_rng(seed)
+    linhas = []
+    for ref, trat in itertools.combinations(estrategias, 2):
+        a, b = grupos[ref], grupos[trat]
+        theta, inf, sup = (np.full((len(ESTATISTICAS), len(metricas)), np.nan) for _ in range(3))
+        calculadas = np.zeros(len(metricas), dtype=bool)
+        for colunas, linhas_a, linhas_b in _blocos_validos(a, b):
+            if linhas_a.sum() < 2 or linhas_b.sum() < 2:
+                continue   # Menos de 2 valores em algum grupo: métrica fora do par
+            calculadas[colunas] = True
+            theta[:, colunas], inf[:, colunas], sup[:, colunas] = bca(
+                a[np.ix_(linhas_a, colunas)], b[np.ix_(linhas_b, colunas)], n_boot, confianca, rng)
+        for s, nome in enumerate(ESTATISTICAS):
+            for j in np.flatnonzero(calculadas):
+                linhas.append({'par': f'{trat} vs {ref}', 'metrica': metricas[j],
+                               'estatistica': nome, 'estimativa': theta[s, j],
+                               'ic_inf': inf[s, j], 'ic_sup': sup[s, j]})
+    return pd.DataFrame(linhas)
+
+def imprimir_intervalos(tabela, confianca=CONFIANCA, estatisticas=('reducao_pct', 'razao', 'cliff_delta')):
+    """Resumo legível dos intervalos"""
+    print("\n" + "="*60)
+    print(f"INTERVALOS DE CONFIANÇA BCa ({confianca:.0%})")
+    print("="*60)
+    if tabela.empty:
+        print("⚠️ Dados insuficientes para bootstrap")
+        return
+    for par, sub in tabela.groupby('par', sort=False):
+        print(f"\n📊 {par}")
+        for _, linha in sub[sub['estatistica'].isin(estatisticas)].iterrows():
+            print(f"   {linha['metrica']:<20} {linha['estatistica']:<12} "
+                  f"{linha['estimativa']:>9.3f}  [{linha['ic_inf']:.3f}, {linha['ic_sup']:.3f}]")
+
+def main():
+    caminho = sys.argv[1] if len(sys.argv) > 1 else 'data/resultados_simple.csv'
+    df = pd.read_csv(caminho)
+    tabela = intervalos_bootstrap(df)
+    imprimir_intervalos(tabela)
+    tabela.to_csv('data/intervalos_bootstrap.csv', index=False)
+    print(f"\n✅ Intervalos salvos: data/intervalos_bootstrap.csv")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Intensidade de carbono da rede por execução.
+
+Lê uma série local de intensidade (CSV ou Parquet com colunas
+`timestamp`, `regiao` e `gco2_kwh`; `regiao` é opcional) e anexa a cada
+execução a intensidade média no intervalo [início, início + tempo_s] e a
+emissão correspondente.
+
+A junção é feita por região em arrays ordenados: a intensidade é uma
+função degrau (cada valor vale até o próximo timestamp) e sua integral
+acumulada I(t) nos pontos da série sai de um cumsum. Para cada execução,
+I(início) e I(fim) vêm de um searchsorted vetorizado, e
+    intensidade média = (I(fim) - I(início)) / tempo_s
+    co2_g = energia_kwh × intensidade média
+o que equivale a integrar intensidade × potência no intervalo com a
+potência média da execução. Custo O((n_execucoes + n_pontos) log n_pontos).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+INTENSIDADE_PATHS = ['data/intensidade_carbono.parquet', 'data/intensidade_carbono.csv']
+REGIOES_PATH = 'data/regioes_hosts.json'   # {host: regiao}
+REGIAO_PADRAO = 'padrao'
+RESULTADOS_PATH = 'data/resultados_simple.csv'
+CARBONO_PATH = 'data/resultados_carbono.csv'
+J_POR_KWH = 3.6e6
+
+def carregar_intensidade(caminho):
+    """DataFrame (timestamp UTC, regiao, gco2_kwh) de CSV ou Parquet"""
+    if caminho.endswith('.parquet'):
+        try:
+            df = pd.read_parquet(caminho)
+        except ImportError:
+            print("❌ Leitura de Parquet requer pyarrow: pip install pyarrow")
+            sys.exit(1)
+    else:
+        df = pd.read_csv(caminho)
+    if 'regiao' not in df.columns:
+        df['regiao'] = REGIAO_PADRAO
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+    return df[['timestamp', 'regiao', 'gco2_kwh']]
+
+def _segundos(datas):
+    """Segundos Unix (float64) de uma Series datetime com fuso (qualquer resolução)"""
+    return ((datas - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)).to_numpy(dtype=float)
+
+class SerieIntensidade:
+    """Integral acumulada da intensidade (função degrau) de uma região"""
+
+    def __init__(self, t, valores):
+        ordem = np.argsort(t, kind='stable')
+        self.t = np.asarray(t, dtype=float)[ordem]
+        self.valores = np.asarray(valores, dtype=float)[ordem]
+        # Último ponto vale por um passo típico da série
+        passo = np.median(np.diff(self.t)) if len(self.t) > 1 else 0.0
+        self.fim = self.t[-1] + passo
+        self.acumulado = np.concatenate([[0.0], np.cumsum(self.valores[:-1] * np.diff(self.t))])
+
+    def integral(self, t):
+        """∫ intensidade de t[0] até t (vetorizado); NaN fora da cobertura"""
+        t = np.asarray(t, dtype=float)
+        k = np.clip(np.searchsorted(self.t, t, side='right') - 1, 0, len(self.t) - 1)
+        valor = self.acumulado[k] + self.valores[k] * (t - self.t[k])
+        return np.where((t >= self.t[0]) & (t <= self.fim), valor, np.nan)
+
+    def media(self, inicio, fim):
+        """Intensidade média em cada [inicio, fim]; instante único se fim == inicio"""
+        inicio, fim = np.asarray(inicio, dtype=float), np.asarray(fim, dtype=float)
+        duracao = fim - inicio
+        i_inicio = self.integral(inicio)
+        pontual = self.valores[np.clip(np.searchsorted(self.t, inicio, side='right') - 1,
+                                       0, len(self.t) - 1)]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media = (self.integral(fim) - i_inicio) / duracao
+        return np.where(duracao > 0, media, np.where(np.isnan(i_inicio), np.nan, pontual))
+
+def series_por_regiao(intensidade):
+    """{regiao: SerieIntensidade}"""
+    return {regiao: SerieIntensidade(_segundos(g['timestamp']), g['gco2_kwh'])
+            for regiao, g in intensidade.groupby('regiao', sort=False)}
+
+def regioes_execucoes(df, regioes_hosts=None, padrao=REGIAO_PADRAO):
+    """Região de cada execução: coluna `regiao`, senão mapa host -> região, senão padrão"""
+    if 'regiao' in df.columns:
+        return df['regiao'].fillna(padrao).astype(str)
+    hosts = df['host'] if 'host' in df.columns else pd.Series('desconhecido', index=df.index)
+    return hosts.map(regioes_hosts or {}).fillna(padrao).astype(str)
+
+def anexar_carbono(df, intensidade, regioes_hosts=None, padrao=REGIAO_PADRAO,
+                   coluna_energia='energia_estimada_j'):
+    """
+    Acrescenta `regiao`, `intensidade_gco2_kwh` e `co2_g` (NaN quando a
+    execução cai fora da série da sua região ou não tem timestamp).
+    """
+    df = df.copy()
+    df['regiao'] = regioes_execucoes(df, regioes_hosts, padrao)
+    ts = df['timestamp'] if 'timestamp' in df.columns else pd.Series(None, index=df.index)
+    inicio = _segundos(pd.to_datetime(ts, utc=True, format='ISO8601', errors='coerce'))
+    fim = inicio + df['tempo_s'].to_numpy(dtype=float)
+
+    media = np.full(len(df), np.nan)
+    regioes = df['regiao'].to_numpy()
+    for regiao, serie in series_por_regiao(intensidade).items():
+        sel = (regioes == regiao) & ~np.isnan(inicio)
+        if sel.any():
+            media[sel] = serie.media(inicio[sel], fim[sel])
+
+    df['intensidade_gco2_kwh'] = media
+    df['co2_g'] = df[coluna_energia].to_numpy(dtype=float) / J_POR_KWH * media
+    return df
+
+def encontrar_intensidade(caminhos=INTENSIDADE_PATHS):
+    return next((c for c in caminhos if os.path.exists(c)), None)
+
+def carregar_regioes(caminho=REGIOES_PATH):
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, 'r') as f:
+        return json.load(f)
+
+def imprimir_carbono(df):
+    cobertas = df['co2_g'].notna()
+    print(f"🌍 Intensidade de carbono: {cobertas.sum()}/{len(df)} execuções cobertas pela série")
+    if cobertas.any():
+        resumo = df[cobertas].groupby('estrategia')[['intensidade_gco2_kwh', 'co2_g']].mean()
+        for estrategia, linha in resumo.iterrows():
+            print(f"   {estrategia:<10} {linha['intensidade_gco2_kwh']:7.1f} gCO₂/kWh  "
+                  f"{linha['co2_g'] * 1000:9.3f} mgCO₂/execução")
+
+def main():
+    parser = argparse.ArgumentParser(description='Anexa intensidade de carbono às execuções')
+    parser.add_argument('--intensidade', default=encontrar_intensidade(),
+                        help='CSV/Parquet com timestamp, regiao, gco2_kwh')
+    parser.add_argument('--resultados', default=RESULTADOS_PATH)
+    parser.add_argument('--saida', default=CARBONO_PATH)
+    parser.add_argument('--regiao', default=REGIAO_PADRAO,
+                        help='Região das execuções sem coluna regiao nem host mapeado')
+    args = parser.parse_args()
+
+    if not args.intensidade:
+        print(f"❌ Série de intensidade não encontrada ({' ou '.join(INTENSIDADE_PATHS)})")
+        sys.exit(1)
+
+    inicio = time.perf_counter()
+    intensidade = carregar_intensidade(args.intensidade)
+    df = pd.read_csv(args.resultados, dtype={'run_id': str})
+    if 'timestamp' not in df.columns:
+        print(f"⚠️  {args.resultados} sem coluna timestamp (metrics.txt anteriores à linha "
+              "Timestamp:): co2_g fica vazio; regere com o pipeline.py")
+    df = anexar_carbono(df, intensidade, carregar_regioes(), args.regiao)
+    print(f"⏱️  {len(df)} execuções × {len(intensidade)} pontos em "
+          f"{time.perf_counter() - inicio:.2f}s")
+    imprimir_carbono(df)
+    df.to_csv(args.saida, index=False)
+    print(f"✅ Dados salvos: {args.saida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Detecção online de mudanças (regressões) no histórico de execuções.
+
+CUSUM bilateral autoiniciado (Hawkins) por (estratégia, métrica, host):
+cada execução é padronizada pela média/desvio de todas as anteriores da
+série (Welford) e convertida para escala normal pela distribuição t, o
+que compensa a incerteza da referência com poucas execuções. O estado é
+constante por série e salvo em JSON: cada chamada processa apenas as
+linhas novas, sem recomputar o histórico. Cada alarme informa o run ID
+em que a mudança começou (último ponto em que a soma acumulada estava
+zerada) e o run ID do alarme.
+"""
+
+import json
+import math
+import os
+import sys
+
+import pandas as pd
+from scipy.stats import norm, t as t_student
+
+METRICAS = ['tempo_s', 'energia_estimada_j', 'edp']
+ESTADO_PATH = 'data/changepoint_state.json'
+ALARMES_PATH = 'data/changepoints.csv'
+
+AQUECIMENTO = 3  # Execuções antes do primeiro teste (mínimo para um desvio)
+FOLGA_K = 0.5    # Folga do CUSUM (em desvios): ignora derivas menores que k
+LIMIAR_H = 5.0   # Limiar de alarme (em desvios acumulados)
+DESVIO_MIN = 0.01  # Desvio mínimo relativo à média (séries quase constantes)
+
+def novo_estado():
+    """Estado de uma série: referência (Welford) e as duas somas do CUSUM"""
+    return {
+        'n': 0, 'media': 0.0, 'm2': 0.0,            # Welford (referência)
+        's_pos': 0.0, 's_neg': 0.0,                 # CUSUM superior / inferior
+        'inicio_pos': None, 'inicio_neg': None,     # Run em que cada excursão começou
+        'soma_pos': 0.0, 'n_pos': 0, 'soma_neg': 0.0, 'n_neg': 0,
+        'ultimo': None,                             # (timestamp, run_id) processado
+    }
+
+def _desvio(estado):
+    desvio = math.sqrt(estado['m2'] / (estado['n'] - 1)) if estado['n'] > 1 else 0.0
+    return max(desvio, abs(estado['media']) * DESVIO_MIN, 1e-12)
+
+def atualizar(estado, valor, run_id):
+    """
+    Processa uma observação. Retorna um dict de alarme ou None.
+    Após um alarme a série reaprende a referência no novo regime.
+    """
+    n = estado['n']
+    z = None
+    if n >= AQUECIMENTO:
+        # Resíduo preditivo padronizado ~ t(n-1) sob a referência
+        t = (valor - estado['media']) / (_desvio(estado) * math.sqrt(1 + 1 / n))
+        z = float(norm.ppf(min(max(t_student.cdf(t, n - 1), 1e-12), 1 - 1e-12)))
+
+    estado['n'] = n + 1
+    delta = valor - estado['media']
+    estado['media'] += delta / estado['n']
+    estado['m2'] += delta * (valor - estado['media'])
+    if z is None:
+        return None
+    media_ref = estado['media'] - delta / estado['n']  # Média antes desta execução
+    for lado, sinal in (('pos', 1), ('neg', -1)):
+        s = estado[f's_{lado}']
+        if s == 0:
+            estado[f'inicio_{lado}'] = run_id
+            estado[f'soma_{lado}'], estado[f'n_{lado}'] = 0.0, 0
+        estado[f's_{lado}'] = max(0.0, s + sinal * z - FOLGA_K)
+        if estado[f's_{lado}'] > 0:
+            estado[f'soma_{lado}'] += valor
+            estado[f'n_{lado}'] += 1
+
+    for lado, direcao in (('pos', 'aumento'), ('neg', 'queda')):
+        if estado[f's_{lado}'] > LIMIAR_H:
+            nova_media = estado[f'soma_{lado}'] / estado[f'n_{lado}']
+            alarme = {
+                'direcao': direcao,
+                'run_inicio': estado[f'inicio_{lado}'],
+                'run_alarme': run_id,
+                'media_anterior': media_ref,
+                'media_nova': nova_media,
+                'variacao_pct': (nova_media - media_ref) / media_ref * 100
+                                if media_ref else float('nan'),
+            }
+            ultimo = estado['ultimo']
+            estado.clear()
+            estado.update(novo_estado(), ultimo=ultimo)
+            return alarme
+    return None
+
+def carregar_estado(path=ESTADO_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def salvar_estado(estados, path=ESTADO_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(estados, f)
+    os.replace(tmp, path)
+
+def _instantes(ts):
+    """
+    Timestamps ISO 8601 (qualquer fuso) → texto em UTC comparável como
+    string ('' se ausente), o formato do `ultimo` salvo no estado
+    """
+    utc = pd.to_datetime(pd.Series(ts, dtype=object), utc=True, format='ISO8601',
+                         errors='coerce')
+    return utc.dt.strftime('%Y-%m-%dT%H:%M:%S+00:00').fillna('')
+
+def _ordem(df):
+    """Ordena cronologicamente (instante em UTC, depois run_id numérico)"""
+    df = df.copy()
+    ts = df['timestamp'] if 'timestamp' in df.columns else pd.Series(None, index=df.index)
+    df['_ts'] = _instantes(ts).to_numpy()
+    df['_run'] = pd.to_numeric(df['run_id'], errors='coerce').fillna(0).astype('int64')
+    return df.sort_values(['_ts', '_run'], kind='stable')
+
+def detectar_mudancas(df, metricas=METRICAS, estado_path=ESTADO_PATH,
+                      alarmes_path=ALARMES_PATH):
+    """
+    Alimenta os detectores com as linhas ainda não vistas de `df` e
+    persiste o estado. Retorna a lista de alarmes novos.
+    """
+    estados = carregar_estado(estado_path)
+    metricas = [m for m in metricas if m in df.columns]
+    host = df['host'].fillna('desconhecido') if 'host' in df.columns else 'desconhecido'
+    df = _ordem(df.assign(host=host))
+
+    alarmes = []
+    for (estrategia, host), grupo in df.groupby(['estrategia', 'host'], sort=False):
+        for metrica in metricas:
+            chave = f'{estrategia}|{metrica}|{host}'
+            estado = estados.setdefault(chave, novo_estado())
+            ultimo = None
+            if estado['ultimo']:   # Estados antigos guardam o timestamp no fuso original
+                ultimo = (_instantes([estado['ultimo'][0]])[0] if estado['ultimo'][0] else '',
+                          estado['ultimo'][1])
+            for ts, run, run_id, valor in zip(grupo['_ts'], grupo['_run'],
+                                              grupo['run_id'], grupo[metrica]):
+                if ultimo is not None and (ts, run) <= ultimo:
+                    continue  # Já processada em uma chamada anterior
+                ultimo = (ts, int(run))
+                estado['ultimo'] = list(ultimo)
+                if pd.isna(valor):
+                    continue
+                alarme = atualizar(estado, float(valor), str(run_id))
+                if alarme:
+                    alarmes.append({'estrategia': estrategia, 'metrica': metrica,
+                                    'host': host, **alarme})
+
+    salvar_estado(estados, estado_path)
+    if alarmes and alarmes_path:
+        novo = pd.DataFrame(alarmes)
+        novo.to_csv(alarmes_path, mode='a', index=False,
+                    header=not os.path.exists(alarmes_path))
+    return alarmes
+
+def imprimir_alarmes(alarmes):
+    print("\n" + "="*60)
+    print("DETECÇÃO DE MUDANÇAS (CUSUM)")
+    print("="*60)
+    if not alarmes:
+        print("✅ Nenhuma mudança detectada nas execuções novas")
+        return
+    for a in alarmes:
+        simbolo = '🔺' if a['direcao'] == 'aumento' else '🔻'
+        print(f"{simbolo} {a['estrategia']}/{a['metrica']} ({a['host']}): "
+              f"{a['variacao_pct']:+.1f}% a partir do run {a['run_inicio']} "
+              f"(alarme no run {a['run_alarme']})")
+
+def main():
+    caminho = sys.argv[1] if len(sys.argv) > 1 else 'data/resultados_simple.csv'
+    df = pd.read_csv(caminho, dtype={'run_id': str})
+    imprimir_alarmes(detectar_mudancas(df))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Afinidade de CPU e estado da frequência por execução, para medições com
+menos ruído e uma explicação quando uma execução sai da curva.
+
+    python scripts/cpu_pinning.py estado                  # linhas Governor/Turbo deste host
+    python scripts/cpu_pinning.py conjunto 0-3 --sem-smt  # núcleos que seriam usados
+    python scripts/local_backend.py parallel --cpus=0-3 --sem-smt
+
+- conjunto(): núcleos pedidos (lista do kernel, "0-3,6") dentro da
+  afinidade atual; com `sem_smt` fica um núcleo lógico por núcleo físico
+  (o irmão de hyperthreading não recebe trabalho da medição).
+- afinidade_thread(): fixa a thread atual no conjunto enquanto o processo
+  medido é criado; ele e os filhos herdam a afinidade (sched_setaffinity
+  sem preexec_fn, que não é seguro com a thread do amostrador rodando).
+  Cada worker do xdist ainda é fixado num núcleo do conjunto pelo
+  pytest_afinidade.py (PYTEST_PLUGINS), sem migrar entre eles.
+- estado(): linhas `Afinidade:`, `Governor:` e `Turbo:` do cabeçalho do
+  metrics.txt; a frequência mín./média/máx. durante a execução vem da
+  série do AmostradorSerie, restrita aos núcleos do conjunto.
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+
+from idle_monitor import ler_frequencia_ghz
+
+CPU_DIR = '/sys/devices/system/cpu'
+TURBO = [   # (arquivo, valor que significa turbo ativo)
+    (f'{CPU_DIR}/intel_pstate/no_turbo', '0'),
+    (f'{CPU_DIR}/cpufreq/boost', '1'),
+]
+
+def ler_lista(texto):
+    """Lista de CPUs no formato do kernel ("0-3,6") → [0, 1, 2, 3, 6]"""
+    cpus = set()
+    for parte in texto.strip().split(','):
+        if not parte:
+            continue
+        inicio, _, fim = parte.partition('-')
+        cpus.update(range(int(inicio), int(fim or inicio) + 1))
+    return sorted(cpus)
+
+def formatar_lista(cpus):
+    """[0, 1, 2, 3, 6] → "0-3,6" """
+    partes, cpus = [], sorted(cpus)
+    inicio = anterior = None
+    for cpu in cpus + [None]:
+        if cpu is not None and anterior is not None and cpu == anterior + 1:
+            anterior = cpu
+            continue
+        if inicio is not None:
+            partes.append(str(inicio) if inicio == anterior else f'{inicio}-{anterior}')
+        inicio = anterior = cpu
+    return ','.join(partes)
+
+def _ler(caminho):
+    try:
+        with open(caminho) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def disponiveis():
+    """Núcleos em que este processo pode rodar"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def irmaos_smt(cpu):
+    """Núcleos lógicos do mesmo núcleo físico (inclui `cpu`)"""
+    lista = _ler(f'{CPU_DIR}/cpu{cpu}/topology/thread_siblings_list')
+    return set(ler_lista(lista)) if lista else {cpu}
+
+def conjunto(spec=None, sem_smt=False):
+    """Núcleos da medição: `spec` ∩ afinidade atual, um por núcleo físico se `sem_smt`"""
+    cpus = set(disponiveis())
+    if spec:
+        pedidos = set(ler_lista(spec))
+        if not pedidos & cpus:
+            raise ValueError(f"nenhum dos núcleos {spec} está disponível "
+                             f"(afinidade atual: {formatar_lista(cpus)})")
+        cpus &= pedidos
+    if sem_smt:
+        cpus = {c for c in cpus if c == min(irmaos_smt(c) & cpus)}
+    return sorted(cpus)
+
+@contextlib.contextmanager
+def afinidade_thread(cpus):
+    """Fixa a thread atual em `cpus` (processos criados dentro herdam)"""
+    if not cpus or not hasattr(os, 'sched_setaffinity'):
+        yield
+        return
+    anterior = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, cpus)
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, anterior)
+
+def ler_governor(cpus=None):
+    """Governor do cpufreq dos núcleos ('performance', 'a/b' se diferem) ou None"""
+    governors = {_ler(f'{CPU_DIR}/cpu{c}/cpufreq/scaling_governor')
+                 for c in (cpus or disponiveis())} - {None}
+    return '/'.join(sorted(governors)) or None
+
+def ler_turbo():
+    """'ativo', 'desativado' ou None (intel_pstate ou cpufreq/boost ausentes)"""
+    for arquivo, ativo in TURBO:
+        valor = _ler(arquivo)
+        if valor is not None:
+            return 'ativo' if valor == ativo else 'desativado'
+    return None
+
+def estado(cpus=None, sem_smt=False):
+    """Linhas do cabeçalho do metrics.txt (só o que o host expõe)"""
+    linhas = []
+    if cpus:
+        linhas.append(f"Afinidade: {formatar_lista(cpus)}{' (sem SMT)' if sem_smt else ''}")
+    governor, turbo = ler_governor(cpus), ler_turbo()
+    if governor:
+        linhas.append(f"Governor: {governor}")
+    if turbo:
+        linhas.append(f"Turbo: {turbo}")
+    return linhas
+
+def linha_frequencia(resumo):
+    """Linha do metrics.txt a partir de (mín., média, máx.) em GHz"""
+    if resumo is None:
+        return ''
+    minimo, media, maximo = resumo
+    return f"Frequência (GHz): mín {minimo:.2f}, média {media:.2f}, máx {maximo:.2f}\n"
+
+def main():
+    parser = argparse.ArgumentParser(description='Afinidade de CPU e estado da frequência')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    sub.add_parser('estado', help='Linhas Governor/Turbo do metrics.txt')
+    con = sub.add_parser('conjunto', help='Núcleos usados por --cpus/--sem-smt')
+    con.add_argument('cpus', nargs='?')
+    con.add_argument('--sem-smt', action='store_true')
+    args = parser.parse_args()
+
+    if args.comando == 'estado':
+        # Também usado no cabeçalho dos workflows (`... | tee -a metrics.txt`)
+        print('\n'.join(estado()) or 'Governor: indisponível')
+        return
+    try:
+        cpus = conjunto(args.cpus, args.sem_smt)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    freq = ler_frequencia_ghz(cpus)
+    print(f"🔧 {len(cpus)} núcleos: {formatar_lista(cpus)}"
+          + (f" ({freq:.2f} GHz agora)" if freq else ''))
+    for cpu in cpus:
+        irmaos = sorted(irmaos_smt(cpu) - {cpu})
+        if irmaos:
+            print(f"   cpu{cpu}: irmãos SMT {formatar_lista(irmaos)}")
+
+if __name__ == "__main__":
+    main()
@@ -8,239 +8,140 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 import numpy as np
+import os
+import sys
 
-# Configurações globais
-plt.rcParams['figure.dpi'] = 300
-plt.rcParams['font.size'] = 9
-plt.rcParams['font.family'] = 'serif'
-plt.rcParams['axes.labelsize'] = 10
-plt.rcParams['axes.titlesize'] = 11
-plt.rcParams['xtick.labelsize'] = 8
-plt.rcParams['ytick.labelsize'] = 8
+from plot_panels import (LABELS, agrupar, painel_barras_variacao, painel_cpu, painel_edp,
+                         painel_tempo, presentes, renderizar, rotulo_n, variacoes)
 
-# Paleta de cores
-COLORS = {
-    'baseline': '#7fb3d5',
-    'parallel': '#e74c3c',
-    'tia': '#27ae60'
+# Configurações globais (aplicadas na figura; entram no hash do cache)
+ESTILO = {
+    'figure.dpi': 300,
+    'font.size': 9,
+    'font.family': 'serif',
+    'axes.labelsize': 10,
+    'axes.titlesize': 11,
+    'xtick.labelsize': 8,
+    'ytick.labelsize': 8,
 }
 
-ORDER = ['baseline', 'parallel', 'tia']
-LABELS = {
-    'baseline': 'Baseline\n(Sequencial)',
-    'parallel': 'Paralelo\n(xdist)',
-    'tia': 'TIA\n(Testmon)'
-}
+def load_data(filepath='data/resultados_simple.csv', filtrado=False):
+    df = pd.read_csv(filepath)
+    if filtrado and 'excluido' in df.columns:
+        df = df[~df['excluido']]
+    return df
+
+def _rotulo_variacao(val):
+    # Se muito grande, formato especial
+    return f'{val:.0f}%' if abs(val) > 100 else f'{val:+.0f}%'
 
-def load_data(filepath='data/resultados_simple.csv'):
-    return pd.read_csv(filepath)
+def create_combined_figure(grupos):
+    """Cria figura 2x2 com os 4 gráficos principais (mesmos painéis das figuras avulsas)"""
 
-def create_combined_figure(df, output_path='data/plots/figura_combinada_2x2.png'):
-    """Cria figura 2x2 com os 4 gráficos principais"""
-    
     # Criar figura e grid
     fig = plt.figure(figsize=(14, 10))
     gs = gridspec.GridSpec(2, 2, figure=fig, hspace=0.35, wspace=0.3,
                           left=0.08, right=0.95, top=0.93, bottom=0.06)
-    
+
     # =========================================================================
     # (A) Superior Esquerdo: TEMPO DE EXECUÇÃO
     # =========================================================================
     ax1 = fig.add_subplot(gs[0, 0])
-    
-    bp1 = ax1.boxplot(
-        [df[df['estrategia'] == s]['tempo_s'].values for s in ORDER],
-        labels=[LABELS[s] for s in ORDER],
-        patch_artist=True,
-        widths=0.6,
-        showmeans=True,
-        meanprops=dict(marker='D', markerfacecolor='white', 
-                      markeredgecolor='black', markersize=5)
-    )
-    
-    for patch, estrategia in zip(bp1['boxes'], ORDER):
-        patch.set_facecolor(COLORS[estrategia])
-        patch.set_alpha(0.7)
-    
-    # Valores médios
-    for i, estrategia in enumerate(ORDER, 1):
-        mean_val = df[df['estrategia'] == estrategia]['tempo_s'].mean()
-        ax1.text(i, mean_val, f'{mean_val:.2f}s', 
-                ha='center', va='bottom', fontweight='bold', fontsize=8)
-    
-    # Linha de referência
-    baseline_mean = df[df['estrategia'] == 'baseline']['tempo_s'].mean()
-    ax1.axhline(baseline_mean, color='gray', linestyle='--', 
-               alpha=0.5, linewidth=1)
-    
+    painel_tempo(ax1, grupos, compacto=True)
+
     ax1.set_ylabel('Tempo (segundos)', fontweight='bold')
     ax1.set_xlabel('Estratégia', fontweight='bold')
     ax1.set_title('(A) Tempo de Execução', fontweight='bold', loc='left', pad=10)
-    ax1.grid(axis='y', alpha=0.3, linestyle='--')
-    
+
     # Adicionar significância estatística
-    ax1.text(2, ax1.get_ylim()[1] * 0.95, 'p<0.01', 
+    ax1.text(2, ax1.get_ylim()[1] * 0.95, 'p<0.01',
             ha='center', fontsize=8, bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
-    
+
     # =========================================================================
     # (B) Superior Direito: ENERGY-DELAY PRODUCT (Escala Log)
     # =========================================================================
     ax2 = fig.add_subplot(gs[0, 1])
-    
-    bp2 = ax2.boxplot(
-        [df[df['estrategia'] == s]['edp'].values for s in ORDER],
-        labels=[LABELS[s] for s in ORDER],
-        patch_artist=True,
-        widths=0.6,
-        showmeans=True,
-        meanprops=dict(marker='D', markerfacecolor='white', 
-                      markeredgecolor='black', markersize=5)
-    )
-    
-    for patch, estrategia in zip(bp2['boxes'], ORDER):
-        patch.set_facecolor(COLORS[estrategia])
-        patch.set_alpha(0.7)
-    
-    # Valores médios
-    for i, estrategia in enumerate(ORDER, 1):
-        mean_val = df[df['estrategia'] == estrategia]['edp'].mean()
-        ax2.text(i, mean_val, f'{mean_val:.1f}', 
-                ha='center', va='bottom', fontweight='bold', fontsize=8)
-    
-    ax2.set_yscale('log')
+    painel_edp(ax2, grupos, compacto=True)
+
     ax2.set_ylabel('EDP (J·s) [escala log]', fontweight='bold')
     ax2.set_xlabel('Estratégia', fontweight='bold')
     ax2.set_title('(B) Energy-Delay Product', fontweight='bold', loc='left', pad=10)
-    ax2.grid(axis='y', alpha=0.3, linestyle='--', which='both')
-    
+
     # Adicionar significância
-    ax2.text(2, ax2.get_ylim()[1] * 0.7, 'p<0.001', 
+    ax2.text(2, ax2.get_ylim()[1] * 0.7, 'p<0.001',
             ha='center', fontsize=8, bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
-    
+
     # =========================================================================
     # (C) Inferior Esquerdo: UTILIZAÇÃO DE CPU
     # =========================================================================
     ax3 = fig.add_subplot(gs[1, 0])
-    
-    bp3 = ax3.boxplot(
-        [df[df['estrategia'] == s]['cpu_pct'].values for s in ORDER],
-        labels=[LABELS[s] for s in ORDER],
-        patch_artist=True,
-        widths=0.6,
-        showmeans=True,
-        meanprops=dict(marker='D', markerfacecolor='white', 
-                      markeredgecolor='black', markersize=5)
-    )
-    
-    for patch, estrategia in zip(bp3['boxes'], ORDER):
-        patch.set_facecolor(COLORS[estrategia])
-        patch.set_alpha(0.7)
-    
-    # Valores médios
-    for i, estrategia in enumerate(ORDER, 1):
-        mean_val = df[df['estrategia'] == estrategia]['cpu_pct'].mean()
-        ax3.text(i, mean_val, f'{mean_val:.0f}%', 
-                ha='center', va='bottom', fontweight='bold', fontsize=8)
-    
-    # Linha 100% (1 core)
-    ax3.axhline(100, color='orange', linestyle='--', 
-               alpha=0.6, linewidth=1.5, label='1 core')
-    
+    painel_cpu(ax3, grupos, compacto=True)
+
     ax3.set_ylabel('CPU (%)', fontweight='bold')
     ax3.set_xlabel('Estratégia', fontweight='bold')
     ax3.set_title('(C) Utilização de CPU', fontweight='bold', loc='left', pad=10)
-    ax3.grid(axis='y', alpha=0.3, linestyle='--')
     ax3.legend(loc='upper left', fontsize=8)
-    
+
     # =========================================================================
     # (D) Inferior Direito: VARIAÇÃO PERCENTUAL vs BASELINE
     # =========================================================================
     ax4 = fig.add_subplot(gs[1, 1])
-    
-    # Calcular variações
-    baseline_tempo = df[df['estrategia'] == 'baseline']['tempo_s'].mean()
-    baseline_energia = df[df['estrategia'] == 'baseline']['energia_estimada_j'].mean()
-    baseline_edp = df[df['estrategia'] == 'baseline']['edp'].mean()
-    
-    estrategias = ['parallel', 'tia']
-    x_pos = np.arange(len(estrategias))
+
+    tratamentos = [e for e in presentes(grupos) if e != 'baseline']
+    x_pos = np.arange(len(tratamentos))  # Tratamentos além do baseline
     width = 0.25
-    
-    # Calcular variações
-    tempo_vars = []
-    energia_vars = []
-    edp_vars = []
-    
-    for est in estrategias:
-        subset = df[df['estrategia'] == est]
-        tempo_vars.append(((subset['tempo_s'].mean() - baseline_tempo) / baseline_tempo) * 100)
-        energia_vars.append(((subset['energia_estimada_j'].mean() - baseline_energia) / baseline_energia) * 100)
-        edp_vars.append(((subset['edp'].mean() - baseline_edp) / baseline_edp) * 100)
-    
+    series = [
+        ('Tempo', variacoes(grupos, 'tempo_s', tratamentos), '#3498db', -width),
+        ('Energia', variacoes(grupos, 'energia_estimada_j', tratamentos), '#e67e22', 0),
+        ('EDP', variacoes(grupos, 'edp', tratamentos), '#9b59b6', width),
+    ]
+
     # Criar barras agrupadas
-    bars1 = ax4.bar(x_pos - width, tempo_vars, width, label='Tempo', 
-                    color='#3498db', alpha=0.8)
-    bars2 = ax4.bar(x_pos, energia_vars, width, label='Energia', 
-                    color='#e67e22', alpha=0.8)
-    bars3 = ax4.bar(x_pos + width, edp_vars, width, label='EDP', 
-                    color='#9b59b6', alpha=0.8)
-    
+    for rotulo, valores, cor, deslocamento in series:
+        painel_barras_variacao(ax4, x_pos + deslocamento, valores, cor, _rotulo_variacao,
+                               fontsize=7, width=width, label=rotulo, alpha=0.8)
+
     # Linha zero
     ax4.axhline(0, color='black', linewidth=1, linestyle='-')
-    
-    # Adicionar valores nas barras
-    for bars, values in [(bars1, tempo_vars), (bars2, energia_vars), (bars3, edp_vars)]:
-        for bar, val in zip(bars, values):
-            height = bar.get_height()
-            if abs(val) > 100:  # Se muito grande, formato especial
-                label = f'{val:.0f}%'
-            else:
-                label = f'{val:+.0f}%'
-            ax4.text(bar.get_x() + bar.get_width()/2., height,
-                    label, ha='center', 
-                    va='bottom' if val > 0 else 'top', 
-                    fontweight='bold', fontsize=7)
-    
+
     ax4.set_ylabel('Variação vs Baseline (%)', fontweight='bold')
     ax4.set_xlabel('Estratégia', fontweight='bold')
     ax4.set_title('(D) Variação Percentual', fontweight='bold', loc='left', pad=10)
     ax4.set_xticks(x_pos)
-    ax4.set_xticklabels(['Paralelo', 'TIA'])
+    ax4.set_xticklabels([LABELS[e].split('\n')[0] for e in tratamentos])
     ax4.legend(loc='upper right', fontsize=8, ncol=3)
     ax4.grid(axis='y', alpha=0.3, linestyle='--')
-    
+
     # Ajustar limites do eixo Y para acomodar valores grandes
-    y_max = max(max(tempo_vars), max(energia_vars), max(edp_vars))
-    y_min = min(min(tempo_vars), min(energia_vars), min(edp_vars))
-    ax4.set_ylim(y_min * 1.2, y_max * 1.15)
-    
+    todos = [v for _, valores, _, _ in series for v in valores]
+    ax4.set_ylim(np.nanmin(todos) * 1.2, np.nanmax(todos) * 1.15)
+
     # =========================================================================
     # Título geral
     # =========================================================================
-    fig.suptitle('Comparação de Estratégias de Otimização de Testes em CI (n=10)', 
+    fig.suptitle(f'Comparação de Estratégias de Otimização de Testes em CI ({rotulo_n(grupos)})',
                 fontweight='bold', fontsize=13, y=0.98)
-    
-    # Salvar
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    print(f"✅ Figura combinada 2x2 salva: {output_path}")
-    print(f"   Resolução: 300 DPI")
-    print(f"   Tamanho: 14x10 polegadas (~3500x2500 pixels)")
-    print(f"   Formato: PNG de alta qualidade")
+    return fig
 
 def main():
     print("🎨 Criando Figura Combinada 2x2...")
     print("")
-    
+
     # Carregar dados
-    df = load_data()
+    df = load_data(filtrado='--filtrado' in sys.argv)
     print(f"✅ {len(df)} execuções carregadas")
     print("")
-    
-    # Criar figura combinada
-    create_combined_figure(df)
-    
+
+    # Criar figura combinada (pulada se dados e estilo não mudaram)
+    output_path = 'data/plots/figura_combinada_2x2.png'
+    gerados = renderizar([(os.path.basename(output_path), create_combined_figure,
+                           {'grupos': agrupar(df)})],
+                         ESTILO, os.path.dirname(output_path), forcar='--forcar' in sys.argv)
+    if gerados:
+        print(f"   Resolução: 300 DPI")
+        print(f"   Tamanho: 14x10 polegadas (~3500x2500 pixels)")
+        print(f"   Formato: PNG de alta qualidade")
+
     print("")
     print("=" * 60)
     print("✅ Figura Combinada Criada com Sucesso!")
@@ -266,4 +167,4 @@ def main():
     print('    (C) Utilização de CPU, (D) Variação percentual vs baseline."')
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Quanto tempo e energia a coleta de cobertura acrescenta a cada
+estratégia, para decidir se ela cabe em toda execução da CI.
+
+Cada estratégia roda em três modos, pelo LocalBackend (metrics.txt no
+formato de sempre, em data/custo_cobertura/):
+  - sem: o comando do experimento;
+  - sysmon: + pytest_cobertura.py (sys.monitoring, bitmap por teste);
+  - tracing: + pytest-cov com contexto por teste (sys.settrace), o
+    equivalente do que já está no requirements.txt.
+
+As execuções de cada repetição rodam em ordem sorteada. O acréscimo é a
+diferença das medianas de tempo e energia estimada (power_model.py) para
+o modo `sem` da mesma estratégia; sai em data/custo_cobertura.csv.
+
+    python scripts/custo_cobertura.py --repeticoes 5
+    python scripts/custo_cobertura.py --estrategias baseline parallel --modos sem sysmon
+
+As estratégias são as do backend local (COMANDOS). O modo sysmon
+requer Python 3.12+ e é pulado em versões anteriores. Combinações em
+INCOMPATIVEIS ficam de fora:
+  - tia e tia_parallel × tracing: o testmon já rastreia com o
+    coverage.py e os contextos por teste do pytest-cov conflitam com ele;
+  - threads × sysmon e tracing: o pool executa o corpo dos testes fora
+    do pytest_runtest_protocol de cada item, então as linhas cairiam em
+    `sessao` (sysmon) ou sem contexto de teste (pytest-cov), e não no
+    teste que as executou.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+
+from local_backend import COMANDOS, LocalBackend, RAIZ
+
+CUSTO_DIR = RAIZ / 'data' / 'custo_cobertura'
+CUSTO_PATH = 'data/custo_cobertura.csv'
+ESTRATEGIAS = list(COMANDOS)
+MODOS = {
+    'sem': [],
+    'sysmon': ['-p', 'scripts.pytest_cobertura', '--cobertura={destino}'],
+    'tracing': ['--cov=src', '--cov-context=test', '--cov-report='],
+}
+INCOMPATIVEIS = {('tia', 'tracing'), ('tia_parallel', 'tracing'),
+                 ('threads', 'sysmon'), ('threads', 'tracing')}   # Motivos na docstring
+
+def comandos_cobertura(estrategias, modos):
+    """COMANDOS do backend para cada estratégia × modo (`<estrategia>_<modo>`)"""
+    comandos = {}
+    for estrategia in estrategias:
+        for modo in modos:
+            if (estrategia, modo) in INCOMPATIVEIS:
+                print(f"⏭️  {estrategia} × {modo}: combinação incompatível, pulada")
+                continue
+            destino = CUSTO_DIR / f'cobertura-{estrategia}.npz'
+            extras = [a.format(destino=destino) for a in MODOS[modo]]
+            comandos[f'{estrategia}_{modo}'] = [*COMANDOS[estrategia], *extras]
+    return comandos
+
+def medir(estrategias=ESTRATEGIAS, modos=tuple(MODOS), repeticoes=3, seed=0):
+    """Roda as repetições e devolve o DataFrame das execuções"""
+    from analyze_simple_metrics import calcular_metricas_derivadas, load_all_metrics
+
+    if CUSTO_DIR.exists():
+        shutil.rmtree(CUSTO_DIR)
+    comandos = comandos_cobertura(estrategias, modos)
+    backend = LocalBackend(data_dir=CUSTO_DIR, comandos=comandos)
+    backend.env = {**os.environ, 'TESTMON_DATAFILE': str(CUSTO_DIR / '.testmondata'),
+                   'COVERAGE_FILE': str(CUSTO_DIR / '.coverage')}
+    rng = random.Random(seed)
+    for rodada in range(1, repeticoes + 1):
+        ordem = list(comandos)
+        rng.shuffle(ordem)
+        print(f"\n🔁 Repetição {rodada}/{repeticoes}")
+        for variante in ordem:
+            asyncio.run(backend.executar(variante, rodada=rodada))
+
+    df = calcular_metricas_derivadas(load_all_metrics(CUSTO_DIR), raw_dir=CUSTO_DIR)
+    modo = df['estrategia'].str.rsplit('_', n=1)
+    df['modo'], df['estrategia'] = modo.str[1], modo.str[0]
+    return df
+
+def acrescimos(df):
+    """Medianas por estratégia × modo e o acréscimo em relação ao modo `sem`"""
+    medianas = df.groupby(['estrategia', 'modo'])[['tempo_s', 'cpu_total_s',
+                                                  'energia_estimada_j']].median().reset_index()
+    sem = medianas[medianas['modo'] == 'sem'].set_index('estrategia')
+    for coluna, nome in [('tempo_s', 'tempo'), ('energia_estimada_j', 'energia')]:
+        referencia = medianas['estrategia'].map(sem[coluna])
+        medianas[f'acrescimo_{nome}'] = medianas[coluna] - referencia
+        medianas[f'acrescimo_{nome}_pct'] = 100 * medianas[f'acrescimo_{nome}'] / referencia
+    return medianas
+
+def main():
+    parser = argparse.ArgumentParser(description='Custo de tempo e energia da cobertura')
+    parser.add_argument('--estrategias', nargs='+', choices=ESTRATEGIAS, default=ESTRATEGIAS)
+    parser.add_argument('--modos', nargs='+', choices=list(MODOS), default=list(MODOS))
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    modos = list(dict.fromkeys(['sem', *args.modos]))
+    if 'sysmon' in modos and sys.version_info < (3, 12):
+        print("⚠️ sys.monitoring requer Python 3.12+: modo sysmon pulado")
+        modos.remove('sysmon')
+
+    df = medir(args.estrategias, modos, args.repeticoes, args.seed)
+    tabela = acrescimos(df)
+    tabela.to_csv(CUSTO_PATH, index=False)
+
+    print("\n" + "=" * 60)
+    print("CUSTO DA COBERTURA (medianas)")
+    print("=" * 60)
+    for estrategia, grupo in tabela.groupby('estrategia', sort=False):
+        print(f"\n📌 {estrategia.upper()}")
+        for _, linha in grupo.iterrows():
+            extra = '' if linha['modo'] == 'sem' else \
+                (f"  ({linha['acrescimo_tempo']:+.2f}s {linha['acrescimo_tempo_pct']:+.0f}%, "
+                 f"{linha['acrescimo_energia']:+.1f} J {linha['acrescimo_energia_pct']:+.0f}%)")
+            print(f"   {linha['modo']:<8} {linha['tempo_s']:6.2f}s  "
+                  f"{linha['energia_estimada_j']:7.1f} J{extra}")
+    print(f"\n✅ Dados salvos: {CUSTO_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Baixa os artifacts dos workflows simple em paralelo.
+
+Substitui o download_all_simple.sh: lista as execuções uma única vez,
+baixa com retentativas e backoff, pula run IDs já presentes em data/raw
+e grava o metrics.txt direto em data/raw/<estrategia>-<run_id>/.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+# Nome do workflow (campo `name:` do YAML) -> estratégia
+WORKFLOWS = {
+    '01-Baseline-Simple': 'baseline',
+    '02-Parallel-Simple': 'parallel',
+    '03-TIA-Simple': 'tia',
+    '04-Prioritized-Simple': 'prioritized',
+    '05-TIA-Parallel-Simple': 'tia_parallel',
+    '06-Threads-Simple': 'threads',
+}
+
+DATA_DIR = 'data/raw'
+STAGING_DIR = '.parcial'  # Downloads em andamento (dentro de DATA_DIR)
+LIMITE_LISTAGEM = 200     # Execuções listadas na única chamada ao `gh run list`
+POR_ESTRATEGIA = 10       # Últimas N execuções bem-sucedidas por estratégia
+PARALELO = 4              # Downloads simultâneos
+TENTATIVAS = 4
+BACKOFF_BASE = 2.0        # Segundos; dobra a cada tentativa
+
+class ErroDownload(Exception):
+    """Falha ao baixar os artifacts de uma execução"""
+
+class GhBackend:
+    """Backend real: usa o GitHub CLI"""
+
+    def _gh(self, *args):
+        try:
+            result = subprocess.run(['gh', *args], capture_output=True, text=True)
+        except FileNotFoundError:
+            print("❌ Erro: 'gh' CLI não encontrado. Instale o GitHub CLI.")
+            print("   https://cli.github.com/")
+            sys.exit(1)
+        if result.returncode != 0:
+            raise ErroDownload(result.stderr.strip() or f"gh {' '.join(args)} falhou")
+        return result.stdout
+
+    def listar_execucoes(self, limite):
+        """Lista execuções de todos os workflows em uma única chamada"""
+        out = self._gh('run', 'list', '--limit', str(limite),
+                       '--json', 'databaseId,conclusion,workflowName,createdAt')
+        return json.loads(out)
+
+    def baixar(self, run_id, destino):
+        """Baixa todos os artifacts da execução para `destino`"""
+        self._gh('run', 'download', str(run_id), '--dir', str(destino))
+
+class DiretorioBackend:
+    """
+    Backend local: serve execuções de um espelho em disco.
+    Estrutura: <raiz>/runs.json (mesmo formato do `gh run list --json`)
+    e <raiz>/<run_id>/... com os artifacts.
+    """
+
+    def __init__(self, raiz):
+        self.raiz = Path(raiz)
+
+    def listar_execucoes(self, limite):
+        with open(self.raiz / 'runs.json', 'r') as f:
+            return json.load(f)[:limite]
+
+    def baixar(self, run_id, destino):
+        origem = self.raiz / str(run_id)
+        if not origem.is_dir():
+            raise ErroDownload(f"run {run_id} não encontrado em {self.raiz}")
+        try:
+            shutil.copytree(origem, destino, dirs_exist_ok=True)
+        except OSError as e:   # shutil.Error (cópia parcial) também é OSError
+            raise ErroDownload(f"cópia de {origem} falhou: {e}") from e
+
+def ids_existentes(data_dir=DATA_DIR):
+    """Run IDs que já têm metrics.txt no layout final"""
+    ids = set()
+    if not os.path.isdir(data_dir):
+        return ids
+    for nome in os.listdir(data_dir):
+        m = re.match(r'^\w+-(\d+)$', nome)
+        if m and os.path.isfile(os.path.join(data_dir, nome, 'metrics.txt')):
+            ids.add(m.group(1))
+    return ids
+
+def selecionar_execucoes(runs, existentes, por_estrategia=POR_ESTRATEGIA):
+    """Filtra execuções bem-sucedidas dos workflows conhecidos, sem as já baixadas"""
+    contagem = {e: 0 for e in WORKFLOWS.values()}
+    pendentes = []
+    for run in runs:
+        estrategia = WORKFLOWS.get(run.get('workflowName'))
+        if estrategia is None or run.get('conclusion') != 'success':
+            continue
+        if contagem[estrategia] >= por_estrategia:
+            continue
+        contagem[estrategia] += 1
+        if str(run['databaseId']) not in existentes:
+            pendentes.append((estrategia, str(run['databaseId'])))
+    return pendentes
+
+def baixar_execucao(backend, estrategia, run_id, data_dir=DATA_DIR,
+                    tentativas=TENTATIVAS, backoff=BACKOFF_BASE):
+    """
+    Baixa uma execução com retentativas e move o metrics.txt para
+    data/raw/<estrategia>-<run_id>/metrics.txt. Erros de E/S ao mover
+    também viram ErroDownload, para não interromper o lote.
+    """
+    staging = Path(data_dir) / STAGING_DIR / run_id
+    final = Path(data_dir) / f'{estrategia}-{run_id}'
+
+    for tentativa in range(1, tentativas + 1):
+        # Resto de um download interrompido: recomeça do zero
+        shutil.rmtree(staging, ignore_errors=True)
+        try:
+            backend.baixar(run_id, staging)
+            encontrados = sorted(staging.rglob('metrics.txt'))
+            if not encontrados:
+                raise ErroDownload('metrics.txt não encontrado nos artifacts')
+            final.mkdir(parents=True, exist_ok=True)
+            # Duração/CPU por teste (pytest_historico.py) vão junto para o history_store
+            for historico in encontrados[0].parent.glob('testes*.jsonl'):
+                os.replace(historico, final / historico.name)
+            os.replace(encontrados[0], final / 'metrics.txt')
+            return final / 'metrics.txt'
+        except (ErroDownload, OSError) as e:
+            if tentativa == tentativas:
+                if isinstance(e, ErroDownload):
+                    raise
+                raise ErroDownload(str(e)) from e
+            espera = backoff * 2 ** (tentativa - 1) + random.uniform(0, backoff)
+            print(f"   ⚠️  run {run_id}: {e} (tentativa {tentativa}/{tentativas}, "
+                  f"nova tentativa em {espera:.1f}s)")
+            time.sleep(espera)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+def baixar_todos(backend, data_dir=DATA_DIR, limite=LIMITE_LISTAGEM,
+                 por_estrategia=POR_ESTRATEGIA, paralelo=PARALELO):
+    """Lista, deduplica e baixa em paralelo. Retorna (baixados, falhas)"""
+    os.makedirs(data_dir, exist_ok=True)
+
+    print("🔍 Listando execuções...")
+    runs = backend.listar_execucoes(limite)
+    existentes = ids_existentes(data_dir)
+    pendentes = selecionar_execucoes(runs, existentes, por_estrategia)
+    print(f"   {len(pendentes)} para baixar ({len(existentes)} já presentes em {data_dir})")
+
+    baixados, falhas = [], []
+    with ThreadPoolExecutor(max_workers=paralelo) as pool:
+        futures = {
+            pool.submit(baixar_execucao, backend, est, run_id, data_dir): (est, run_id)
+            for est, run_id in pendentes
+        }
+        for future in as_completed(futures):
+            est, run_id = futures[future]
+            try:
+                future.result()
+                baixados.append(run_id)
+                print(f"   ✅ {est}-{run_id}")
+            except ErroDownload as e:
+                falhas.append(run_id)
+                print(f"   ❌ {est}-{run_id}: {e}")
+
+    shutil.rmtree(Path(data_dir) / STAGING_DIR, ignore_errors=True)
+    return baixados, falhas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--limite', type=int, default=LIMITE_LISTAGEM,
+                        help='execuções listadas no gh run list')
+    parser.add_argument('--por-estrategia', type=int, default=POR_ESTRATEGIA)
+    parser.add_argument('--paralelo', type=int, default=PARALELO)
+    parser.add_argument('--origem', metavar='DIR',
+                        help='espelho local no lugar do GitHub (ver DiretorioBackend)')
+    args = parser.parse_args()
+
+    backend = DiretorioBackend(args.origem) if args.origem else GhBackend()
+
+    print("📥 Baixando Artifacts dos Workflows Simple...")
+    print("")
+    baixados, falhas = baixar_todos(backend, args.data_dir, args.limite,
+                                    args.por_estrategia, args.paralelo)
+
+    print("")
+    print("=" * 60)
+    print(f"✅ Download Concluído! {len(baixados)} novos, {len(falhas)} falhas")
+    print("=" * 60)
+    print("")
+    print("📍 Próximo passo:")
+    print("   python3 scripts/analyze_simple_metrics.py")
+
+    if falhas:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Seleção de testes com orçamento de energia: "a melhor verificação que
+cabe em X joules" para a CI antes do merge.
+
+Entradas:
+  - energia estimada por teste: p50 de `energia_j` no history_store.py;
+  - cobertura por teste (`mapear`): linhas ou funções de src/ cobertas,
+    pelos contextos por teste do pytest-cov (`--cov-context=test`) ou,
+    com `--coletor sysmon` (Python 3.12+), pelos bitmaps do
+    pytest_cobertura.py;
+  - ou, com `--objetivo falhas`, a probabilidade de falha de cada teste
+    no histórico do pytest_priorizacao.py.
+
+É um problema de cobertura máxima com orçamento (mochila sobre
+conjuntos). A seleção usa o guloso preguiçoso: um heap de ganho marginal
+por joule, em que o ganho só é recalculado quando o teste chega ao topo
+(o ganho marginal só diminui, então o valor antigo é um limite
+superior). O resultado é comparado ao melhor teste isolado que cabe no
+orçamento e fica o maior, o que garante ao menos (1 - 1/e)/2 do ótimo
+(Khuller, Moss & Naor). Com `falhas`, cada teste cobre apenas a si
+mesmo com peso p(falha) e o guloso vira o da mochila fracionária.
+
+Os testes deixados de fora vão para `pulados` no arquivo de seleção; o
+plugin pytest_orcamento.py os desmarca na execução e os acumula em
+data/pendentes_noturno.json até uma execução completa (noturna) rodá-los.
+"""
+
+import argparse
+import ast
+import heapq
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+RAIZ = Path(__file__).resolve().parent.parent
+SUITE = 'src/test_app.py'
+FONTE = 'src'
+COBERTURA_PATH = 'data/cobertura_testes.json'
+SELECAO_PATH = 'data/selecao_orcamento.json'
+PENDENTES_PATH = 'data/pendentes_noturno.json'
+PRIORIDADE_PATH = '.prioridade.json'
+GRANULARIDADES = ['linhas', 'funcoes']
+COLETORES = ['pytest-cov', 'sysmon']
+OBJETIVOS = ['cobertura', 'falhas']
+CUSTO_MINIMO_J = 1e-6
+
+def _funcoes(arquivo):
+    """Função envolvente (qualname) de cada linha do arquivo"""
+    arvore = ast.parse(Path(arquivo).read_text())
+    nomes = {}
+    def visitar(no, prefixo):
+        for filho in ast.iter_child_nodes(no):
+            if isinstance(filho, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                nome = f'{prefixo}{filho.name}'
+                for linha in range(filho.lineno, filho.end_lineno + 1):
+                    nomes[linha] = nome   # Aninhadas sobrescrevem depois
+                visitar(filho, f'{nome}.')
+            else:
+                visitar(filho, prefixo)
+    visitar(arvore, '')
+    return nomes
+
+def _mapear_sysmon(suite, fonte, granularidade):
+    """{nodeid: [elementos cobertos]} a partir dos bitmaps do pytest_cobertura.py"""
+    from pytest_cobertura import carregar
+
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivo_dados = os.path.join(tmp, 'cobertura.npz')
+        subprocess.run([sys.executable, '-m', 'pytest', suite, '-q', '-p', 'scripts.pytest_cobertura',
+                        f'--cobertura={arquivo_dados}', f'--cobertura-fonte={fonte}'],
+                       cwd=RAIZ, stdout=subprocess.DEVNULL)
+        nodeids, indice, bits = carregar(arquivo_dados)
+    relativos = [os.path.relpath(a, RAIZ) for a in indice['arquivo']]
+    if granularidade == 'funcoes':
+        funcoes = {a: _funcoes(a) for a in indice['arquivo'].unique()}
+        elementos = [f'{r}::{funcoes[a].get(l, "<modulo>")}'
+                     for r, a, l in zip(relativos, indice['arquivo'], indice['linha'])]
+    else:
+        elementos = [f'{r}:{l}' for r, l in zip(relativos, indice['linha'])]
+    return {nodeid: sorted({elementos[k] for k in np.flatnonzero(linha)})
+            for nodeid, linha in sorted(zip(nodeids, bits)) if linha.any()}
+
+def mapear(suite=SUITE, fonte=FONTE, granularidade='linhas', coletor='pytest-cov'):
+    """{nodeid: [elementos cobertos]} a partir dos contextos do pytest-cov"""
+    if coletor == 'sysmon':
+        return _mapear_sysmon(suite, fonte, granularidade)
+    from coverage import CoverageData
+
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivo_dados = os.path.join(tmp, '.coverage')
+        subprocess.run([sys.executable, '-m', 'pytest', suite, '-q', f'--cov={fonte}',
+                        '--cov-context=test', '--cov-report='],
+                       cwd=RAIZ, env={**os.environ, 'COVERAGE_FILE': arquivo_dados},
+                       stdout=subprocess.DEVNULL)
+        dados = CoverageData(basename=arquivo_dados)
+        dados.read()
+        mapa = {}
+        for arquivo in dados.measured_files():
+            relativo = os.path.relpath(arquivo, RAIZ)
+            if os.path.basename(relativo).startswith('test_'):
+                continue
+            funcoes = _funcoes(arquivo) if granularidade == 'funcoes' else None
+            for linha, contextos in dados.contexts_by_lineno(arquivo).items():
+                elemento = (f'{relativo}::{funcoes.get(linha, "<modulo>")}' if funcoes
+                            else f'{relativo}:{linha}')
+                for contexto in contextos:
+                    if contexto:   # Contexto vazio: código rodado fora dos testes
+                        mapa.setdefault(contexto.rsplit('|', 1)[0], set()).add(elemento)
+    return {nodeid: sorted(elementos) for nodeid, elementos in sorted(mapa.items())}
+
+def energia_por_teste(nodeids, host=None):
+    """p50 de energia_j do histórico; testes sem registro recebem a mediana"""
+    from history_store import HistoricoTestes
+    tabela = HistoricoTestes.carregar().tabela('energia_j')
+    if host is not None:
+        tabela = tabela[tabela['host'] == host]
+    p50 = tabela.groupby('nodeid')['p50'].median()
+    if p50.empty:
+        return None
+    return p50.reindex(nodeids).fillna(p50.median()).to_numpy(dtype=float)
+
+def conjuntos_cobertura(nodeids, cobertura):
+    """CSR (inicio, elementos) dos elementos de cada teste e o nº de elementos"""
+    ids = {}
+    indices, inicio = [], [0]
+    for nodeid in nodeids:
+        indices.extend(ids.setdefault(e, len(ids)) for e in cobertura.get(nodeid, ()))
+        inicio.append(len(indices))
+    return np.array(inicio), np.array(indices, dtype=np.int64), len(ids)
+
+def guloso_orcamento(custos, inicio, elementos, pesos, orcamento):
+    """
+    Índices selecionados pela cobertura máxima com orçamento: guloso
+    preguiçoso por ganho/custo versus o melhor teste isolado.
+    """
+    custos = np.maximum(np.asarray(custos, dtype=float), CUSTO_MINIMO_J)
+    coberto = np.zeros(len(pesos), dtype=bool)
+
+    def ganho(i):
+        e = elementos[inicio[i]:inicio[i + 1]]
+        return pesos[e[~coberto[e]]].sum()
+
+    ganhos = np.add.reduceat(np.append(pesos[elementos], 0.0), inicio[:-1]) \
+        if len(elementos) else np.zeros(len(custos))
+    ganhos[np.diff(inicio) == 0] = 0.0
+    heap = [(-g / c, i) for i, (g, c) in enumerate(zip(ganhos, custos))
+            if g > 0 and c <= orcamento]
+    heapq.heapify(heap)
+
+    selecionados, restante, total = [], orcamento, 0.0
+    alcancavel = pesos[np.unique(elementos)].sum() if len(elementos) else 0.0
+    while heap and total < alcancavel:
+        _, i = heapq.heappop(heap)
+        if custos[i] > restante:
+            continue   # O orçamento só diminui: não volta a caber
+        g = ganho(i)
+        if g <= 0:
+            continue
+        if heap and g / custos[i] < -heap[0][0]:
+            heapq.heappush(heap, (-g / custos[i], i))   # Limite desatualizado
+            continue
+        selecionados.append(i)
+        e = elementos[inicio[i]:inicio[i + 1]]
+        coberto[e] = True
+        restante -= custos[i]
+        total += g
+
+    cabem = np.flatnonzero(custos <= orcamento)
+    if len(cabem):
+        melhor = cabem[np.argmax(ganhos[cabem])]
+        if ganhos[melhor] > total:
+            return [int(melhor)]
+    return selecionados
+
+def selecionar(nodeids, custos, orcamento, objetivo='cobertura', cobertura=None,
+               prioridade=None):
+    """Dicionário da seleção: selecionados, pulados, energia e objetivo atingido"""
+    nodeids = list(nodeids)
+    if objetivo == 'falhas':
+        from pytest_priorizacao import prioridades
+        p = np.array([p for p, _, _ in prioridades(prioridade or {}, nodeids)])
+        inicio, elementos, pesos = np.arange(len(nodeids) + 1), np.arange(len(nodeids)), p
+    else:
+        inicio, elementos, n_elementos = conjuntos_cobertura(nodeids, cobertura or {})
+        pesos = np.ones(n_elementos)
+
+    escolhidos = sorted(guloso_orcamento(custos, inicio, elementos, pesos, orcamento))
+    marcados = np.zeros(len(pesos), dtype=bool)
+    for i in escolhidos:
+        marcados[elementos[inicio[i]:inicio[i + 1]]] = True
+    fora = sorted(set(range(len(nodeids))) - set(escolhidos))
+    return {
+        'objetivo': objetivo,
+        'orcamento_j': orcamento,
+        'energia_prevista_j': float(np.asarray(custos)[escolhidos].sum()),
+        'energia_total_j': float(np.sum(custos)),
+        'fracao_objetivo': float(pesos[marcados].sum() / pesos.sum()) if pesos.sum() else 1.0,
+        'selecionados': [nodeids[i] for i in escolhidos],
+        'pulados': [nodeids[i] for i in fora],
+    }
+
+def carregar_json(caminho, padrao=None):
+    if not os.path.exists(caminho):
+        return padrao
+    with open(caminho, 'r') as f:
+        return json.load(f)
+
+def salvar_json(dados, caminho):
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    tmp = f'{caminho}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(dados, f, indent=1)
+    os.replace(tmp, caminho)
+
+def main():
+    parser = argparse.ArgumentParser(description='Seleção de testes com orçamento de energia')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    mp = sub.add_parser('mapear', help='Cobertura por teste via pytest-cov')
+    mp.add_argument('--suite', default=SUITE)
+    mp.add_argument('--fonte', default=FONTE)
+    mp.add_argument('--granularidade', choices=GRANULARIDADES, default='linhas')
+    mp.add_argument('--coletor', choices=COLETORES, default='pytest-cov',
+                    help='sysmon: sys.monitoring (Python 3.12+), bem mais barato')
+    sel = sub.add_parser('selecionar', help='Subconjunto que cabe no orçamento')
+    sel.add_argument('--orcamento-j', type=float, required=True)
+    sel.add_argument('--objetivo', choices=OBJETIVOS, default='cobertura')
+    sel.add_argument('--host', help='Energia medida neste host (padrão: todos)')
+    sel.add_argument('--saida', default=SELECAO_PATH)
+    sub.add_parser('pendentes', help='Testes pulados ainda não executados')
+    args = parser.parse_args()
+
+    if args.comando == 'mapear':
+        mapa = mapear(args.suite, args.fonte, args.granularidade, args.coletor)
+        salvar_json(mapa, COBERTURA_PATH)
+        elementos = {e for lista in mapa.values() for e in lista}
+        print(f"✅ {len(mapa)} testes, {len(elementos)} {args.granularidade} cobertas: "
+              f"{COBERTURA_PATH}")
+        return
+
+    if args.comando == 'pendentes':
+        pendentes = carregar_json(PENDENTES_PATH, {})
+        print(f"📋 {len(pendentes)} testes pulados aguardando a execução completa")
+        for nodeid, vezes in sorted(pendentes.items(), key=lambda x: -x[1])[:20]:
+            print(f"   {vezes:4d}×  {nodeid}")
+        return
+
+    cobertura = carregar_json(COBERTURA_PATH, {})
+    prioridade = carregar_json(PRIORIDADE_PATH, {})
+    universo = cobertura if args.objetivo == 'cobertura' else prioridade
+    if not universo:
+        origem = 'energy_budget.py mapear' if args.objetivo == 'cobertura' else 'pytest_priorizacao'
+        print(f"❌ Sem dados para o objetivo '{args.objetivo}': rode {origem}")
+        sys.exit(1)
+    nodeids = sorted(universo)
+    custos = energia_por_teste(nodeids, args.host)
+    if custos is None:
+        print("❌ Sem energia por teste: rode `history_store.py ingerir` com o plugin pytest_historico")
+        sys.exit(1)
+
+    inicio = time.perf_counter()
+    selecao = selecionar(nodeids, custos, args.orcamento_j, args.objetivo, cobertura, prioridade)
+    print(f"⏱️  Seleção de {len(nodeids)} testes em {time.perf_counter() - inicio:.2f}s")
+    print(f"🔋 {len(selecao['selecionados'])} testes, {selecao['energia_prevista_j']:.2f} J "
+          f"de {args.orcamento_j:.2f} J (suíte completa: {selecao['energia_total_j']:.2f} J)")
+    print(f"🎯 {args.objetivo}: {selecao['fracao_objetivo'] * 100:.1f}% do total; "
+          f"{len(selecao['pulados'])} testes pulados")
+    salvar_json(selecao, args.saida)
+    print(f"✅ Seleção salva: {args.saida}")
+
+if __name__ == "__main__":
+    main()
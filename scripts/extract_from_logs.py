@@ -71,7 +71,13 @@ def extract_metrics_from_log(log_text, run_id):
 
 def identify_strategy(log_text):
     """Identifica a estratégia pelo nome do workflow"""
-    if 'baseline' in log_text.lower():
+    if 'prioritized' in log_text.lower():
+        return 'prioritized'
+    elif 'tia-parallel' in log_text.lower() or 'tia_parallel' in log_text.lower():
+        return 'tia_parallel'
+    elif 'threads' in log_text.lower():
+        return 'threads'
+    elif 'baseline' in log_text.lower():
         return 'baseline'
     elif 'parallel' in log_text.lower():
         return 'parallel'
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Gera suítes de teste sintéticas sobre as cargas do src/app.py para medir
+baseline, paralelo (xdist) e TIA (testmon) de 10² a 10⁵ testes.
+
+Uma suíte (suites/n<N>-s<seed>/) tem:
+  - modulos/mod_XXXX.py: código "de produção"; cada módulo depende de
+    outros (grafo acíclico com anexação preferencial: poucos módulos
+    muito usados) e expõe trabalho_cpu/mem/io sobre as cargas do app.py;
+  - tests/test_mod_XXXX.py: testes de cada módulo, com duração alvo
+    sorteada de uma lognormal (cauda longa) e tipo pelo mix CPU/mem/I/O;
+  - suite.json: parâmetros, grafo, duração alvo de cada teste e commits.
+
+`mutar` simula um commit alterando VERSAO em uma fração dos módulos:
+o testmon precisa rodar os testes desses módulos e dos que dependem
+deles. Tudo é determinístico a partir da semente.
+
+`bench` gera as suítes, roda as três estratégias pelo LocalBackend
+(metrics.txt no formato de sempre, em data/escalabilidade/n<N>/) com um
+commit sintético antes de cada repetição e grava
+data/escalabilidade.csv; `plotar` desenha as curvas de escalabilidade.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+RAIZ = Path(__file__).resolve().parent.parent
+SUITES_DIR = RAIZ / 'suites'
+ESCALABILIDADE_DIR = RAIZ / 'data' / 'escalabilidade'
+ESCALABILIDADE_PATH = 'data/escalabilidade.csv'
+
+# Custo nominal das unidades de trabalho (medido em um core de ~2 GHz)
+FATORIAL = 200
+CUSTO_FATORIAL_S = 2.2e-5      # cpu_intensive_task(FATORIAL)
+CUSTO_ITEM_S = 3.2e-7          # memory_intensive_task, por item
+
+MIX_PADRAO = (0.6, 0.3, 0.1)   # CPU, memória, I/O
+DURACAO_MEDIA_S = 0.005
+ASSIMETRIA = 1.5               # Sigma da lognormal das durações
+TESTES_POR_MODULO = 50
+DEPENDENCIAS = 2               # Média de dependências diretas por módulo
+TAXA_MUDANCA = 0.05            # Fração de módulos alterada por commit
+TAMANHOS = (100, 1000, 10000)
+
+def nome_modulo(i):
+    return f'mod_{i:04d}'
+
+def grafo_dependencias(n_modulos, media, rng):
+    """Dependências diretas de cada módulo (só anteriores; peso 1 + grau de entrada)"""
+    grau = np.zeros(n_modulos)
+    deps = []
+    for i in range(n_modulos):
+        k = min(i, rng.poisson(media))
+        escolhidos = []
+        if k:
+            pesos = (1 + grau[:i]) / (1 + grau[:i]).sum()
+            escolhidos = sorted(int(j) for j in rng.choice(i, size=k, replace=False, p=pesos))
+            grau[escolhidos] += 1
+        deps.append(escolhidos)
+    return deps
+
+def sortear_testes(n_testes, mix, duracao_media, assimetria, rng):
+    """(tipo, duração alvo) de cada teste; média da lognormal = duracao_media"""
+    mu = np.log(duracao_media) - assimetria ** 2 / 2
+    duracoes = rng.lognormal(mu, assimetria, n_testes)
+    tipos = rng.choice(['cpu', 'mem', 'io'], size=n_testes, p=np.asarray(mix) / sum(mix))
+    return tipos, duracoes
+
+def argumento(tipo, duracao):
+    """Parâmetro da carga que leva ~duracao segundos"""
+    if tipo == 'cpu':
+        return max(1, int(round(duracao / CUSTO_FATORIAL_S)))
+    if tipo == 'mem':
+        return max(100, int(round(duracao / CUSTO_ITEM_S)))
+    return round(float(duracao), 6)  # repr de np.float64 não é código válido
+
+def codigo_modulo(i, deps):
+    imports = ''.join(f'from modulos import {nome_modulo(j)}\n' for j in deps)
+    base = ' + '.join(['constante()'] + [f'{nome_modulo(j)}.constante()' for j in deps])
+    return f'''"""Módulo sintético {i} (gerado por scripts/generate_suite.py)"""
+from app import cpu_intensive_task, io_simulation, memory_intensive_task
+{imports}
+VERSAO = 0
+
+def constante():
+    return VERSAO + {i}
+
+def trabalho_cpu(repeticoes):
+    base = {base}
+    for _ in range(repeticoes):
+        cpu_intensive_task({FATORIAL})
+    return base
+
+def trabalho_mem(tamanho):
+    base = {base}
+    return base + len(memory_intensive_task(tamanho))
+
+def trabalho_io(segundos):
+    base = {base}
+    io_simulation(segundos)
+    return base
+'''
+
+def codigo_testes(i, testes):
+    nome = nome_modulo(i)
+    corpo = [f'"""Testes sintéticos de {nome}"""\nfrom modulos import {nome}\n']
+    for k, (tipo, arg) in enumerate(testes):
+        corpo.append(f'\ndef test_{i:04d}_{k:03d}():\n'
+                     f'    assert {nome}.trabalho_{tipo}({arg!r}) >= 0\n')
+    return ''.join(corpo)
+
+CONFTEST = '''import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+'''
+
+def gerar(n_testes, seed=0, mix=MIX_PADRAO, duracao_media=DURACAO_MEDIA_S,
+          assimetria=ASSIMETRIA, por_modulo=TESTES_POR_MODULO, dependencias=DEPENDENCIAS,
+          saida=None):
+    """Escreve a suíte e retorna o diretório"""
+    rng = np.random.default_rng(seed)
+    saida = Path(saida or SUITES_DIR / f'n{n_testes}-s{seed}')
+    if saida.exists():
+        shutil.rmtree(saida)
+    (saida / 'modulos').mkdir(parents=True)
+    (saida / 'tests').mkdir()
+
+    n_modulos = max(1, -(-n_testes // por_modulo))
+    deps = grafo_dependencias(n_modulos, dependencias, rng)
+    tipos, duracoes = sortear_testes(n_testes, mix, duracao_media, assimetria, rng)
+    modulo_do_teste = np.sort(rng.integers(0, n_modulos, n_testes))
+
+    shutil.copy(RAIZ / 'src' / 'app.py', saida / 'app.py')
+    (saida / 'conftest.py').write_text(CONFTEST)
+    (saida / 'modulos' / '__init__.py').write_text('')
+    limites = np.searchsorted(modulo_do_teste, np.arange(n_modulos + 1))
+    for i in range(n_modulos):
+        (saida / 'modulos' / f'{nome_modulo(i)}.py').write_text(codigo_modulo(i, deps[i]))
+        faixa = range(limites[i], limites[i + 1])
+        if len(faixa):
+            testes = [(tipos[t], argumento(tipos[t], duracoes[t])) for t in faixa]
+            (saida / 'tests' / f'test_{nome_modulo(i)}.py').write_text(codigo_testes(i, testes))
+
+    manifesto = {
+        'parametros': {'testes': n_testes, 'seed': seed, 'mix': list(mix),
+                       'duracao_media_s': duracao_media, 'assimetria': assimetria,
+                       'por_modulo': por_modulo, 'dependencias': dependencias},
+        'dependencias': deps,
+        'testes': [{'modulo': int(m), 'tipo': str(t), 'duracao_alvo_s': float(d)}
+                   for m, t, d in zip(modulo_do_teste, tipos, duracoes)],
+        'commits': [],
+    }
+    (saida / 'suite.json').write_text(json.dumps(manifesto))
+    return saida
+
+def dependentes(deps, alterados):
+    """Módulos afetados (alterados + quem depende deles diretamente)"""
+    alterados = set(alterados)
+    return sorted(alterados | {i for i, d in enumerate(deps) if alterados & set(d)})
+
+def mutar(suite, taxa=TAXA_MUDANCA, commit=1):
+    """Simula um commit: incrementa VERSAO em round(taxa × módulos) módulos"""
+    suite = Path(suite)
+    manifesto = json.loads((suite / 'suite.json').read_text())
+    n_modulos = len(manifesto['dependencias'])
+    rng = np.random.default_rng([manifesto['parametros']['seed'], commit])
+    k = min(n_modulos, max(1 if taxa > 0 else 0, round(taxa * n_modulos)))
+    alterados = sorted(int(i) for i in rng.choice(n_modulos, size=k, replace=False))
+    for i in alterados:
+        caminho = suite / 'modulos' / f'{nome_modulo(i)}.py'
+        codigo = caminho.read_text()
+        caminho.write_text(re.sub(r'^VERSAO = (\d+)$',
+                                  lambda m: f'VERSAO = {int(m.group(1)) + 1}', codigo,
+                                  flags=re.MULTILINE))
+    afetados = dependentes(manifesto['dependencias'], alterados)
+    testes_afetados = sum(t['modulo'] in set(afetados) for t in manifesto['testes'])
+    manifesto['commits'].append({'commit': commit, 'alterados': alterados,
+                                 'testes_afetados': testes_afetados})
+    (suite / 'suite.json').write_text(json.dumps(manifesto))
+    return alterados, testes_afetados
+
+def comandos_suite(suite):
+    """COMANDOS do backend local apontando para a suíte (-q: saída curta)"""
+    from local_backend import COMANDOS, SUITE
+    return {e: [str(suite) if a == SUITE else ('-q' if a == '-v' else a) for a in args]
+            for e, args in COMANDOS.items()}
+
+def bench(tamanhos=TAMANHOS, repeticoes=3, taxa=TAXA_MUDANCA, seed=0, **parametros):
+    """Roda as três estratégias por tamanho; retorna o DataFrame consolidado"""
+    import pandas as pd
+    from analyze_simple_metrics import calcular_metricas_derivadas, load_all_metrics
+    from local_backend import LocalBackend
+
+    tabelas = []
+    for n in tamanhos:
+        suite = gerar(n, seed, **parametros)
+        destino = ESCALABILIDADE_DIR / f'n{n}'
+        if destino.exists():
+            shutil.rmtree(destino)
+        backend = LocalBackend(data_dir=destino, comandos=comandos_suite(suite))
+        backend.env = {**os.environ, 'TESTMON_DATAFILE': str(suite / '.testmondata')}
+        print(f"\n🧪 Suíte com {n} testes: {suite}")
+        asyncio.run(backend.executar('tia', rodada=0))  # Base do testmon (partida a frio)
+        for rep in range(1, repeticoes + 1):
+            alterados, afetados = mutar(suite, taxa, commit=rep)
+            print(f"   📝 Commit {rep}: {len(alterados)} módulos alterados, "
+                  f"{afetados} testes afetados")
+            for estrategia in ('baseline', 'parallel', 'tia'):
+                asyncio.run(backend.executar(estrategia, rodada=rep))
+        df = calcular_metricas_derivadas(load_all_metrics(destino), raw_dir=destino)
+        df['n_testes'] = n
+        tabelas.append(df)
+
+    df = pd.concat(tabelas, ignore_index=True)
+    df.to_csv(ESCALABILIDADE_PATH, index=False)
+    print(f"✅ Dados salvos: {ESCALABILIDADE_PATH}")
+    return df
+
+def create_scaling_plot(df):
+    """Mediana de tempo e energia por tamanho da suíte (log-log), sem partidas a frio"""
+    import matplotlib.pyplot as plt
+    from plot_panels import COLORS, LABELS, ORDER
+
+    quentes = df[df['cache_tia'].fillna('hit') != 'miss'] if 'cache_tia' in df.columns else df
+    medianas = quentes.groupby(['estrategia', 'n_testes'])[['tempo_s', 'energia_estimada_j']].median()
+    fig, axes = plt.subplots(1, 2, figsize=(13, 5))
+    for ax, (coluna, rotulo) in zip(axes, [('tempo_s', 'Tempo de Execução (s)'),
+                                           ('energia_estimada_j', 'Energia Estimada (J)')]):
+        for estrategia in ORDER:
+            if estrategia not in medianas.index.get_level_values(0):
+                continue
+            serie = medianas.loc[estrategia, coluna]
+            ax.plot(serie.index, serie.values, marker='o', color=COLORS[estrategia],
+                    label=LABELS[estrategia].replace('\n', ' '), linewidth=2)
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel('Número de Testes', fontweight='bold')
+        ax.set_ylabel(rotulo, fontweight='bold')
+        ax.grid(alpha=0.3, linestyle='--', which='both')
+        ax.legend()
+    fig.suptitle('Escalabilidade das Estratégias (suítes sintéticas)', fontweight='bold')
+    fig.tight_layout()
+    return fig
+
+def _mix(texto):
+    valores = tuple(float(x) for x in texto.split(','))
+    if len(valores) != 3:
+        raise argparse.ArgumentTypeError('use cpu,mem,io (ex.: 0.6,0.3,0.1)')
+    return valores
+
+def main():
+    parser = argparse.ArgumentParser(description='Suítes de teste sintéticas')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    ger = sub.add_parser('gerar', help='Gera uma suíte')
+    ger.add_argument('--testes', type=int, required=True)
+    ger.add_argument('--saida')
+    ben = sub.add_parser('bench', help='Gera suítes e mede as três estratégias')
+    ben.add_argument('--tamanhos', type=int, nargs='+', default=list(TAMANHOS))
+    ben.add_argument('--repeticoes', type=int, default=3)
+    ben.add_argument('--taxa', type=float, default=TAXA_MUDANCA,
+                     help='Fração de módulos alterada por commit')
+    for p in (ger, ben):
+        p.add_argument('--seed', type=int, default=0)
+        p.add_argument('--mix', type=_mix, default=MIX_PADRAO, help='Frações cpu,mem,io')
+        p.add_argument('--duracao-media', type=float, default=DURACAO_MEDIA_S)
+        p.add_argument('--assimetria', type=float, default=ASSIMETRIA,
+                       help='Sigma da lognormal das durações')
+        p.add_argument('--por-modulo', type=int, default=TESTES_POR_MODULO)
+        p.add_argument('--dependencias', type=float, default=DEPENDENCIAS)
+    mut = sub.add_parser('mutar', help='Simula um commit em uma suíte')
+    mut.add_argument('suite')
+    mut.add_argument('--taxa', type=float, default=TAXA_MUDANCA)
+    mut.add_argument('--commit', type=int, default=1)
+    sub.add_parser('plotar', help=f'Curvas de escalabilidade de {ESCALABILIDADE_PATH}')
+    args = parser.parse_args()
+
+    if args.comando in ('gerar', 'bench'):
+        parametros = dict(mix=args.mix, duracao_media=args.duracao_media,
+                          assimetria=args.assimetria, por_modulo=args.por_modulo,
+                          dependencias=args.dependencias)
+    if args.comando == 'gerar':
+        suite = gerar(args.testes, args.seed, saida=args.saida, **parametros)
+        print(f"✅ Suíte gerada: {suite}")
+    elif args.comando == 'mutar':
+        alterados, afetados = mutar(args.suite, args.taxa, args.commit)
+        print(f"📝 {len(alterados)} módulos alterados, {afetados} testes afetados")
+    elif args.comando == 'bench':
+        bench(args.tamanhos, args.repeticoes, args.taxa, args.seed, **parametros)
+    if args.comando in ('bench', 'plotar'):
+        import pandas as pd
+        from plot_panels import renderizar
+        from visualize_results import ESTILO
+        renderizar([('escalabilidade.png', create_scaling_plot,
+                     {'df': pd.read_csv(ESCALABILIDADE_PATH)})], ESTILO, 'data/plots')
+
+if __name__ == "__main__":
+    main()
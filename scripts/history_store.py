@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Histórico por teste: sketches de quantis (DDSketch) por node ID e host.
+
+Para cada (nodeid, host) guarda um DDSketch de duração, CPU e energia.
+O DDSketch tem erro relativo garantido (ALPHA) em qualquer quantil, é
+mesclável (somar contagens) e tem memória limitada: no máximo MAX_BALDES
+baldes contíguos por métrica, colapsando os menores valores quando o
+intervalo excede o limite (só os quantis mais baixos perdem precisão).
+
+Entradas (ingestão incremental; arquivos já vistos são pulados):
+  - JUnit XML do pytest (`--junitxml`): apenas duração;
+  - JSONL do plugin pytest_historico.py: duração e CPU por teste.
+A energia por teste vem do modelo de potência do host (power_model.py)
+a partir de duração e CPU; sem CPU não há energia.
+
+Consultas p50/p95/p99 são cumsum + searchsorted; a tabela de todos os
+testes sai de uma vez (ver HistoricoTestes).
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import pickle
+import time
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+from power_model import energia_execucoes
+
+HISTORICO_PATH = 'data/historico_testes.pkl'
+RAW_DIR = 'data/raw'
+PADROES = ['junit*.xml', 'testes*.jsonl']   # Procurados em data/raw/**/
+ALPHA = 0.01                  # Erro relativo dos quantis
+MAX_BALDES = 1024             # Baldes por sketch (memória limitada)
+METRICAS = ['duracao_s', 'cpu_s', 'energia_j']
+QUANTIS = (0.5, 0.95, 0.99)
+LARGURA = 4096               # Baldes possíveis por sketch na grade global
+DESLOCAMENTO = LARGURA // 2   # Baldes de -2048 a 2047 (~1e-18 a 1e18 com ALPHA=1%)
+GAMMA = (1 + ALPHA) / (1 - ALPHA)
+LOG_GAMMA = math.log(GAMMA)
+
+def indices_baldes(valores):
+    """Balde de cada valor positivo: ceil(log_gamma(v))"""
+    return np.ceil(np.log(valores) / LOG_GAMMA).astype(np.int64)
+
+class DDSketch:
+    """Baldes logarítmicos contíguos [inicio, inicio + len(contagens))"""
+
+    __slots__ = ('inicio', 'contagens', 'zeros', 'n')
+
+    def __init__(self):
+        self.inicio = 0
+        self.contagens = np.zeros(0, dtype=np.int64)
+        self.zeros = 0    # Valores <= 0 (ex.: CPU abaixo da resolução)
+        self.n = 0
+
+    def adicionar(self, valores):
+        valores = np.asarray(valores, dtype=float)
+        valores = valores[np.isfinite(valores)]
+        positivos = valores[valores > 0]
+        self.zeros += len(valores) - len(positivos)
+        self.n += len(valores)
+        if len(positivos):
+            self._somar(indices_baldes(positivos))
+
+    def _somar(self, indices, contagens=None):
+        """Soma contagens (1 por índice, se None) ampliando o intervalo"""
+        lo, hi = int(indices.min()), int(indices.max())
+        if len(self.contagens):
+            lo, hi = min(lo, self.inicio), max(hi, self.inicio + len(self.contagens) - 1)
+        novo = np.zeros(hi - lo + 1, dtype=np.int64)
+        if len(self.contagens):
+            novo[self.inicio - lo:self.inicio - lo + len(self.contagens)] = self.contagens
+        novo += np.bincount(indices - lo, weights=contagens,
+                            minlength=len(novo)).astype(np.int64)
+        self.inicio, self.contagens = lo, novo
+        if len(novo) > MAX_BALDES:
+            # Colapsa os menores baldes no primeiro mantido
+            excesso = len(novo) - MAX_BALDES
+            novo[excesso] += novo[:excesso].sum()
+            self.inicio, self.contagens = lo + excesso, novo[excesso:]
+
+    def mesclar(self, outro):
+        self.zeros += outro.zeros
+        self.n += outro.n
+        if len(outro.contagens):
+            indices = outro.inicio + np.arange(len(outro.contagens))
+            self._somar(indices, outro.contagens)
+        return self
+
+    def quantis(self, qs=QUANTIS):
+        """Valores nos quantis `qs` (erro relativo <= ALPHA); NaN se vazio"""
+        qs = np.asarray(qs, dtype=float)
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        rank = qs * (self.n - 1) - self.zeros
+        k = np.searchsorted(np.cumsum(self.contagens), rank, side='right')
+        k = np.minimum(k, len(self.contagens) - 1)
+        valores = 2 * GAMMA ** (self.inicio + k) / (GAMMA + 1)
+        return np.where(rank < 0, 0.0, valores)
+
+def _nodeid_junit(caso):
+    """Node ID a partir de classname/name do JUnit do pytest"""
+    if caso.get('file'):
+        base = caso.get('file')
+        partes = caso.get('classname', '').split('.')
+        classe = partes[-1] if partes and partes[-1][:1].isupper() else None
+    else:
+        partes = caso.get('classname', '').split('.')
+        classe = partes.pop() if len(partes) > 1 and partes[-1][:1].isupper() else None
+        base = '/'.join(partes) + '.py'
+    return '::'.join([base] + ([classe] if classe else []) + [caso.get('name')])
+
+def ler_junit(caminho, host):
+    """Registros (nodeid, host, duracao_s, cpu_s) de um JUnit XML"""
+    registros = []
+    for caso in ET.parse(caminho).iter('testcase'):
+        if caso.find('skipped') is not None:
+            continue
+        registros.append((_nodeid_junit(caso), host, float(caso.get('time', 'nan')), np.nan))
+    return registros
+
+def ler_jsonl(caminho, host):
+    """
+    Registros do plugin pytest_historico. O host do metrics.txt ao lado
+    prevalece (rótulo das execuções); o de cada linha vale sem ele.
+    """
+    conhecido = host not in (None, 'desconhecido')
+    registros = []
+    with open(caminho, 'r') as f:
+        for linha in f:
+            if linha.strip():
+                r = json.loads(linha)
+                registros.append((r['nodeid'], host if conhecido else r.get('host', host),
+                                  r['duracao_s'], r.get('cpu_s', np.nan)))
+    return registros
+
+def _host_da_execucao(caminho):
+    """Host do metrics.txt ao lado, se houver"""
+    metrics = os.path.join(os.path.dirname(caminho), 'metrics.txt')
+    if os.path.exists(metrics):
+        with open(metrics, 'r') as f:
+            for linha in f:
+                if linha.startswith('Host:'):
+                    return linha.split(':', 1)[1].strip()
+    return 'desconhecido'
+
+class HistoricoTestes:
+    """
+    Todos os sketches em um único array esparso ordenado: a posição
+    global de um balde é sketch × LARGURA + (balde + DESLOCAMENTO), com
+    sketch = par (nodeid, host) × len(METRICAS) + métrica. Um lote de
+    resultados vira um np.unique das posições novas e um merge por
+    searchsorted/np.insert, sem laço por teste.
+    """
+
+    def __init__(self):
+        self.pares = {}                                 # (nodeid, host) -> índice
+        self.n = np.zeros(0, dtype=np.int64)            # Por sketch
+        self.zeros = np.zeros(0, dtype=np.int64)
+        self.posicoes = np.zeros(0, dtype=np.int64)     # Ordenadas
+        self.contagens = np.zeros(0, dtype=np.int64)
+        self.vistos = {}
+        self._por_teste = None                          # nodeid -> [pares], sob demanda
+
+    @classmethod
+    def carregar(cls, caminho=HISTORICO_PATH):
+        historico = cls()
+        if not os.path.exists(caminho):
+            return historico
+        with open(caminho, 'rb') as f:
+            estado = pickle.load(f)
+        historico.pares = {par: i for i, par in enumerate(estado['pares'])}
+        for campo in ('n', 'zeros', 'posicoes', 'contagens', 'vistos'):
+            setattr(historico, campo, estado[campo])
+        return historico
+
+    def salvar(self, caminho=HISTORICO_PATH):
+        estado = {'alpha': ALPHA, 'pares': list(self.pares), 'n': self.n, 'zeros': self.zeros,
+                  'posicoes': self.posicoes, 'contagens': self.contagens, 'vistos': self.vistos}
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        tmp = f'{caminho}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(estado, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, caminho)
+
+    def _indices_pares(self, nodeids, hosts):
+        """Índice de cada (nodeid, host) do lote, criando os novos"""
+        codigos, unicos = pd.factorize(pd.MultiIndex.from_arrays([nodeids, hosts]))
+        indices = np.empty(len(unicos), dtype=np.int64)
+        self._por_teste = None
+        for i, par in enumerate(unicos):
+            indices[i] = self.pares.setdefault(par, len(self.pares))
+        total = len(self.pares) * len(METRICAS)
+        if total > len(self.n):
+            self.n = np.concatenate([self.n, np.zeros(total - len(self.n), dtype=np.int64)])
+            self.zeros = np.concatenate([self.zeros, np.zeros(total - len(self.zeros), dtype=np.int64)])
+        return indices[codigos]
+
+    def _segmento(self, sketch):
+        inicio = np.searchsorted(self.posicoes, sketch * LARGURA)
+        return inicio, np.searchsorted(self.posicoes, (sketch + 1) * LARGURA)
+
+    def _limitar(self, sketches):
+        """Colapsa os menores baldes dos sketches com mais de MAX_BALDES de extensão"""
+        inicio, fim = self._segmento(sketches)
+        cheios = fim > inicio
+        extensao = np.zeros(len(sketches), dtype=np.int64)
+        extensao[cheios] = self.posicoes[fim[cheios] - 1] - self.posicoes[inicio[cheios]] + 1
+        for a, b in zip(inicio[extensao > MAX_BALDES], fim[extensao > MAX_BALDES]):
+            corte = self.posicoes[b - 1] - MAX_BALDES + 1   # Menor posição mantida
+            k = a + np.searchsorted(self.posicoes[a:b], corte)
+            dobrados = self.contagens[a:k].sum()
+            if k < b and self.posicoes[k] == corte:
+                self.contagens[k] += dobrados
+                remover = np.arange(a, k)
+            else:
+                self.posicoes[k - 1], self.contagens[k - 1] = corte, dobrados
+                remover = np.arange(a, k - 1)
+            self.posicoes = np.delete(self.posicoes, remover)
+            self.contagens = np.delete(self.contagens, remover)
+
+    def atualizar(self, registros, modelos=None):
+        """Acrescenta [(nodeid, host, duracao_s, cpu_s), ...] de uma vez"""
+        if not registros:
+            return 0
+        df = pd.DataFrame(registros, columns=['nodeid', 'host', 'duracao_s', 'cpu_s'])
+        df['host'] = df['host'].fillna('desconhecido')
+        df['cpu_s'] = df['cpu_s'].astype(float)
+        energia, _ = energia_execucoes(
+            df.rename(columns={'duracao_s': 'tempo_s', 'cpu_s': 'cpu_total_s'}), modelos)
+        df['energia_j'] = energia
+
+        pares = self._indices_pares(df['nodeid'].to_numpy(), df['host'].to_numpy())
+        valores = df[METRICAS].to_numpy(dtype=float)                 # (n, métricas)
+        sketches = pares[:, None] * len(METRICAS) + np.arange(len(METRICAS))
+        validos = np.isfinite(valores)
+        valores, sketches = valores[validos], sketches[validos]
+        positivos = valores > 0
+        self.n += np.bincount(sketches, minlength=len(self.n))
+        self.zeros += np.bincount(sketches[~positivos], minlength=len(self.zeros))
+
+        baldes = np.clip(indices_baldes(valores[positivos]), -DESLOCAMENTO, DESLOCAMENTO - 1)
+        novas, contagens = np.unique(sketches[positivos] * LARGURA + baldes + DESLOCAMENTO,
+                                     return_counts=True)
+        onde = np.searchsorted(self.posicoes, novas)
+        existe = onde < len(self.posicoes)
+        existe[existe] = self.posicoes[onde[existe]] == novas[existe]
+        self.contagens[onde[existe]] += contagens[existe]
+        self.posicoes = np.insert(self.posicoes, onde[~existe], novas[~existe])
+        self.contagens = np.insert(self.contagens, onde[~existe], contagens[~existe])
+        self._limitar(np.unique(sketches))
+        return len(df)
+
+    def ingerir(self, raw_dir=RAW_DIR, padroes=PADROES, modelos=None):
+        """Lê só os arquivos novos ou alterados em raw_dir; retorna nº de registros"""
+        registros = []
+        for padrao in padroes:
+            for caminho in sorted(glob.glob(os.path.join(raw_dir, '**', padrao), recursive=True)):
+                st = os.stat(caminho)
+                assinatura = [st.st_mtime_ns, st.st_size]
+                if self.vistos.get(caminho) == assinatura:
+                    continue
+                host = _host_da_execucao(caminho)
+                ler = ler_junit if caminho.endswith('.xml') else ler_jsonl
+                registros += ler(caminho, host)
+                self.vistos[caminho] = assinatura
+        return self.atualizar(registros, modelos)
+
+    def sketch(self, nodeid, metrica='duracao_s', host=None):
+        """DDSketch do teste em um host, ou a mescla de todos os hosts"""
+        m = METRICAS.index(metrica)
+        if host is not None:
+            pares = [self.pares[(nodeid, host)]] if (nodeid, host) in self.pares else []
+        else:
+            if self._por_teste is None:
+                self._por_teste = {}
+                for (n, _), i in self.pares.items():
+                    self._por_teste.setdefault(n, []).append(i)
+            pares = self._por_teste.get(nodeid, [])
+        total = DDSketch()
+        for par in pares:
+            sketch = par * len(METRICAS) + m
+            a, b = self._segmento(sketch)
+            parte = DDSketch()
+            parte.n, parte.zeros = int(self.n[sketch]), int(self.zeros[sketch])
+            if b > a:
+                parte._somar(self.posicoes[a:b] - sketch * LARGURA - DESLOCAMENTO,
+                             self.contagens[a:b])
+            total.mesclar(parte)
+        return total
+
+    def quantis(self, nodeid, metrica='duracao_s', host=None, qs=QUANTIS):
+        return self.sketch(nodeid, metrica, host).quantis(qs)
+
+    def tabela(self, metrica='duracao_s', qs=QUANTIS):
+        """
+        DataFrame (nodeid, host, n, p50, p95, p99) de todos os testes,
+        vetorizado: um cumsum global e um searchsorted por quantil.
+        """
+        colunas = ['nodeid', 'host', 'n'] + [f'p{q * 100:g}' for q in qs]
+        if not self.pares:
+            return pd.DataFrame(columns=colunas)
+        sketches = np.arange(len(self.pares)) * len(METRICAS) + METRICAS.index(metrica)
+        n, zeros = self.n[sketches], self.zeros[sketches]
+        inicio, fim = self._segmento(sketches)
+        acumulado = np.cumsum(self.contagens)
+        antes = np.where(inicio > 0, acumulado[np.maximum(inicio - 1, 0)], 0)
+
+        dados = {'nodeid': [p[0] for p in self.pares], 'host': [p[1] for p in self.pares], 'n': n}
+        for q, coluna in zip(qs, colunas[3:]):
+            rank = q * (n - 1) - zeros
+            k = np.minimum(np.searchsorted(acumulado, antes + rank, side='right'),
+                           np.maximum(fim - 1, 0))
+            baldes = self.posicoes[k] - sketches * LARGURA - DESLOCAMENTO if len(self.posicoes) \
+                else np.zeros(len(n))
+            dados[coluna] = np.where(rank < 0, 0.0, 2 * GAMMA ** baldes / (GAMMA + 1))
+        tabela = pd.DataFrame(dados)
+        return tabela[tabela['n'] > 0].reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Histórico de duração/CPU/energia por teste')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    ing = sub.add_parser('ingerir', help=f'Lê JUnit XML / JSONL novos em {RAW_DIR}')
+    ing.add_argument('--raw-dir', default=RAW_DIR)
+    con = sub.add_parser('consultar', help='Quantis de um teste')
+    con.add_argument('nodeid')
+    con.add_argument('--host')
+    lentos = sub.add_parser('lentos', help='Testes com maior p95')
+    lentos.add_argument('--top', type=int, default=20)
+    for p in (con, lentos):
+        p.add_argument('--metrica', choices=METRICAS, default='duracao_s')
+    args = parser.parse_args()
+
+    historico = HistoricoTestes.carregar()
+    if args.comando == 'ingerir':
+        inicio = time.perf_counter()
+        n = historico.ingerir(args.raw_dir)
+        historico.salvar()
+        print(f"✅ {n} resultados novos em {time.perf_counter() - inicio:.2f}s; "
+              f"{len(historico.pares)} pares (teste, host) em {HISTORICO_PATH}")
+    elif args.comando == 'consultar':
+        sketch = historico.sketch(args.nodeid, args.metrica, args.host)
+        if not sketch.n:
+            print(f"⚠️  Sem histórico para {args.nodeid}")
+            return
+        valores = sketch.quantis(QUANTIS)
+        print(f"📈 {args.nodeid} ({args.metrica}, n={sketch.n}, {args.host or 'todos os hosts'})")
+        for q, v in zip(QUANTIS, valores):
+            print(f"   p{q * 100:g}: {v:.4g}")
+    else:
+        tabela = historico.tabela(args.metrica)
+        if tabela.empty:
+            print("⚠️  Histórico vazio: rode `history_store.py ingerir`")
+            return
+        print(tabela.sort_values('p95', ascending=False).head(args.top).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Detecta quando a máquina voltou ao estado ocioso de referência.
+
+Lê localmente utilização de CPU (/proc/stat), load average, temperatura
+(/sys/class/thermal) e potência RAPL (/sys/class/powercap). Cada sensor
+indisponível é simplesmente ignorado.
+"""
+
+import asyncio
+import glob
+import os
+import time
+
+RAPL_GLOB = '/sys/class/powercap/intel-rapl:[0-9]*'
+THERMAL_GLOB = '/sys/class/thermal/thermal_zone*'
+CPUFREQ_GLOB = '/sys/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq'
+
+# Critérios de ociosidade (relativos à calibração inicial)
+TOL_CPU = 0.05        # Utilização até base + 5 pontos percentuais
+TOL_CARGA = 1.0       # Load average até base + 1 processo executável
+TOL_TEMP = 2.0        # °C acima da base
+TOL_POTENCIA = 0.10   # 10% acima da potência ociosa
+AMOSTRA_S = 2.0       # Duração de cada amostra
+AMOSTRAS_ESTAVEIS = 3 # Amostras consecutivas dentro dos limites
+
+def ler_cpu_tempos():
+    """(ocioso, total) em jiffies a partir de /proc/stat"""
+    try:
+        with open('/proc/stat', 'r') as f:
+            campos = [int(x) for x in f.readline().split()[1:]]
+    except OSError:
+        return None
+    ocioso = campos[3] + (campos[4] if len(campos) > 4 else 0)  # idle + iowait
+    return ocioso, sum(campos)
+
+def ler_carga():
+    """Load average de 1 minuto"""
+    try:
+        return os.getloadavg()[0]
+    except OSError:
+        return None
+
+def ler_temperatura():
+    """Maior temperatura entre as thermal zones (°C)"""
+    temps = []
+    for zona in glob.glob(THERMAL_GLOB):
+        try:
+            with open(os.path.join(zona, 'temp'), 'r') as f:
+                temps.append(int(f.read()) / 1000)
+        except (OSError, ValueError):
+            continue
+    return max(temps) if temps else None
+
+def ler_frequencia_ghz(nucleos=None):
+    """
+    Frequência média atual dos cores (GHz), ou só dos `nucleos`:
+    cpufreq, senão /proc/cpuinfo
+    """
+    freqs = []
+    for arquivo in glob.glob(CPUFREQ_GLOB):
+        cpu = int(arquivo.split(os.sep)[-3][len('cpu'):])
+        if nucleos is not None and cpu not in nucleos:
+            continue
+        try:
+            with open(arquivo, 'r') as f:
+                freqs.append(int(f.read()) / 1e6)  # kHz
+        except (OSError, ValueError):
+            continue
+    if not freqs:
+        try:
+            with open('/proc/cpuinfo', 'r') as f:
+                cpu = None
+                for linha in f:
+                    if linha.startswith('processor'):
+                        cpu = int(linha.split(':')[1])
+                    elif linha.startswith('cpu MHz') and (nucleos is None or cpu in nucleos):
+                        freqs.append(float(linha.split(':')[1]) / 1000)
+        except (OSError, ValueError, IndexError):
+            return None
+    return sum(freqs) / len(freqs) if freqs else None
+
+def _dominios_rapl():
+    """Domínios de pacote (intel-rapl:N, sem subdomínios) legíveis"""
+    dominios = []
+    for d in sorted(glob.glob(RAPL_GLOB)):
+        if ':' in os.path.basename(d).split('intel-rapl:', 1)[1]:
+            continue
+        if os.access(os.path.join(d, 'energy_uj'), os.R_OK):
+            dominios.append(d)
+    return dominios
+
+def ler_energia_rapl():
+    """
+    Energia acumulada por domínio: lista de (energy_uj, max_energy_range_uj).
+    None se RAPL não estiver disponível.
+    """
+    leituras = []
+    for d in _dominios_rapl():
+        try:
+            with open(os.path.join(d, 'energy_uj'), 'r') as f:
+                energia = int(f.read())
+            with open(os.path.join(d, 'max_energy_range_uj'), 'r') as f:
+                faixa = int(f.read())
+        except (OSError, ValueError):
+            continue
+        leituras.append((energia, faixa))
+    return leituras or None
+
+def delta_energia_j(antes, depois):
+    """Energia (J) entre duas leituras RAPL, tratando o overflow do contador"""
+    if not antes or not depois:
+        return None
+    total = 0
+    for (e0, faixa), (e1, _) in zip(antes, depois):
+        total += (e1 - e0) if e1 >= e0 else (faixa - e0 + e1)
+    return total / 1e6
+
+async def amostrar(duracao=AMOSTRA_S):
+    """Uma amostra de todos os sensores ao longo de `duracao` segundos"""
+    cpu0, rapl0, t0 = ler_cpu_tempos(), ler_energia_rapl(), time.monotonic()
+    await asyncio.sleep(duracao)
+    cpu1, rapl1, t1 = ler_cpu_tempos(), ler_energia_rapl(), time.monotonic()
+
+    amostra = {'carga': ler_carga(), 'temp_c': ler_temperatura(),
+               'cpu_util': None, 'potencia_w': None}
+    if cpu0 and cpu1 and cpu1[1] > cpu0[1]:
+        amostra['cpu_util'] = 1 - (cpu1[0] - cpu0[0]) / (cpu1[1] - cpu0[1])
+    energia = delta_energia_j(rapl0, rapl1)
+    if energia is not None:
+        amostra['potencia_w'] = energia / (t1 - t0)
+    return amostra
+
+class MonitorOcioso:
+    """Compara amostras com a referência ociosa medida em `calibrar`"""
+
+    def __init__(self, amostra_s=AMOSTRA_S, estaveis=AMOSTRAS_ESTAVEIS):
+        self.amostra_s = amostra_s
+        self.estaveis = estaveis
+        self.referencia = None
+
+    async def calibrar(self, duracao=30):
+        """Mede a referência ociosa (mediana das amostras)"""
+        n = max(1, int(duracao / self.amostra_s))
+        amostras = [await amostrar(self.amostra_s) for _ in range(n)]
+        self.referencia = {}
+        for chave in ('carga', 'cpu_util', 'temp_c', 'potencia_w'):
+            valores = sorted(a[chave] for a in amostras if a[chave] is not None)
+            self.referencia[chave] = valores[len(valores) // 2] if valores else None
+        return self.referencia
+
+    def esta_ocioso(self, amostra):
+        ref = self.referencia or {}
+        # O load average é uma média móvel de 1 min: a tolerância é larga e
+        # a utilização instantânea de /proc/stat é o critério fino
+        if ref.get('carga') is not None and amostra['carga'] is not None:
+            if amostra['carga'] > ref['carga'] + TOL_CARGA:
+                return False
+        if ref.get('cpu_util') is not None and amostra['cpu_util'] is not None:
+            if amostra['cpu_util'] > ref['cpu_util'] + TOL_CPU:
+                return False
+        if ref.get('temp_c') is not None and amostra['temp_c'] is not None:
+            if amostra['temp_c'] > ref['temp_c'] + TOL_TEMP:
+                return False
+        if ref.get('potencia_w') is not None and amostra['potencia_w'] is not None:
+            if amostra['potencia_w'] > ref['potencia_w'] * (1 + TOL_POTENCIA):
+                return False
+        return True
+
+    async def aguardar_ocioso(self, timeout=300):
+        """
+        Espera até `estaveis` amostras consecutivas ociosas ou `timeout`.
+        Retorna (segundos esperados, última amostra, atingiu_ocioso).
+        """
+        inicio = time.monotonic()
+        consecutivas = 0
+        amostra = None
+        while time.monotonic() - inicio < timeout:
+            amostra = await amostrar(self.amostra_s)
+            consecutivas = consecutivas + 1 if self.esta_ocioso(amostra) else 0
+            if consecutivas >= self.estaveis:
+                return time.monotonic() - inicio, amostra, True
+        return time.monotonic() - inicio, amostra, False
+
+def formatar_amostra(amostra):
+    """Resumo de uma linha para logs"""
+    partes = []
+    if amostra.get('cpu_util') is not None:
+        partes.append(f"CPU {amostra['cpu_util'] * 100:.0f}%")
+    if amostra.get('carga') is not None:
+        partes.append(f"load {amostra['carga']:.2f}")
+    if amostra.get('temp_c') is not None:
+        partes.append(f"{amostra['temp_c']:.0f}°C")
+    if amostra.get('potencia_w') is not None:
+        partes.append(f"{amostra['potencia_w']:.1f} W")
+    return ', '.join(partes) or 'sem sensores'
+
+if __name__ == "__main__":
+    async def _demo():
+        monitor = MonitorOcioso()
+        print("🌡️  Calibrando referência ociosa (10s)...")
+        ref = await monitor.calibrar(10)
+        print(f"   Referência: {formatar_amostra(ref)}")
+    asyncio.run(_demo())
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Backend local do orquestrador: roda as estratégias como subprocessos
+na máquina atual, sem passar pelo GitHub Actions.
+
+Grava data/raw/<estrategia>-<run_id>/metrics.txt no mesmo formato dos
+workflows (cabeçalho + saída do pytest + bloco do /usr/bin/time -v), de
+modo que analyze_simple_metrics.py lê os dois sem distinção.
+
+Sem `prefixo`, uma série de CPU/potência amostrada durante o comando é
+gravada em serie.csv ao lado (ver timeseries.py). A memória de toda a
+árvore de processos (workers do xdist incluídos) é amostrada junto, e o
+pico vai para a linha `Memória da árvore (MB):` do metrics.txt; o
+Maximum resident set size do wait4 é só o do maior processo.
+
+Com `prefixo` (ex.: ['docker', 'exec', '-w', '/repo', 'worker-1']) o
+comando roda em outro host/container com o repositório no diretório de
+trabalho; a medição é feita lá dentro por `local_backend.py medir`.
+
+Instruções, ciclos, cache e page faults de cada execução (processo e
+filhos) vêm dos contadores do perf_counters.py, num bloco `Contadores:`
+depois do bloco do time -v; em VMs sem PMU, só os de software.
+
+Com `cpus` (lista do kernel, "0-3") e/ou `sem_smt=True` (`--cpus`,
+`--sem-smt`), o comando roda fixado nesses núcleos e cada worker do
+xdist num deles (ver cpu_pinning.py). Afinidade, governor e turbo vão
+no cabeçalho; a frequência mín./média/máx. da execução, depois do bloco
+do time -v. Sem `prefixo` apenas.
+
+Com `memoria=True` (`--memoria`), os comandos pytest ganham o
+pytest_memoria.py e o perfil por teste vai para memoria.npz ao lado do
+metrics.txt (só localmente; o pool de threads fica de fora, porque a
+chamada repetida na thread principal não aloca nada).
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from cpu_pinning import afinidade_thread, conjunto, estado, linha_frequencia
+from perf_counters import Medidor
+from power_model import HOST_ENV
+from timeseries import AmostradorSerie, linha_memoria
+
+RAIZ = Path(__file__).resolve().parent.parent
+DATA_DIR = RAIZ / 'data' / 'raw'
+SUITE = 'src/test_app.py'
+
+# Mesmos comandos dos workflows *_simple.yml
+COMANDOS = {
+    'baseline': ['-m', 'pytest', SUITE, '-v'],
+    'parallel': ['-m', 'pytest', '-n', 'auto', SUITE, '-v'],
+    'tia': ['-m', 'pytest', '--testmon', SUITE, '-v'],
+    'prioritized': ['-m', 'pytest', '-p', 'scripts.pytest_priorizacao',
+                    '--priorizar=.prioridade.json', '-x', SUITE, '-v'],
+    'tia_parallel': ['scripts/tia_parallel.py', SUITE, '-v'],
+    'threads': ['-m', 'pytest', '-p', 'scripts.pytest_threads', '--threads=auto', SUITE, '-v'],
+}
+
+def _formatar_rusage(ru, elapsed):
+    """Bloco equivalente ao do /usr/bin/time -v (que também usa wait4)"""
+    cpu = ru.ru_utime + ru.ru_stime
+    minutos, segundos = divmod(elapsed, 60)
+    return '\n'.join([
+        f"\tUser time (seconds): {ru.ru_utime:.2f}",
+        f"\tSystem time (seconds): {ru.ru_stime:.2f}",
+        f"\tPercent of CPU this job got: {int(round(100 * cpu / elapsed)) if elapsed else 0}%",
+        f"\tElapsed (wall clock) time (h:mm:ss or m:ss): {int(minutos)}:{segundos:05.2f}",
+        f"\tMaximum resident set size (kbytes): {ru.ru_maxrss}",
+        f"\tMajor (requiring I/O) page faults: {ru.ru_majflt}",
+        f"\tMinor (reclaiming a frame) page faults: {ru.ru_minflt}",
+        f"\tVoluntary context switches: {ru.ru_nvcsw}",
+        f"\tInvoluntary context switches: {ru.ru_nivcsw}",
+    ]) + '\n'
+
+def executar_medido(cmd, cwd=RAIZ, env=None, contadores=True, amostrador=None):
+    """
+    Executa `cmd` e retorna (returncode, saída combinada, bloco time -v
+    seguido do bloco de contadores de desempenho, ver perf_counters.py).
+    Com `amostrador`, aponta a amostragem de memória para o processo criado.
+    Bloqueante: chame via asyncio.to_thread (os contadores são da thread
+    que cria o processo).
+    """
+    medidor = Medidor(cmd) if contadores else None
+    if medidor is not None:
+        cmd = medidor.cmd
+        medidor.iniciar()
+    inicio = time.monotonic()
+    try:
+        proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, text=True)
+        if amostrador is not None:
+            amostrador.raiz = proc.pid
+        saida = proc.stdout.read()
+        _, status, ru = os.wait4(proc.pid, 0)
+    finally:
+        bloco_contadores = medidor.parar() if medidor is not None else ''
+    elapsed = time.monotonic() - inicio
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, saida, _formatar_rusage(ru, elapsed) + bloco_contadores
+
+class LocalBackend:
+    """Executa as estratégias diretamente na máquina local (ou via `prefixo`)"""
+
+    def __init__(self, data_dir=DATA_DIR, comandos=COMANDOS, python=None,
+                 host=None, prefixo=None, memoria=False, cpus=None, sem_smt=False):
+        self.data_dir = Path(data_dir)
+        self.comandos = comandos
+        self.prefixo = list(prefixo or [])
+        self.python = python or ('python3' if self.prefixo else sys.executable)
+        self.host = host or socket.gethostname()
+        self.memoria = memoria
+        self.env = None
+        if host and not self.prefixo:
+            # Workers locais no mesmo checkout: cada um com sua base do testmon
+            self.env = {**os.environ, 'TESTMON_DATAFILE': str(RAIZ / f'.testmondata-{host}')}
+        if not self.prefixo:
+            # Mesmo rótulo da linha Host: no histórico por teste (pytest_historico.py)
+            self.env = {**(self.env or os.environ), HOST_ENV: self.host}
+        self.cpus, self.sem_smt = None, sem_smt
+        if (cpus or sem_smt) and not self.prefixo:
+            self.cpus = conjunto(cpus, sem_smt)
+            env = self.env or os.environ
+            plugins = [p for p in env.get('PYTEST_PLUGINS', '').split(',') if p]
+            self.env = {**env, 'PYTEST_PLUGINS': ','.join([*plugins, 'scripts.pytest_afinidade'])}
+
+    def _rodar(self, argumentos):
+        """
+        (returncode, saída com o bloco time -v, amostrador ou None) de
+        `python <argumentos>`
+        """
+        cmd = [self.python, *argumentos]
+        if not self.prefixo:
+            amostrador = AmostradorSerie(nucleos=self.cpus)
+            amostrador.start()
+            try:
+                with afinidade_thread(self.cpus):
+                    returncode, saida, bloco_time = executar_medido(cmd, env=self.env,
+                                                                    amostrador=amostrador)
+            finally:
+                amostrador.parar()
+            frequencia = linha_frequencia(amostrador.resumo_frequencia())
+            memoria = linha_memoria(amostrador.pico_memoria())
+            return returncode, saida + bloco_time + frequencia + memoria, amostrador
+        # wait4 do lado de cá mediria só o cliente (docker/ssh): mede no destino.
+        # Os sensores locais também não representam o destino: sem série.
+        medido = [*self.prefixo, self.python, 'scripts/local_backend.py', 'medir', *cmd]
+        returncode, saida, _ = executar_medido(medido, contadores=False)
+        return returncode, saida, None
+
+    def _argumentos(self, estrategia, destino):
+        """
+        Comando da estratégia com a duração/CPU por teste para o
+        history_store.py (testes.jsonl) e o perfil de memória se pedido
+        """
+        argumentos = self.comandos[estrategia]
+        if not self.prefixo and (argumentos[:2] == ['-m', 'pytest']
+                                 or argumentos[0] == 'scripts/tia_parallel.py'):
+            argumentos = [*argumentos, '-p', 'scripts.pytest_historico',
+                          f'--historico={destino / "testes.jsonl"}']
+        if (self.memoria and not self.prefixo and argumentos[:2] == ['-m', 'pytest']
+                and not any(a.startswith('--threads') for a in argumentos)):
+            argumentos = [*argumentos, '-p', 'scripts.pytest_memoria',
+                          f'--memoria={destino / "memoria.npz"}']
+        return argumentos
+
+    def _cache_tia(self):
+        """'hit' se a base do testmon já existe antes da execução, senão 'miss'"""
+        if self.prefixo:
+            existe = subprocess.run([*self.prefixo, 'test', '-f', '.testmondata'],
+                                    capture_output=True).returncode == 0
+        else:
+            existe = Path((self.env or os.environ).get('TESTMON_DATAFILE',
+                                                        RAIZ / '.testmondata')).exists()
+        return 'hit' if existe else 'miss'
+
+    def _commit(self):
+        """Commit do checkout medido (None fora de um repositório git)"""
+        try:
+            proc = subprocess.run([*self.prefixo, 'git', 'rev-parse', 'HEAD'],
+                                  cwd=None if self.prefixo else RAIZ,
+                                  capture_output=True, text=True)
+        except OSError:
+            return None
+        return proc.stdout.strip() if proc.returncode == 0 else None
+
+    def _cabecalho(self, estrategia, run_id, rodada):
+        linhas = [
+            "=" * 40,
+            f"Estratégia: {estrategia.upper()}",
+            f"Run ID: {run_id}",
+            f"Timestamp: {datetime.now().astimezone().isoformat(timespec='seconds')}",
+            f"Host: {self.host}",
+            f"Backend: local ({socket.gethostname()})",
+        ]
+        if rodada is not None:
+            linhas.append(f"Rodada: {rodada}")
+        commit = self._commit()
+        if commit:
+            linhas.append(f"Commit: {commit}")
+        if '--testmon' in self.comandos[estrategia]:
+            linhas.append(f"Cache TIA: {self._cache_tia()}")
+        if '-n' in self.comandos[estrategia] or '--threads=auto' in self.comandos[estrategia]:
+            linhas.append(f"Workers: auto ({len(self.cpus) if self.cpus else os.cpu_count()} cores)")
+        if not self.prefixo:
+            linhas += estado(self.cpus, self.sem_smt)
+        linhas.append("=" * 40)
+        return '\n'.join(linhas) + '\n'
+
+    def _rodape(self, estrategia):
+        linhas = ["=" * 40]
+        if estrategia == 'baseline':
+            # Mesmas informações extras do baseline_simple.yml
+            coletados = subprocess.run(
+                [*self.prefixo, self.python, '-m', 'pytest', SUITE, '--collect-only', '-q'],
+                cwd=RAIZ, capture_output=True, text=True).stdout
+            linhas += ["CPU Info:", str(os.cpu_count()),
+                       "Testes executados:", str(len(coletados.splitlines()))]
+        return '\n'.join(linhas) + '\n'
+
+    async def executar(self, estrategia, rodada=None):
+        """Roda uma repetição e grava o metrics.txt no layout de análise"""
+        run_id = str(time.time_ns() // 1_000)  # µs: numérico e crescente, único entre hosts
+        print(f"🚀 [{self.host}] Executando: {estrategia} (run {run_id})...")
+
+        destino = self.data_dir / f'{estrategia}-{run_id}'
+        destino.mkdir(parents=True, exist_ok=True)
+        cabecalho = self._cabecalho(estrategia, run_id, rodada)
+        returncode, saida, amostrador = await asyncio.to_thread(
+            self._rodar, self._argumentos(estrategia, destino))
+        rodape = await asyncio.to_thread(self._rodape, estrategia)
+
+        tmp = destino / 'metrics.txt.tmp'
+        with open(tmp, 'w') as f:
+            f.write(cabecalho + saida + rodape)
+        os.replace(tmp, destino / 'metrics.txt')
+        if amostrador is not None:
+            amostrador.salvar(destino / 'serie.csv')
+
+        conclusion = 'success' if returncode == 0 else 'failure'
+        simbolo = '✅' if conclusion == 'success' else '❌'
+        print(f"{simbolo} [{self.host}] {estrategia} concluído: {conclusion} → {destino / 'metrics.txt'}")
+        return {'estrategia': estrategia, 'run_id': run_id, 'conclusion': conclusion,
+                'host': self.host, 'metrics': str(destino / 'metrics.txt')}
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == 'medir':
+        # Shim executado dentro do container/host remoto (só a memória da árvore:
+        # os sensores de CPU/potência de lá não viram série)
+        amostrador = AmostradorSerie()
+        amostrador.start()
+        try:
+            returncode, saida, bloco_time = executar_medido(sys.argv[2:], cwd=None,
+                                                            amostrador=amostrador)
+        finally:
+            amostrador.parar()
+        sys.stdout.write(saida + bloco_time + linha_memoria(amostrador.pico_memoria()))
+        sys.exit(returncode)
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    cpus = next((a.split('=', 1)[1] for a in sys.argv if a.startswith('--cpus=')), None)
+    estrategia = argumentos[0] if argumentos else 'baseline'
+    asyncio.run(LocalBackend(memoria='--memoria' in sys.argv, cpus=cpus,
+                             sem_smt='--sem-smt' in sys.argv).executar(estrategia))
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Memória por teste e por estratégia a partir dos perfis do
+pytest_memoria.py (data/raw/<estrategia>-<run_id>/memoria.npz, gravados
+pelo backend local com `--memoria`).
+
+    python scripts/memoria_testes.py resumo              # bytes por teste × estratégia
+    python scripts/memoria_testes.py regressoes --limiar 0.2 [--falhar]
+    python scripts/memoria_testes.py sitios "src/test_app.py::test_memory_sort[100000]"
+
+Uma regressão é um teste cuja última execução (por estratégia e host)
+tem pico acima da mediana das anteriores por mais que `--limiar`
+(relativo) e `--minimo-kb` (absoluto, para ignorar ruído de poucos
+bytes). Para cada regressão são mostrados os sítios de alocação que
+mais cresceram.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from pytest_memoria import carregar
+
+RAW_DIR = 'data/raw'
+MEMORIA_ARQUIVO = 'memoria.npz'
+MEMORIA_PATH = 'data/memoria_testes.csv'
+LIMIAR_REGRESSAO = 0.2
+MINIMO_KB = 64
+
+def carregar_memoria(raw_dir=RAW_DIR):
+    """(testes, sítios) de todas as execuções, com estrategia/run_id/host"""
+    from analyze_simple_metrics import parse_time_output
+
+    testes, sitios = [], []
+    for arquivo in sorted(Path(raw_dir).glob(f'*/{MEMORIA_ARQUIVO}')):
+        metricas = arquivo.parent / 'metrics.txt'
+        info = parse_time_output(metricas) if metricas.exists() else {}
+        estrategia, _, run_id = arquivo.parent.name.rpartition('-')
+        chaves = {'estrategia': info.get('estrategia', estrategia),
+                  'run_id': int(info.get('run_id', run_id)), 'host': info.get('host')}
+        t, s = carregar(arquivo)
+        testes.append(t.assign(**chaves))
+        sitios.append(s.assign(**chaves))
+    if not testes:
+        return pd.DataFrame(), pd.DataFrame()
+    return pd.concat(testes, ignore_index=True), pd.concat(sitios, ignore_index=True)
+
+def resumo(testes, coluna='pico_b'):
+    """Mediana de `coluna` por teste (linhas) e estratégia (colunas)"""
+    return testes.pivot_table(index='nodeid', columns='estrategia', values=coluna,
+                              aggfunc='median')
+
+def regressoes(testes, limiar=LIMIAR_REGRESSAO, minimo_kb=MINIMO_KB):
+    """Última execução de cada estratégia/host contra a mediana das anteriores"""
+    linhas = []
+    chaves = ['estrategia', testes['host'].fillna('?').rename('host')]
+    for (estrategia, host), grupo in testes.groupby(chaves):
+        execucoes = sorted(grupo['run_id'].unique())
+        if len(execucoes) < 2:
+            continue
+        ultima = grupo[grupo['run_id'] == execucoes[-1]].set_index('nodeid')['pico_b']
+        anteriores = grupo[grupo['run_id'] != execucoes[-1]].groupby('nodeid')['pico_b'].median()
+        comparados = pd.DataFrame({'anterior_b': anteriores, 'atual_b': ultima}).dropna()
+        delta = comparados['atual_b'] - comparados['anterior_b']
+        regrediu = (delta > limiar * comparados['anterior_b']) & (delta > minimo_kb * 1024)
+        for nodeid, linha in comparados[regrediu].iterrows():
+            linhas.append({'estrategia': estrategia, 'host': host, 'nodeid': nodeid,
+                           'run_id': execucoes[-1], 'anterior_b': linha['anterior_b'],
+                           'atual_b': linha['atual_b'],
+                           'aumento': linha['atual_b'] / linha['anterior_b'] - 1})
+    return pd.DataFrame(linhas, columns=['estrategia', 'host', 'nodeid', 'run_id',
+                                         'anterior_b', 'atual_b', 'aumento'])
+
+def sitios_crescentes(sitios, regressao, top=3):
+    """
+    Sítios do teste que mais cresceram da mediana anterior para a última
+    execução, na estratégia e no host da regressão
+    """
+    grupo = sitios[(sitios['nodeid'] == regressao['nodeid']) &
+                   (sitios['estrategia'] == regressao['estrategia']) &
+                   (sitios['host'].fillna('?') == regressao['host'])]
+    atual = grupo[grupo['run_id'] == regressao['run_id']].groupby('site')['bytes'].sum()
+    anterior = grupo[grupo['run_id'] != regressao['run_id']].groupby(['site', 'run_id'])['bytes'] \
+        .sum().groupby('site').median()
+    delta = atual.sub(anterior, fill_value=0).sort_values(ascending=False)
+    return delta[delta > 0].head(top)
+
+def _mb(valor):
+    return f"{valor / 1024 ** 2:8.2f}"
+
+def imprimir_memoria(testes):
+    """Pico por teste × estratégia (MB), do maior para o menor"""
+    print("\n" + "=" * 60)
+    print("MEMÓRIA POR TESTE (pico tracemalloc, MB, mediana)")
+    print("=" * 60)
+    tabela = resumo(testes)
+    tabela = tabela.loc[tabela.max(axis=1).sort_values(ascending=False).index]
+    print(f"{'teste':<50} " + ' '.join(f"{e[:10]:>10}" for e in tabela.columns))
+    for nodeid, linha in tabela.iterrows():
+        print(f"{nodeid[-50:]:<50} " + ' '.join(
+            f"{'—':>10}" if pd.isna(v) else f"{_mb(v):>10}" for v in linha))
+
+def main():
+    parser = argparse.ArgumentParser(description='Memória por teste (pytest_memoria.py)')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    sub.add_parser('resumo', help='Pico e bytes retidos por teste × estratégia')
+    reg = sub.add_parser('regressoes', help='Última execução contra as anteriores')
+    reg.add_argument('--limiar', type=float, default=LIMIAR_REGRESSAO)
+    reg.add_argument('--minimo-kb', type=float, default=MINIMO_KB)
+    reg.add_argument('--falhar', action='store_true', help='Código de saída 1 se houver regressão')
+    sit = sub.add_parser('sitios', help='Maiores sítios de alocação de um teste')
+    sit.add_argument('nodeid')
+    parser.add_argument('--raw-dir', default=RAW_DIR)
+    args = parser.parse_args()
+
+    testes, sitios = carregar_memoria(args.raw_dir)
+    if testes.empty:
+        print(f"❌ Nenhum {MEMORIA_ARQUIVO} em {args.raw_dir}: rode o backend local com --memoria")
+        sys.exit(1)
+    print(f"📋 {testes['run_id'].nunique()} execuções, {testes['nodeid'].nunique()} testes")
+
+    if args.comando == 'resumo':
+        imprimir_memoria(testes)
+        tabela = testes.groupby(['estrategia', 'nodeid'])[['pico_b', 'retido_b', 'blocos']] \
+            .median().reset_index()
+        os.makedirs(os.path.dirname(MEMORIA_PATH), exist_ok=True)
+        tabela.to_csv(MEMORIA_PATH, index=False)
+        print(f"\n✅ Dados salvos: {MEMORIA_PATH}")
+    elif args.comando == 'regressoes':
+        encontradas = regressoes(testes, args.limiar, args.minimo_kb)
+        if encontradas.empty:
+            print(f"✅ Nenhuma regressão de memória acima de {args.limiar:.0%}")
+            return
+        print(f"🚨 {len(encontradas)} regressões de memória:")
+        for _, r in encontradas.sort_values('aumento', ascending=False).iterrows():
+            print(f"   {r['estrategia']}@{r['host']}: {r['nodeid']}  "
+                  f"{_mb(r['anterior_b']).strip()} → {_mb(r['atual_b']).strip()} MB "
+                  f"({r['aumento']:+.0%})")
+            for site, delta in sitios_crescentes(sitios, r).items():
+                print(f"      {delta / 1024:+10.1f} KB  {site}")
+        if args.falhar:
+            sys.exit(1)
+    else:
+        ultima = testes['run_id'].max()
+        do_teste = sitios[(sitios['nodeid'] == args.nodeid)]
+        if do_teste.empty:
+            print(f"❌ Teste sem perfil: {args.nodeid}")
+            sys.exit(1)
+        for (estrategia, run_id), grupo in do_teste.groupby(['estrategia', 'run_id']):
+            if run_id != do_teste[do_teste['estrategia'] == estrategia]['run_id'].max():
+                continue
+            print(f"\n📌 {estrategia} (run {run_id}{', mais recente' if run_id == ultima else ''})")
+            for _, linha in grupo.sort_values('bytes', ascending=False).iterrows():
+                print(f"   {linha['bytes'] / 1024:10.1f} KB {linha['blocos']:8d} blocos  {linha['site']}")
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ import seaborn as sns
 from scipy import stats
 import numpy as np
 
+from bootstrap_ci import ESTATISTICAS, bca
+
 def parse_eco_ci_logs(data_dir="data/raw"):
     """
     Parseia os JSONs do Eco-CI baixados do GitHub Actions.
@@ -68,6 +70,13 @@ def teste_hipoteses(df):
     cohens_d = (baseline.mean() - tia.mean()) / np.sqrt((baseline.std()**2 + tia.std()**2) / 2)
     print(f"   Cohen's d: {cohens_d:.2f} ({'Grande' if abs(cohens_d) > 0.8 else 'Médio' if abs(cohens_d) > 0.5 else 'Pequeno'})")
     
+    # Intervalos BCa (bootstrap) da redução e do delta de Cliff
+    est, inf, sup = bca(baseline.to_numpy()[:, None], tia.to_numpy()[:, None])
+    i = ESTATISTICAS.index('reducao_pct')
+    print(f"   IC 95% (BCa) da redução: [{inf[i, 0]:.1f}%, {sup[i, 0]:.1f}%]")
+    i = ESTATISTICAS.index('cliff_delta')
+    print(f"   Cliff's delta: {est[i, 0]:.2f} [{inf[i, 0]:.2f}, {sup[i, 0]:.2f}]")
+    
     # H2: Paralelo tem EDP maior que Baseline
     print("\n📊 H2: Paralelo vs Baseline (EDP)")
     edp_baseline = df[df['estrategia'] == 'baseline']['edp']
@@ -76,6 +85,9 @@ def teste_hipoteses(df):
     stat, p_value = stats.mannwhitneyu(edp_baseline, edp_paralelo, alternative='less')
     aumento = ((edp_paralelo.mean() - edp_baseline.mean()) / edp_baseline.mean()) * 100
     print(f"   Aumento médio no EDP: {aumento:.1f}%")
+    est, inf, sup = bca(edp_baseline.to_numpy()[:, None], edp_paralelo.to_numpy()[:, None])
+    i = ESTATISTICAS.index('razao')
+    print(f"   Razão de EDP: {est[i, 0]:.2f} (IC 95% BCa: [{inf[i, 0]:.2f}, {sup[i, 0]:.2f}])")
     print(f"   p-value: {p_value:.4f}")
     print(f"   Conclusão: {'✅ Rejeitamos H0' if p_value < 0.05 else '❌ Não rejeitamos H0'}")
 
@@ -1,88 +1,385 @@
-import subprocess
-import time
+import argparse
+import asyncio
+import json
+import math
+import random
+import shlex
 import sys
-import os
+import time
+import uuid
+
+from cpu_pinning import conjunto, formatar_lista
+from download_simple import ErroDownload, GhBackend, baixar_execucao
+from idle_monitor import MonitorOcioso, formatar_amostra
+from local_backend import COMANDOS, LocalBackend
 
 # ========================================
-# CONFIGURAÇÃO PARA TESTE RÁPIDO (10 MIN)
+# CONFIGURAÇÃO DO EXPERIMENTO
 # ========================================
-WORKFLOWS = [
-    "baseline_simple.yml",
-    "parallel_simple.yml",
-    "tia_simple.yml"
-]
-REPETITIONS = 10  # Para n=10 (validade estatística)
-COOLDOWN = 60     # Maior cooldown para estabilidade
+WORKFLOWS = {
+    'baseline': 'baseline_simple.yml',
+    'parallel': 'parallel_simple.yml',
+    'tia': 'tia_simple.yml',
+    'prioritized': 'prioritized_simple.yml',
+    'tia_parallel': 'tia_parallel_simple.yml',
+    'threads': 'threads_simple.yml',
+}
+REPETITIONS = 10     # Para n=10 (validade estatística)
+POLL_INTERVAL = 10   # Intervalo entre consultas de status (s)
+LOCALIZAR_TIMEOUT = 300   # Prazo para o run disparado aparecer no `gh run list` (s)
+RUN_TIMEOUT = 3600        # Prazo para o run terminar (s)
+MAX_COOLDOWN = 300   # Teto da espera pela ociosidade (s)
+CALIBRACAO_S = 30    # Duração da medição da referência ociosa (s)
 
 # ========================================
-# Para o experimento real, use:
-# REPETITIONS = 10
-# COOLDOWN = 60
+# Em vez de um cooldown fixo, cada execução só começa depois que a
+# anterior terminou E a máquina voltou à referência ociosa.
+# A ordem dos tratamentos é sorteada a cada rodada (blocos aleatorizados)
+# para que deriva térmica/temporal não favoreça nenhuma estratégia.
 # ========================================
 
-def run_workflow(workflow_file):
-    """Dispara um workflow no GitHub Actions via CLI"""
-    print(f"🚀 Disparando workflow: {workflow_file}...")
-    
-    cmd = ["gh", "workflow", "run", workflow_file]
-    
+async def gh(*args):
+    """Executa o GitHub CLI de forma assíncrona e retorna o stdout"""
     try:
-        subprocess.run(cmd, check=True)
-        print(f"✅ {workflow_file} iniciado com sucesso.")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Erro ao iniciar {workflow_file}: {e}")
+        proc = await asyncio.create_subprocess_exec(
+            'gh', *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
     except FileNotFoundError:
         print("❌ Erro: 'gh' CLI não encontrado. Instale o GitHub CLI.")
         print("   https://cli.github.com/")
         sys.exit(1)
+    stdout, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(f"gh {' '.join(args)}: {stderr.decode().strip()}")
+    return stdout.decode()
+
+class ErroTempoEsgotado(RuntimeError):
+    """Run não apareceu ou não terminou no prazo (registrado como falha da rodada)"""
+
+class GitHubBackend:
+    """Dispara workflows via `gh` e espera a conclusão por polling, com prazo"""
+
+    def __init__(self, workflows=WORKFLOWS, poll_interval=POLL_INTERVAL, runner=None,
+                 localizar_timeout=LOCALIZAR_TIMEOUT, run_timeout=RUN_TIMEOUT):
+        self.workflows = workflows
+        self.poll_interval = poll_interval
+        self.localizar_timeout = localizar_timeout
+        self.run_timeout = run_timeout
+        self.runner = runner  # Label do self-hosted runner (None = 'self-hosted')
+        self.host = runner or 'self-hosted'
+
+    async def _localizar_run(self, workflow_file, correlacao):
+        """
+        Encontra o run criado pelo disparo (o `gh workflow run` não retorna o ID).
+        O run-name dos workflows inclui o ID de correlação enviado como input,
+        o que distingue disparos simultâneos do mesmo workflow em hosts diferentes.
+        """
+        prazo = time.monotonic() + self.localizar_timeout
+        while time.monotonic() < prazo:
+            out = await gh('run', 'list', '--workflow', workflow_file,
+                           '--event', 'workflow_dispatch', '--limit', '20',
+                           '--json', 'databaseId,displayTitle')
+            for run in json.loads(out):
+                if correlacao in run['displayTitle']:
+                    return run['databaseId']
+            await asyncio.sleep(self.poll_interval / 2)
+        raise ErroTempoEsgotado(f"run de {workflow_file} ({correlacao}) não apareceu em "
+                                f"{self.localizar_timeout}s")
+
+    async def executar(self, estrategia, rodada=None):
+        """Dispara o workflow e retorna quando o run estiver concluído"""
+        workflow_file = self.workflows[estrategia]
+        correlacao = uuid.uuid4().hex
+        print(f"🚀 [{self.host}] Disparando workflow: {workflow_file}...")
+        args = ['workflow', 'run', workflow_file, '-f', f'correlacao={correlacao}']
+        if self.runner:
+            args += ['-f', f'runner={self.runner}']
+        await gh(*args)
+
+        run_id = await self._localizar_run(workflow_file, correlacao)
+        print(f"   Run {run_id} criado, aguardando conclusão...")
+
+        prazo = time.monotonic() + self.run_timeout
+        while True:
+            out = await gh('run', 'view', str(run_id), '--json', 'status,conclusion')
+            status = json.loads(out)
+            if status['status'] == 'completed':
+                break
+            if time.monotonic() >= prazo:
+                # Cancela para não medir a próxima rodada com este run ainda ocupando o runner
+                try:
+                    await gh('run', 'cancel', str(run_id))
+                except RuntimeError as e:
+                    print(f"⚠️  [{self.host}] Não foi possível cancelar o run {run_id}: {e}")
+                raise ErroTempoEsgotado(f"run {run_id} não terminou em {self.run_timeout}s")
+            await asyncio.sleep(self.poll_interval)
+
+        simbolo = '✅' if status['conclusion'] == 'success' else '❌'
+        print(f"{simbolo} [{self.host}] {workflow_file} concluído: {status['conclusion']}")
+        resultado = {'estrategia': estrategia, 'run_id': str(run_id),
+                     'conclusion': status['conclusion'], 'host': self.host}
+
+        # Traz o metrics.txt já para data/raw (usado pelo modo adaptativo)
+        if status['conclusion'] == 'success':
+            try:
+                caminho = await asyncio.to_thread(
+                    baixar_execucao, GhBackend(), estrategia, str(run_id))
+                resultado['metrics'] = str(caminho)
+            except ErroDownload as e:
+                print(f"⚠️  [{self.host}] Não foi possível baixar o run {run_id}: {e}")
+        return resultado
+
+def ordem_da_rodada(estrategias, rng):
+    """Permutação aleatória dos tratamentos (rng=None mantém a ordem fixa)"""
+    ordem = list(estrategias)
+    if rng is not None:
+        rng.shuffle(ordem)
+    return ordem
+
+def quadrado_latino(estrategias, hosts, repeticoes, rng=None):
+    """
+    Atribuição balanceada de tratamentos a hosts, rodada a rodada.
+
+    Na rodada r o host h recebe o tratamento (h + r) mod t de uma
+    permutação sorteada dos tratamentos; a cada t rodadas todo host executa
+    todo tratamento exatamente uma vez, então efeitos de host não se
+    confundem com as estratégias. O número de rodadas é arredondado para
+    um múltiplo de t que garanta `repeticoes` execuções por tratamento.
+    Retorna uma lista de rodadas, cada uma {host: estrategia}.
+    """
+    t, k = len(estrategias), len(hosts)
+    simbolos = list(estrategias)
+    linhas = list(hosts)
+    if rng is not None:
+        rng.shuffle(simbolos)
+        rng.shuffle(linhas)
+    rodadas = t * math.ceil(math.ceil(repeticoes * t / k) / t)
+    return [
+        {host: simbolos[(h + r) % t] for h, host in enumerate(linhas)}
+        for r in range(rodadas)
+    ]
+
+async def executar_distribuido(backends, estrategias, repeticoes, rng=None, parar=None):
+    """
+    Executa as repetições em vários hosts ao mesmo tempo segundo o
+    quadrado latino; cada rodada termina quando todos os hosts terminam.
+    `backends` mapeia host -> backend. `parar(resultados)` é consultado ao
+    fim de cada bloco de t rodadas (que mantém o balanceamento).
+    """
+    plano = quadrado_latino(estrategias, list(backends), repeticoes, rng)
+    resultados = []
+    start_time = time.time()
+
+    for i, atribuicao in enumerate(plano, 1):
+        print(f"\n{'='*60}")
+        print(f"🔄 RODADA {i}/{len(plano)}: " +
+              ', '.join(f'{h}→{e}' for h, e in atribuicao.items()))
+        print(f"{'='*60}")
+
+        async def _executar(host, estrategia):
+            inicio = time.time()
+            try:
+                resultado = await backends[host].executar(estrategia, rodada=i)
+            except RuntimeError as e:
+                print(f"❌ [{host}] Erro ao executar {estrategia}: {e}")
+                resultado = {'estrategia': estrategia, 'conclusion': 'error'}
+            resultado['host'] = host
+            resultado['duracao_s'] = time.time() - inicio
+            return resultado
+
+        resultados += await asyncio.gather(
+            *(_executar(h, e) for h, e in atribuicao.items()))
+
+        elapsed = int(time.time() - start_time)
+        print(f"\n📊 Progresso: {i}/{len(plano)} rodadas completas "
+              f"({elapsed//60}min {elapsed%60}s)")
+
+        if parar is not None and i % len(estrategias) == 0 and i < len(plano) and parar(resultados):
+            print("\n🛑 Todas as hipóteses decididas: encerrando antes do máximo")
+            break
+
+    return resultados
+
+async def executar_experimento(backend, estrategias, repeticoes,
+                               monitor=None, max_cooldown=MAX_COOLDOWN, rng=None, parar=None):
+    """
+    Executa as rodadas em sequência, esperando ociosidade entre execuções.
+    Se `parar(resultados)` retornar True ao fim de uma rodada, encerra antes.
+    """
+    resultados = []
+    start_time = time.time()
+
+    for i in range(1, repeticoes + 1):
+        print(f"\n{'='*60}")
+        print(f"🔄 RODADA {i}/{repeticoes}")
+        print(f"{'='*60}")
+
+        ordem = ordem_da_rodada(estrategias, rng)
+        print(f"🎲 Ordem: {' → '.join(ordem)}")
+        for estrategia in ordem:
+            inicio = time.time()
+            try:
+                resultado = await backend.executar(estrategia, rodada=i)
+            except RuntimeError as e:
+                print(f"❌ Erro ao executar {estrategia}: {e}")
+                resultado = {'estrategia': estrategia, 'conclusion': 'error'}
+            resultado['duracao_s'] = time.time() - inicio
+            resultados.append(resultado)
+
+            if monitor is not None:
+                espera, amostra, ocioso = await monitor.aguardar_ocioso(max_cooldown)
+                if ocioso:
+                    print(f"😴 Máquina ociosa após {espera:.0f}s ({formatar_amostra(amostra)})")
+                else:
+                    print(f"⚠️  Ociosidade não atingida em {max_cooldown}s "
+                          f"({formatar_amostra(amostra or {})}), seguindo")
+
+        elapsed = int(time.time() - start_time)
+        print(f"\n📊 Progresso: {i}/{repeticoes} rodadas completas")
+        print(f"⏱️  Tempo decorrido: {elapsed//60}min {elapsed%60}s")
+        ritmo = elapsed / i
+        restante = int(ritmo * (repeticoes - i))
+        print(f"⏱️  Tempo restante estimado: ~{restante//60} min")
+
+        if parar is not None and i < repeticoes and parar(resultados):
+            print("\n🛑 Todas as hipóteses decididas: encerrando antes do máximo")
+            break
+
+    return resultados
+
+def dimensionar_repeticoes(efeito, poder, historico='data/resultados_simple.csv'):
+    """Repetições por tratamento pela análise de poder do histórico"""
+    import pandas as pd
+    from power_analysis import repeticoes_necessarias
+    try:
+        n = repeticoes_necessarias(pd.read_csv(historico), efeito, poder)
+    except FileNotFoundError:
+        n = None
+    if n is None:
+        print(f"⚠️ Análise de poder inconclusiva; usando {REPETITIONS} repetições")
+        return REPETITIONS
+    print(f"🔋 Análise de poder: {n} repetições detectam {efeito:.0%} com poder {poder:.0%}")
+    return n
 
 def main():
+    parser = argparse.ArgumentParser(description='Orquestra o experimento Green Metrics CI')
+    parser.add_argument('--backend', choices=['github', 'local'], default='github',
+                        help='github: dispara workflows; local: roda os comandos nesta máquina')
+    parser.add_argument('--repeticoes', type=lambda v: v if v == 'auto' else int(v),
+                        default=REPETITIONS, metavar='N|auto',
+                        help='repetições por tratamento (máximo, no modo adaptativo); '
+                             'auto: análise de poder sobre o histórico')
+    parser.add_argument('--efeito', type=float, default=0.20,
+                        help='com --repeticoes auto: diferença relativa a detectar')
+    parser.add_argument('--poder', type=float, default=0.80,
+                        help='com --repeticoes auto: poder desejado')
+    parser.add_argument('--adaptativo', action='store_true',
+                        help='parar assim que todas as hipóteses forem decididas '
+                             '(teste sequencial em grupo)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='semente do sorteio da ordem dos tratamentos')
+    parser.add_argument('--ordem-fixa', action='store_true',
+                        help='não aleatorizar a ordem dos tratamentos')
+    parser.add_argument('--host', action='append', default=[], metavar='LABEL[=CMD]',
+                        help='host/runner para sharding (repetível). No backend github, LABEL '
+                             'é o label do runner; no local, CMD opcional é o prefixo '
+                             '(ex.: "w1=docker exec -w /repo w1")')
+    parser.add_argument('--max-cooldown', type=int, default=MAX_COOLDOWN,
+                        help='teto da espera pela ociosidade (s)')
+    parser.add_argument('--sem-ocioso', action='store_true',
+                        help='não esperar a máquina voltar à referência ociosa')
+    parser.add_argument('--memoria', action='store_true',
+                        help='backend local: perfil de memória por teste (pytest_memoria.py)')
+    parser.add_argument('--cpus', metavar='LISTA',
+                        help='backend local: fixa as execuções nestes núcleos (ex.: 0-3)')
+    parser.add_argument('--sem-smt', action='store_true',
+                        help='backend local: um núcleo lógico por núcleo físico')
+    parser.add_argument('--run-timeout', type=int, default=RUN_TIMEOUT,
+                        help='backend github: prazo para cada run terminar (s)')
+    parser.add_argument('-y', '--yes', action='store_true', help='não pedir confirmação')
+    args = parser.parse_args()
+    if args.cpus or args.sem_smt:
+        try:
+            conjunto(args.cpus, args.sem_smt)
+        except ValueError as e:
+            parser.error(f'--cpus: {e}')
+
+    backends = {}
+    for spec in args.host:
+        label, _, prefixo = spec.partition('=')
+        if args.backend == 'local':
+            backends[label] = LocalBackend(host=label, prefixo=shlex.split(prefixo),
+                                           memoria=args.memoria, cpus=args.cpus,
+                                           sem_smt=args.sem_smt)
+        else:
+            backends[label] = GitHubBackend(runner=label, run_timeout=args.run_timeout)
+
+    if args.backend == 'local':
+        estrategias = list(COMANDOS)
+        backend = next(iter(backends.values()), None) or LocalBackend(
+            memoria=args.memoria, cpus=args.cpus, sem_smt=args.sem_smt)
+    else:
+        estrategias = list(WORKFLOWS)
+        backend = next(iter(backends.values()), None) or GitHubBackend(run_timeout=args.run_timeout)
+    if args.repeticoes == 'auto':
+        args.repeticoes = dimensionar_repeticoes(args.efeito, args.poder)
+    rng = None if args.ordem_fixa else random.Random(args.seed)
+    distribuido = len(backends) > 1
+
     print("="*60)
-    print("🧪 TESTE RÁPIDO - Green Metrics CI")
+    print("🧪 EXPERIMENTO - Green Metrics CI")
     print("="*60)
     print(f"⚙️  Configuração:")
-    print(f"   • Repetições: {REPETITIONS}")
-    print(f"   • Workflows: {len(WORKFLOWS)}")
-    print(f"   • Cooldown: {COOLDOWN}s")
-    print(f"   • Total de execuções: {REPETITIONS * len(WORKFLOWS)}")
-    print(f"   • Tempo estimado: ~{int((REPETITIONS * len(WORKFLOWS) * 30 + REPETITIONS * len(WORKFLOWS) * COOLDOWN) / 60)} minutos")
+    print(f"   • Backend: {args.backend}")
+    print(f"   • Repetições: {args.repeticoes}{' (máximo, modo adaptativo)' if args.adaptativo else ''}")
+    print(f"   • Tratamentos: {len(estrategias)} ({'ordem fixa' if rng is None else 'ordem aleatória'})")
+    if distribuido:
+        print(f"   • Hosts: {', '.join(backends)} (quadrado latino)")
+        print(f"   • Espera: fim da rodada em todos os hosts")
+        print(f"   • Rodadas: {len(quadrado_latino(estrategias, list(backends), args.repeticoes))}")
+    else:
+        print(f"   • Espera: {'desativada' if args.sem_ocioso else f'até ociosidade (máx. {args.max_cooldown}s)'}")
+        print(f"   • Total de execuções: {args.repeticoes * len(estrategias)}")
+    if args.backend == 'local' and backend.cpus:
+        print(f"   • Afinidade: {formatar_lista(backend.cpus)}{' (sem SMT)' if args.sem_smt else ''}")
     print("="*60)
-    
-    input("\n⏸️  Pressione ENTER para iniciar o experimento...")
-    
+
+    if not args.yes:
+        input("\n⏸️  Pressione ENTER para iniciar o experimento...")
+
+    parar = None
+    if args.adaptativo:
+        from sequential_testing import criar_parada_sequencial
+        parar = criar_parada_sequencial(estrategias, args.repeticoes)
+
+    async def _rodar():
+        if distribuido:
+            # Sensores locais não representam os outros hosts
+            return await executar_distribuido(backends, estrategias, args.repeticoes,
+                                              rng, parar)
+        monitor = None
+        if not args.sem_ocioso:
+            monitor = MonitorOcioso()
+            print(f"\n🌡️  Medindo referência ociosa ({CALIBRACAO_S}s)...")
+            referencia = await monitor.calibrar(CALIBRACAO_S)
+            print(f"   Referência: {formatar_amostra(referencia)}")
+        return await executar_experimento(backend, estrategias, args.repeticoes,
+                                          monitor, args.max_cooldown, rng, parar)
+
     start_time = time.time()
-    
-    for i in range(1, REPETITIONS + 1):
-        print(f"\n{'='*60}")
-        print(f"🔄 RODADA {i}/{REPETITIONS}")
-        print(f"{'='*60}")
-        
-        for wf in WORKFLOWS:
-            run_workflow(wf)
-            
-            # Intervalo de resfriamento (Cooldown)
-            print(f"⏳ Aguardando {COOLDOWN}s para resfriamento...")
-            time.sleep(COOLDOWN)
-        
-        elapsed = int(time.time() - start_time)
-        remaining_reps = REPETITIONS - i
-        estimated_remaining = int((remaining_reps * len(WORKFLOWS) * 30 + remaining_reps * len(WORKFLOWS) * COOLDOWN) / 60)
-        
-        print(f"\n📊 Progresso: {i}/{REPETITIONS} rodadas completas")
-        print(f"⏱️  Tempo decorrido: {elapsed//60}min {elapsed%60}s")
-        print(f"⏱️  Tempo restante estimado: ~{estimated_remaining} min")
-    
+    resultados = asyncio.run(_rodar())
+
     total_time = int(time.time() - start_time)
+    falhas = [r for r in resultados if r.get('conclusion') != 'success']
     print("\n" + "="*60)
     print("✅ EXPERIMENTO FINALIZADO!")
     print("="*60)
     print(f"⏱️  Tempo total: {total_time//60}min {total_time%60}s")
-    print(f"📊 Total de workflows disparados: {REPETITIONS * len(WORKFLOWS)}")
+    print(f"📊 Execuções concluídas: {len(resultados) - len(falhas)}/{len(resultados)}")
     print("\n📍 Próximos passos:")
-    print("   1. Vá para a aba 'Actions' no GitHub para verificar as execuções")
-    print("   2. Aguarde todas as execuções concluírem (~5-10 min)")
-    print("   3. Baixe os artifacts: gh run list --limit 10")
-    print("   4. Analise os dados: python3 scripts/metrics.py")
+    print("   → Analise os dados: python3 scripts/analyze_simple_metrics.py")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
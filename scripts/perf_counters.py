@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Contadores de desempenho por execução (perf_event_open): instruções,
+ciclos, referências e faltas de cache, trocas de contexto, migrações e
+page faults.
+
+    python scripts/perf_counters.py                      # quais contadores abrem neste host
+    python scripts/perf_counters.py python -m pytest src/test_app.py   # bloco ao fim da saída
+
+Os contadores são abertos pela chamada de sistema via ctypes (sem
+dependência nova) na thread que dispara o comando, com `inherit`: o
+comando e todos os processos que ele criar (workers do xdist) somam no
+mesmo contador quando terminam. A leitura é escalonada por
+tempo_habilitado/tempo_rodando quando o kernel multiplexa a PMU.
+
+Em VMs sem PMU virtualizada os eventos de hardware falham (ENOENT) e só
+os de software (task-clock, context-switches, cpu-migrations,
+page-faults) são contados; os ausentes viram NaN na análise. Com
+perf_event_paranoid >= 2 os eventos de hardware contam só o espaço de
+usuário (como `perf stat` sem root). Sem a chamada (arquitetura não
+mapeada, seccomp), se o binário `perf` existir o comando é envolvido
+por `perf stat -x,` e a saída CSV é lida no lugar.
+
+O bloco gravado no metrics.txt, logo depois do bloco do time -v:
+
+    Contadores: perf_event_open (hardware + software)
+    	instructions: 123456789
+    	cycles: 98765432
+    	...
+
+é lido por `ler_bloco()` em analyze_simple_metrics.py (colunas de
+COLUNAS; IPC e instruções por joule são derivadas lá).
+"""
+
+import argparse
+import ctypes
+import fcntl
+import os
+import platform
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+HARDWARE, SOFTWARE = 0, 1   # perf_type_id
+EVENTOS = {                 # Nome do perf stat: (tipo, config)
+    'instructions': (HARDWARE, 1),
+    'cycles': (HARDWARE, 0),
+    'cache-references': (HARDWARE, 2),
+    'cache-misses': (HARDWARE, 3),
+    'task-clock': (SOFTWARE, 1),
+    'page-faults': (SOFTWARE, 2),
+    'context-switches': (SOFTWARE, 3),
+    'cpu-migrations': (SOFTWARE, 4),
+}
+COLUNAS = {                 # Evento: coluna em resultados_simple.csv
+    'instructions': 'instrucoes',
+    'cycles': 'ciclos',
+    'cache-references': 'cache_refs',
+    'cache-misses': 'cache_misses',
+    'task-clock': 'task_clock_s',
+    'page-faults': 'page_faults',
+    'context-switches': 'trocas_contexto',
+    'cpu-migrations': 'migracoes_cpu',
+}
+SYSCALL = {'x86_64': 298, 'aarch64': 241, 'riscv64': 241, 'ppc64le': 319, 's390x': 331}
+IOC_ENABLE, IOC_DISABLE, IOC_RESET = 0x2400, 0x2401, 0x2403
+FORMATO_TEMPOS = 1 | 2      # TOTAL_TIME_ENABLED | TOTAL_TIME_RUNNING
+DESABILITADO, HERDAR, SEM_KERNEL, SEM_HV = 1 << 0, 1 << 1, 1 << 5, 1 << 6
+FD_CLOEXEC = 8              # PERF_FLAG_FD_CLOEXEC
+
+class _Atributos(ctypes.Structure):
+    """struct perf_event_attr até config2 (PERF_ATTR_SIZE_VER1)"""
+    _fields_ = [('type', ctypes.c_uint32), ('size', ctypes.c_uint32),
+                ('config', ctypes.c_uint64), ('sample_period', ctypes.c_uint64),
+                ('sample_type', ctypes.c_uint64), ('read_format', ctypes.c_uint64),
+                ('flags', ctypes.c_uint64), ('wakeup_events', ctypes.c_uint32),
+                ('bp_type', ctypes.c_uint32), ('config1', ctypes.c_uint64),
+                ('config2', ctypes.c_uint64)]
+
+def _paranoid():
+    try:
+        with open('/proc/sys/kernel/perf_event_paranoid') as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return 2
+
+def _abrir(tipo, config):
+    """fd do contador na thread atual (desabilitado, herdado), ou -errno"""
+    numero = SYSCALL.get(platform.machine())
+    if numero is None or sys.platform != 'linux':
+        return -38   # ENOSYS
+    atributos = _Atributos(type=tipo, size=ctypes.sizeof(_Atributos), config=config,
+                           read_format=FORMATO_TEMPOS, flags=DESABILITADO | HERDAR | SEM_HV)
+    if tipo == HARDWARE and _paranoid() >= 2:
+        atributos.flags |= SEM_KERNEL
+    libc = ctypes.CDLL(None, use_errno=True)
+    fd = libc.syscall(numero, ctypes.byref(atributos), 0, -1, -1, FD_CLOEXEC)
+    return fd if fd >= 0 else -ctypes.get_errno()
+
+class Contadores:
+    """
+    Contadores abertos na thread atual: `iniciar()` antes de criar o
+    processo medido, `parar()` depois do wait4; `valores` fica com o
+    total (processo + filhos) de cada evento que abriu.
+    """
+
+    def __init__(self, eventos=EVENTOS):
+        self.fds, self.falhas, self.valores = {}, {}, {}
+        for nome, (tipo, config) in eventos.items():
+            fd = _abrir(tipo, config)
+            if fd >= 0:
+                self.fds[nome] = fd
+            else:
+                self.falhas[nome] = os.strerror(-fd)
+
+    def iniciar(self):
+        for fd in self.fds.values():
+            fcntl.ioctl(fd, IOC_RESET, 0)
+            fcntl.ioctl(fd, IOC_ENABLE, 0)
+
+    def parar(self):
+        for fd in self.fds.values():
+            fcntl.ioctl(fd, IOC_DISABLE, 0)
+        for nome, fd in self.fds.items():
+            valor, habilitado, rodando = struct.unpack('QQQ', os.read(fd, 24))
+            if rodando and rodando < habilitado:   # PMU multiplexada
+                valor = valor * habilitado / rodando
+            self.valores[nome] = int(valor) if rodando or not habilitado else None
+            os.close(fd)
+        self.fds = {}
+        return self.valores
+
+    def bloco(self):
+        tipo = 'hardware + software' if any(
+            EVENTOS[n][0] == HARDWARE and v is not None for n, v in self.valores.items()) \
+            else 'software'
+        return formatar_bloco('perf_event_open', tipo, self.valores)
+
+def formatar_bloco(fonte, tipo, valores):
+    linhas = [f"Contadores: {fonte} ({tipo})"]
+    linhas += [f"\t{nome}: {valor}" for nome, valor in valores.items() if valor is not None]
+    return '\n'.join(linhas) + '\n'
+
+def ler_perf_stat(texto):
+    """{evento: valor} da saída CSV do `perf stat -x,` (<not supported> fica de fora)"""
+    valores = {}
+    for linha in texto.splitlines():
+        campos = linha.split(',')
+        if len(campos) < 3 or linha.startswith('#'):
+            continue
+        evento = campos[2].split(':')[0]   # instructions:u → instructions
+        if evento in EVENTOS:
+            try:
+                valor = float(campos[0])
+            except ValueError:
+                continue
+            if evento == 'task-clock' and campos[1] == 'msec':
+                valor *= 1e6   # ns, como o perf_event_open
+            valores[evento] = int(valor)
+    return valores
+
+def com_perf_stat(cmd, saida):
+    """`cmd` envolvido pelo perf stat, com o CSV em `saida`"""
+    return ['perf', 'stat', '-x,', '-o', saida, '-e', ','.join(EVENTOS), '--', *cmd]
+
+class Medidor:
+    """
+    Contadores de uma execução de `cmd`: pela chamada de sistema se algum
+    contador abre, senão pelo `perf stat` se o binário existe, senão
+    nenhum (bloco vazio). Executar `self.cmd` entre `iniciar()` e `parar()`.
+    """
+
+    def __init__(self, cmd):
+        self.cmd, self.csv = list(cmd), None
+        self.contadores = Contadores()
+        self.fonte = 'perf_event_open' if self.contadores.fds else None
+        if self.fonte is None and shutil.which('perf'):
+            self.fonte = 'perf stat'
+            descritor, self.csv = tempfile.mkstemp(suffix='.csv')
+            os.close(descritor)
+            self.cmd = com_perf_stat(cmd, self.csv)
+
+    def iniciar(self):
+        self.contadores.iniciar()
+
+    def parar(self):
+        """Bloco `Contadores:` para o metrics.txt ('' sem fonte)"""
+        if self.fonte == 'perf_event_open':
+            self.contadores.parar()
+            return self.contadores.bloco()
+        if self.csv is None:
+            return ''
+        with open(self.csv) as f:
+            valores = ler_perf_stat(f.read())
+        os.remove(self.csv)
+        tipo = 'hardware + software' if any(EVENTOS[n][0] == HARDWARE for n in valores) \
+            else 'software'
+        return formatar_bloco('perf stat', tipo, valores)
+
+def ler_bloco(content):
+    """Colunas de COLUNAS (e contadores_fonte/pmu) do bloco no metrics.txt"""
+    bloco = re.search(r'^Contadores: ([^(\n]+) \(([^)]+)\)\n((?:\t[a-z-]+: \d+\n?)*)',
+                      content, re.MULTILINE)
+    if not bloco:
+        return {}
+    metrics = {'contadores_fonte': bloco.group(1).strip(),
+               'pmu': bloco.group(2).startswith('hardware')}
+    for evento, valor in re.findall(r'^\t([a-z-]+): (\d+)$', bloco.group(3), re.MULTILINE):
+        if evento in COLUNAS:
+            metrics[COLUNAS[evento]] = int(valor) / 1e9 if evento == 'task-clock' else int(valor)
+    return metrics
+
+def derivadas(df, energia='energia_estimada_j'):
+    """IPC, % de faltas de cache e instruções por joule (NaN sem PMU)"""
+    if 'instrucoes' not in df.columns:
+        return df
+    ciclos = df['ciclos'] if 'ciclos' in df.columns else np.nan
+    df['ipc'] = df['instrucoes'] / ciclos
+    if 'cache_misses' in df.columns and 'cache_refs' in df.columns:
+        df['cache_miss_pct'] = 100 * df['cache_misses'] / df['cache_refs']
+    df['instrucoes_por_j'] = df['instrucoes'] / df[energia]
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Contadores de desempenho de um comando (sem comando: quais abrem aqui)')
+    parser.add_argument('cmd', nargs=argparse.REMAINDER,
+                        help='comando medido (o bloco Contadores: sai ao fim da saída)')
+    cmd = parser.parse_args().cmd
+    if cmd[:1] == ['--']:
+        cmd = cmd[1:]
+    medidor = Medidor(cmd)
+    if not cmd:
+        print(f"🔧 perf_event_paranoid: {_paranoid()}, fonte: {medidor.fonte or 'nenhuma'}")
+        for nome in EVENTOS:
+            estado = '✅' if nome in medidor.contadores.fds else f"❌ {medidor.contadores.falhas[nome]}"
+            print(f"   {nome:<18} {estado}")
+        medidor.parar()
+        return
+    medidor.iniciar()
+    try:
+        returncode = subprocess.run(medidor.cmd).returncode
+    finally:
+        bloco = medidor.parar()
+    sys.stdout.write(bloco)
+    sys.exit(returncode)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Pipeline incremental da análise: download → ingestão (e histórico por
+teste) → métricas derivadas → (estatísticas | mudanças | gráficos).
+
+Cada etapa declara entradas e saídas (arquivos). A chave de cache de uma
+etapa é o hash do conteúdo das entradas, do código dos módulos que ela
+usa e dos parâmetros; se a chave não mudou e as saídas existem, a etapa
+é pulada. A ingestão é incremental: só os metrics.txt novos ou alterados
+são lidos (cache por caminho, tamanho e mtime), e ela só regrava a
+tabela bruta quando o conteúdo muda. Etapas independentes rodam em
+paralelo, cada uma com a saída impressa em bloco ao terminar.
+
+Uso:
+    python3 scripts/pipeline.py [--download] [--filtrado] [--forcar] [--sequencial]
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import pandas as pd
+
+SCRIPTS = Path(__file__).resolve().parent
+RAW_DIR = 'data/raw'
+ESTADO_DIR = 'data/.pipeline'
+BRUTAS_PATH = 'data/processed/metricas_brutas.csv'
+RESULTADOS_PATH = 'data/resultados_simple.csv'
+RELATORIO_PATH = 'data/relatorio.txt'
+INTERVALOS_PATH = 'data/intervalos_bootstrap.csv'
+PLOTS_DIR = 'data/plots'
+MODELOS_PATH = 'data/modelos_potencia.json'   # power_model.py
+HISTORICO_PATH = 'data/historico_testes.pkl'   # history_store.py
+
+class _SaidaPorThread(io.TextIOBase):
+    """stdout que, dentro de uma etapa, acumula o texto no buffer da thread"""
+
+    def __init__(self, real):
+        self.real = real
+        self.local = threading.local()
+
+    def write(self, texto):
+        buffer = getattr(self.local, 'buffer', None)
+        return (buffer or self.real).write(texto)
+
+    def flush(self):
+        self.real.flush()
+
+@contextlib.contextmanager
+def capturar():
+    """
+    Captura o que a thread atual imprime. redirect_stdout trocaria o
+    stdout de todas as etapas em paralelo; com _SaidaPorThread só o
+    buffer desta thread muda.
+    """
+    buffer = io.StringIO()
+    if isinstance(sys.stdout, _SaidaPorThread):
+        anterior = getattr(sys.stdout.local, 'buffer', None)
+        sys.stdout.local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            sys.stdout.local.buffer = anterior
+    else:
+        with contextlib.redirect_stdout(buffer):
+            yield buffer
+
+class Etapa:
+    """Nó do DAG: função sem argumentos + entradas/saídas declaradas"""
+
+    def __init__(self, nome, funcao, entradas=(), saidas=(), modulos=(), parametros=None,
+                 sempre=False):
+        self.nome = nome
+        self.funcao = funcao
+        self.entradas = list(entradas)
+        self.saidas = list(saidas)
+        self.modulos = list(modulos)      # Scripts cujo código entra na chave
+        self.parametros = parametros or {}
+        self.sempre = sempre              # Sem cache (download, ingestão)
+
+def _hash_arquivo(caminho, h):
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+
+def chave_etapa(etapa):
+    """Hash do conteúdo das entradas, do código e dos parâmetros da etapa"""
+    h = hashlib.sha256(etapa.nome.encode())
+    for modulo in [Path(__file__).name, *etapa.modulos]:
+        _hash_arquivo(SCRIPTS / modulo, h)
+    h.update(json.dumps(etapa.parametros, sort_keys=True).encode())
+    for entrada in etapa.entradas:
+        h.update(entrada.encode())
+        if os.path.isfile(entrada):
+            _hash_arquivo(entrada, h)
+    return h.hexdigest()
+
+def _dependencias(etapas):
+    """Etapa -> etapas que produzem alguma das suas entradas"""
+    produtor = {saida: e.nome for e in etapas for saida in e.saidas}
+    return {e.nome: {produtor[x] for x in e.entradas if x in produtor} for e in etapas}
+
+def executar(etapas, forcar=False, paralelo=True):
+    """
+    Executa o DAG respeitando as dependências. Retorna {nome: 'executada'|'cache'|'erro'}.
+    Uma etapa com dependência em erro não roda.
+    """
+    os.makedirs(ESTADO_DIR, exist_ok=True)
+    estado_path = os.path.join(ESTADO_DIR, 'estado.json')
+    estado = {}
+    if os.path.exists(estado_path):
+        with open(estado_path, 'r') as f:
+            estado = json.load(f)
+
+    saida = _SaidaPorThread(sys.stdout)
+    por_nome = {e.nome: e for e in etapas}
+    deps = _dependencias(etapas)
+    status = {}
+
+    def rodar(etapa):
+        # A chave é calculada quando as dependências já terminaram
+        chave = None if etapa.sempre else chave_etapa(etapa)
+        if (not forcar and chave is not None and estado.get(etapa.nome) == chave
+                and all(os.path.exists(s) for s in etapa.saidas)):
+            return 'cache', '', 0.0
+        saida.local.buffer = io.StringIO()
+        inicio = time.monotonic()
+        try:
+            etapa.funcao()
+        finally:
+            texto = saida.local.buffer.getvalue()
+            saida.local.buffer = None
+        if chave is not None:
+            estado[etapa.nome] = chave
+        return 'executada', texto, time.monotonic() - inicio
+
+    pendentes = dict(deps)
+    with contextlib.redirect_stdout(saida), \
+            ThreadPoolExecutor(max_workers=len(etapas) if paralelo else 1) as pool:
+        em_execucao = {}
+        while pendentes or em_execucao:
+            for nome in [n for n, d in pendentes.items() if d <= set(status)]:
+                del pendentes[nome]
+                if any(status[d] == 'erro' for d in deps[nome]):
+                    status[nome] = 'erro'
+                    print(f"⏭️  {nome}: dependência falhou", file=saida.real)
+                    continue
+                em_execucao[pool.submit(rodar, por_nome[nome])] = nome
+            if not em_execucao:
+                continue
+            prontos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                nome = em_execucao.pop(futuro)
+                try:
+                    status[nome], texto, duracao = futuro.result()
+                except Exception as e:
+                    status[nome] = 'erro'
+                    print(f"❌ {nome}: {e}", file=saida.real)
+                    continue
+                if status[nome] == 'cache':
+                    print(f"⏭️  {nome}: sem mudanças nas entradas", file=saida.real)
+                else:
+                    print(f"\n▶️  {nome} ({duracao:.1f}s)", file=saida.real)
+                    saida.real.write(texto)
+
+    with open(estado_path + '.tmp', 'w') as f:
+        json.dump(estado, f, indent=2)
+    os.replace(estado_path + '.tmp', estado_path)
+    return status
+
+# =========================================================================
+# Etapas
+# =========================================================================
+
+def ingerir(raw_dir=RAW_DIR, destino=BRUTAS_PATH):
+    """
+    Lê os metrics.txt de forma incremental e grava a tabela bruta
+    (ordenada por caminho) apenas se o conteúdo mudou.
+    """
+    from analyze_simple_metrics import parse_time_output
+
+    cache_path = os.path.join(ESTADO_DIR, 'parse_cache.json')
+    # Código do parser no carimbo: mudar uma regex relê todos os arquivos
+    h = hashlib.sha256()
+    for modulo in ('analyze_simple_metrics.py', 'perf_counters.py'):
+        _hash_arquivo(SCRIPTS / modulo, h)
+    versao = h.hexdigest()[:16]
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r') as f:
+            cache = json.load(f)
+
+    novo_cache, novos = {}, 0
+    for root, dirs, files in os.walk(raw_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]  # .parcial (downloads em andamento)
+        if 'metrics.txt' not in files:
+            continue
+        caminho = os.path.join(root, 'metrics.txt')
+        st = os.stat(caminho)
+        carimbo = [st.st_size, st.st_mtime_ns, versao]
+        anterior = cache.get(caminho)
+        if anterior and anterior[0] == carimbo:
+            novo_cache[caminho] = anterior
+            continue
+        try:
+            novo_cache[caminho] = [carimbo, parse_time_output(caminho)]
+            novos += 1
+        except Exception as e:
+            print(f"   ❌ {caminho}: {e}")
+
+    linhas = [novo_cache[c][1] for c in sorted(novo_cache) if novo_cache[c][1]]
+    df = pd.DataFrame(linhas)
+    texto = df.to_csv(index=False)
+    atual = Path(destino).read_text() if os.path.exists(destino) else None
+    if texto != atual:
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with open(destino + '.tmp', 'w') as f:
+            f.write(texto)
+        os.replace(destino + '.tmp', destino)
+    with open(cache_path + '.tmp', 'w') as f:
+        json.dump(novo_cache, f)
+    os.replace(cache_path + '.tmp', cache_path)
+
+    removidos = len(set(cache) - set(novo_cache))
+    print(f"📄 {len(df)} execuções ({novos} lidas agora, {removidos} removidas)"
+          f"{'' if texto != atual else ' — tabela inalterada'}")
+
+def historico_testes(raw_dir=RAW_DIR):
+    """Duração/CPU por teste (testes*.jsonl, JUnit) no history_store (incremental)"""
+    from history_store import HistoricoTestes
+    historico = HistoricoTestes.carregar()
+    n = historico.ingerir(raw_dir)
+    historico.salvar()
+    print(f"🧾 {n} resultados por teste novos; {len(historico.pares)} pares (teste, host)")
+
+def derivar(origem=BRUTAS_PATH, destino=RESULTADOS_PATH):
+    """Métricas derivadas, normalização por host e filtro de exclusões"""
+    from analyze_simple_metrics import (calcular_metricas_derivadas, filtrar_execucoes,
+                                        imprimir_exclusoes, normalizar_por_host)
+    df = pd.read_csv(origem, dtype={'run_id': str})
+    df = filtrar_execucoes(normalizar_por_host(calcular_metricas_derivadas(df)))
+    imprimir_exclusoes(df)
+    df.to_csv(destino, index=False)
+    print(f"✅ Dados salvos: {destino}")
+
+def _carregar(filtrado):
+    df = pd.read_csv(RESULTADOS_PATH, dtype={'run_id': str})
+    return df[~df['excluido']] if filtrado and 'excluido' in df.columns else df
+
+def estatisticas(filtrado=False):
+    """Relatório descritivo, testes de hipótese e intervalos BCa"""
+    from analyze_simple_metrics import gerar_relatorio, teste_hipoteses
+    from bootstrap_ci import imprimir_intervalos, intervalos_bootstrap
+    dados = _carregar(filtrado)
+    with capturar() as relatorio:
+        print(f"📋 Conjunto analisado: {'filtrado' if filtrado else 'bruto'} ({len(dados)} execuções)")
+        gerar_relatorio(dados)
+        teste_hipoteses(dados)
+        intervalos = intervalos_bootstrap(dados)
+        imprimir_intervalos(intervalos)
+    intervalos.to_csv(INTERVALOS_PATH, index=False)
+    Path(RELATORIO_PATH).write_text(relatorio.getvalue())
+    print(relatorio.getvalue(), end='')
+    print(f"✅ Relatório salvo: {RELATORIO_PATH}; intervalos: {INTERVALOS_PATH}")
+
+def mudancas():
+    """CUSUM incremental (só as execuções ainda não vistas)"""
+    from changepoint import detectar_mudancas, imprimir_alarmes
+    imprimir_alarmes(detectar_mudancas(pd.read_csv(RESULTADOS_PATH, dtype={'run_id': str})))
+
+def graficos(filtrado=False):
+    """Figuras do artigo (cada uma com seu próprio cache de hash)"""
+    import create_combined_figure
+    import visualize_results
+    from plot_panels import ORDER, agrupar, renderizar
+    grupos = agrupar(_carregar(filtrado))
+    from timeseries import arquivos_series
+    tarefas = [(arquivo, funcao, {'grupos': grupos})
+               for arquivo, funcao in visualize_results.FIGURAS]
+    arquivos = arquivos_series(RAW_DIR, ordem=ORDER)
+    if arquivos:
+        from power_model import carregar_modelos
+        modelos = carregar_modelos()
+        tarefas += [(arquivo, visualize_results.create_series_plot,
+                     {'arquivos': arquivos, 'coluna': coluna, 'rotulo': rotulo,
+                      'modelos': modelos})
+                    for arquivo, (coluna, rotulo) in visualize_results.SERIES.items()]
+    renderizar(tarefas, visualize_results.ESTILO, PLOTS_DIR)
+    renderizar([('figura_combinada_2x2.png', create_combined_figure.create_combined_figure,
+                 {'grupos': grupos})], create_combined_figure.ESTILO, PLOTS_DIR)
+
+def carbono(intensidade):
+    """Intensidade de carbono da rede no intervalo de cada execução"""
+    from carbon import (CARBONO_PATH, anexar_carbono, carregar_intensidade, carregar_regioes,
+                        imprimir_carbono)
+    df = anexar_carbono(pd.read_csv(RESULTADOS_PATH, dtype={'run_id': str}),
+                        carregar_intensidade(intensidade), carregar_regioes())
+    imprimir_carbono(df)
+    df.to_csv(CARBONO_PATH, index=False)
+    print(f"✅ Dados salvos: {CARBONO_PATH}")
+
+def baixar():
+    from download_simple import GhBackend, baixar_todos
+    baixados, falhas = baixar_todos(GhBackend(), RAW_DIR)
+    print(f"📥 {len(baixados)} novos, {len(falhas)} falhas")
+
+def montar_etapas(download=False, filtrado=False):
+    """DAG padrão da análise"""
+    etapas = []
+    if download:
+        etapas.append(Etapa('download', baixar, saidas=[RAW_DIR], sempre=True))
+    etapas += [
+        Etapa('ingestao', ingerir, entradas=[RAW_DIR], saidas=[BRUTAS_PATH], sempre=True),
+        Etapa('historico', historico_testes, entradas=[RAW_DIR], saidas=[HISTORICO_PATH],
+              sempre=True),  # Incremental pelo próprio history_store
+        Etapa('derivadas', derivar, entradas=[BRUTAS_PATH, MODELOS_PATH],
+              saidas=[RESULTADOS_PATH],
+              modulos=['analyze_simple_metrics.py', 'power_model.py', 'timeseries.py']),
+        Etapa('mudancas', mudancas, entradas=[RESULTADOS_PATH],
+              modulos=['changepoint.py'], sempre=True),  # Estado próprio, já incremental
+        Etapa('estatisticas', lambda: estatisticas(filtrado), entradas=[RESULTADOS_PATH],
+              saidas=[RELATORIO_PATH, INTERVALOS_PATH],
+              modulos=['analyze_simple_metrics.py', 'bootstrap_ci.py'],
+              parametros={'filtrado': filtrado}),
+        Etapa('graficos', lambda: graficos(filtrado), entradas=[RESULTADOS_PATH, MODELOS_PATH],
+              saidas=[PLOTS_DIR],
+              modulos=['plot_panels.py', 'visualize_results.py', 'create_combined_figure.py',
+                       'timeseries.py'],
+              parametros={'filtrado': filtrado}),
+    ]
+    from carbon import CARBONO_PATH, REGIOES_PATH, encontrar_intensidade
+    intensidade = encontrar_intensidade()
+    if intensidade:  # Só com a série local de intensidade
+        etapas.append(Etapa('carbono', lambda: carbono(intensidade),
+                            entradas=[RESULTADOS_PATH, intensidade, REGIOES_PATH],
+                            saidas=[CARBONO_PATH], modulos=['carbon.py']))
+    return etapas
+
+def main():
+    parser = argparse.ArgumentParser(description='Pipeline incremental da análise')
+    parser.add_argument('--download', action='store_true',
+                        help='baixar execuções novas do GitHub antes da ingestão')
+    parser.add_argument('--filtrado', action='store_true',
+                        help='estatísticas e gráficos sem as execuções excluídas')
+    parser.add_argument('--forcar', action='store_true', help='ignorar o cache das etapas')
+    parser.add_argument('--sequencial', action='store_true',
+                        help='uma etapa por vez (sem paralelismo)')
+    args = parser.parse_args()
+
+    inicio = time.monotonic()
+    print("🔁 Pipeline de análise")
+    status = executar(montar_etapas(args.download, args.filtrado), args.forcar,
+                      not args.sequencial)
+    print(f"\n{'✅' if 'erro' not in status.values() else '❌'} Pipeline concluído em "
+          f"{time.monotonic() - inicio:.1f}s: " +
+          ', '.join(f'{n}={s}' for n, s in status.items()))
+    if 'erro' in status.values():
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
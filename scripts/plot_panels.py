@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Painéis compartilhados pelas figuras do artigo (visualize_results.py e
+create_combined_figure.py).
+
+Os dados são agrupados uma única vez em arrays por estratégia; cada
+painel desenha em um Axes recebido, então a figura avulsa e a combinada
+usam o mesmo código. As figuras são renderizadas em paralelo (processos,
+backend Agg) e uma figura só é refeita quando o hash dos dados, do
+estilo ou do código que a desenha muda.
+"""
+
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+# Paleta de cores profissional
+COLORS = {
+    'baseline': '#7fb3d5',  # Azul suave
+    'parallel': '#e74c3c',  # Vermelho (alerta)
+    'tia': '#27ae60',       # Verde (sucesso)
+    'prioritized': '#8e44ad',  # Roxo
+    'tia_parallel': '#16a085',  # Verde-azulado
+    'threads': '#f39c12'        # Laranja
+}
+
+ORDER = ['baseline', 'parallel', 'tia', 'prioritized', 'tia_parallel', 'threads']
+LABELS = {
+    'baseline': 'Baseline\n(Sequencial)',
+    'parallel': 'Paralelo\n(xdist)',
+    'tia': 'TIA\n(Testmon)',
+    'prioritized': 'Priorizado\n(p/custo)',
+    'tia_parallel': 'TIA + xdist\n(adaptativo)',
+    'threads': 'Threads\n(1 processo)'
+}
+
+COLUNAS = ['tempo_s', 'edp', 'cpu_pct', 'energia_estimada_j', 'mem_max_mb']
+DPI = 300
+CACHE = '.cache_figuras.json'
+
+def agrupar(df, colunas=COLUNAS, ordem=ORDER):
+    """{estrategia: {coluna: array}} com um único groupby"""
+    colunas = [c for c in colunas if c in df.columns]
+    grupos = {e: {c: sub[c].to_numpy(dtype=float) for c in colunas}
+              for e, sub in df.groupby('estrategia', sort=False)}
+    vazio = {c: np.array([]) for c in colunas}
+    return {e: grupos.get(e, vazio) for e in ordem}
+
+def presentes(grupos):
+    """Estratégias de ORDER com execuções no conjunto (as demais não viram coluna)"""
+    return [s for s in ORDER if s in grupos and any(len(v) for v in grupos[s].values())]
+
+def rotulo_n(grupos):
+    """'n=10' (ou 'n=8–10' se as estratégias têm repetições diferentes)"""
+    tamanhos = [max(len(v) for v in grupos[s].values()) for s in presentes(grupos)]
+    if not tamanhos:
+        return 'n=0'
+    menor, maior = min(tamanhos), max(tamanhos)
+    return f'n={maior}' if menor == maior else f'n={menor}–{maior}'
+
+def variacoes(grupos, coluna, estrategias=None):
+    """Variação percentual da média de cada estratégia vs baseline"""
+    if estrategias is None:
+        estrategias = [e for e in presentes(grupos) if e != 'baseline']
+    base = grupos['baseline'][coluna].mean()
+    return [(grupos[e][coluna].mean() - base) / base * 100 for e in estrategias]
+
+def painel_boxplot(ax, grupos, coluna, formato, compacto=False):
+    """Boxplot colorido por estratégia com a média anotada"""
+    ordem = presentes(grupos)
+    bp = ax.boxplot(
+        [grupos[s][coluna] for s in ordem],
+        patch_artist=True,
+        widths=0.6,
+        showmeans=True,
+        meanprops=dict(marker='D', markerfacecolor='white',
+                      markeredgecolor='black', markersize=5 if compacto else 6)
+    )
+    # Rótulos à parte: `labels=` virou `tick_labels=` no matplotlib 3.9
+    ax.set_xticks(range(1, len(ordem) + 1), [LABELS[s] for s in ordem])
+    for patch, estrategia in zip(bp['boxes'], ordem):
+        patch.set_facecolor(COLORS[estrategia])
+        patch.set_alpha(0.7)
+
+    for i, estrategia in enumerate(ordem, 1):
+        mean_val = grupos[estrategia][coluna].mean()
+        ax.text(i, mean_val, formato.format(mean_val),
+                ha='center', va='bottom', fontweight='bold', fontsize=8 if compacto else 10)
+    return bp
+
+def painel_tempo(ax, grupos, compacto=False):
+    """Tempo de execução com a média do baseline como referência"""
+    painel_boxplot(ax, grupos, 'tempo_s', '{:.2f}s', compacto)
+    ax.axhline(grupos['baseline']['tempo_s'].mean(), color='gray', linestyle='--',
+               alpha=0.5, linewidth=1, label=None if compacto else 'Baseline médio')
+    ax.grid(axis='y', alpha=0.3, linestyle='--')
+
+def painel_edp(ax, grupos, compacto=False):
+    """Energy-Delay Product em escala log"""
+    painel_boxplot(ax, grupos, 'edp', '{:.1f}', compacto)
+    ax.set_yscale('log')
+    ax.grid(axis='y', alpha=0.3, linestyle='--', which='both')
+
+def painel_cpu(ax, grupos, compacto=False):
+    """Utilização de CPU com a linha de 1 core"""
+    painel_boxplot(ax, grupos, 'cpu_pct', '{:.0f}%', compacto)
+    ax.axhline(100, color='orange', linestyle='--', alpha=0.6, linewidth=1.5,
+               label='1 core' if compacto else '1 core (100%)')
+    ax.grid(axis='y', alpha=0.3, linestyle='--')
+
+def painel_barras_variacao(ax, x, valores, cores, formato='{:+.1f}%', fontsize=None,
+                           **bar_kwargs):
+    """Barras de variação vs baseline com o valor anotado (formato: str ou função)"""
+    barras = ax.bar(x, valores, color=cores, **bar_kwargs)
+    for bar, val in zip(barras, valores):
+        ax.text(bar.get_x() + bar.get_width() / 2., bar.get_height(),
+                formato(val) if callable(formato) else formato.format(val), ha='center',
+                va='bottom' if val > 0 else 'top', fontweight='bold', fontsize=fontsize)
+    return barras
+
+def _hash_figura(funcao, kwargs, estilo):
+    """Hash dos dados de entrada, do estilo e do código da figura"""
+    h = hashlib.sha256()
+    h.update(inspect.getsource(funcao).encode())
+    h.update(inspect.getsource(inspect.getmodule(painel_boxplot)).encode())
+    h.update(json.dumps(estilo, sort_keys=True, default=str).encode())
+    h.update(pickle.dumps(kwargs))
+    return h.hexdigest()
+
+def _renderizar_uma(funcao, kwargs, estilo, caminho):
+    """Executada no processo filho: desenha e salva uma figura"""
+    with plt.rc_context(estilo):
+        fig = funcao(**kwargs)
+        fig.savefig(caminho, dpi=DPI, bbox_inches='tight')
+        plt.close(fig)
+    return caminho
+
+def renderizar(tarefas, estilo, output_dir='data/plots', paralelo=True, forcar=False):
+    """
+    Renderiza [(arquivo, funcao, kwargs), ...]. `funcao(**kwargs)` retorna
+    a Figure (funções de módulo, para poderem ir a outro processo).
+    Figuras com hash igual ao da última renderização são puladas.
+    Retorna a lista de caminhos gerados.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cache_path = os.path.join(output_dir, CACHE)
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r') as f:
+            cache = json.load(f)
+
+    pendentes = []
+    for arquivo, funcao, kwargs in tarefas:
+        caminho = os.path.join(output_dir, arquivo)
+        chave = _hash_figura(funcao, kwargs, estilo)
+        if not forcar and cache.get(arquivo) == chave and os.path.exists(caminho):
+            print(f"⏭️  Sem mudanças: {caminho}")
+            continue
+        pendentes.append((arquivo, chave, (funcao, kwargs, estilo, caminho)))
+
+    gerados = []
+    if paralelo and len(pendentes) > 1:
+        # spawn: seguro mesmo chamado de uma thread (ex.: pipeline.py)
+        with ProcessPoolExecutor(max_workers=min(len(pendentes), os.cpu_count() or 1),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            futuros = [(arquivo, chave, pool.submit(_renderizar_uma, *args))
+                       for arquivo, chave, args in pendentes]
+            for arquivo, chave, futuro in futuros:
+                gerados.append(futuro.result())
+                cache[arquivo] = chave
+                print(f"✅ Gráfico salvo: {gerados[-1]}")
+    else:
+        for arquivo, chave, args in pendentes:
+            gerados.append(_renderizar_uma(*args))
+            cache[arquivo] = chave
+            print(f"✅ Gráfico salvo: {gerados[-1]}")
+
+    with open(cache_path, 'w') as f:
+        json.dump(cache, f, indent=2)
+    return gerados
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Análise de poder por simulação para dimensionar as repetições.
+
+Usa a variabilidade observada de cada estratégia no histórico
+(resíduos relativos, x/média - 1) para simular experimentos com um
+efeito alvo e aplica os mesmos testes de teste_hipoteses (Mann-Whitney
+ou Wilcoxon), vetorizados sobre todos os conjuntos simulados. Retorna o
+menor número de repetições por tratamento que atinge o poder desejado.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+ALPHA = 0.05
+PODER = 0.80
+EFEITO = 0.20        # Diferença relativa entre as médias (20%)
+SIMULACOES = 5_000
+N_MIN, N_MAX = 3, 50
+
+# Mesmos testes de analyze_simple_metrics.teste_hipoteses
+TESTES = [
+    {'hipotese': 'H1', 'referencia': 'baseline', 'tratamento': 'tia',
+     'metrica': 'tempo_s', 'teste': 'mannwhitney', 'alternative': 'greater'},
+    {'hipotese': 'H2', 'referencia': 'baseline', 'tratamento': 'parallel',
+     'metrica': 'edp', 'teste': 'mannwhitney', 'alternative': 'two-sided'},
+]
+
+def residuos_relativos(df, estrategia, metrica):
+    """Resíduos relativos à média de uma estratégia no histórico"""
+    valores = df.loc[df['estrategia'] == estrategia, metrica].dropna().to_numpy(dtype=float)
+    if len(valores) < 2:
+        raise ValueError(f"histórico insuficiente para {estrategia}/{metrica}")
+    return valores / valores.mean() - 1
+
+def poder_simulado(res_ref, res_trat, n, efeito, teste='mannwhitney',
+                   alternative='greater', alpha=ALPHA, simulacoes=SIMULACOES, rng=None):
+    """
+    Fração dos `simulacoes` experimentos (n por tratamento) em que o teste
+    rejeita H0. A referência tem média 1 e o tratamento 1 - efeito; o
+    ruído de cada grupo é reamostrado dos seus próprios resíduos.
+    """
+    rng = rng if rng is not None else np.random.default_rng(0)
+    ref = 1 + rng.choice(res_ref, size=(simulacoes, n))
+    trat = (1 - efeito) * (1 + rng.choice(res_trat, size=(simulacoes, n)))
+
+    if teste == 'wilcoxon':
+        # Pareado por rodada, como em metrics.teste_hipoteses. Aproximação
+        # normal: com empates o 'auto' cai em permutação, linha a linha
+        _, p = stats.wilcoxon(ref, trat, axis=1, alternative=alternative, method='approx')
+    else:
+        _, p = stats.mannwhitneyu(ref, trat, axis=1, alternative=alternative,
+                                  method='asymptotic' if n > 8 else 'exact')
+    return float(np.mean(p < alpha))
+
+def repeticoes_minimas(res_ref, res_trat, efeito=EFEITO, poder=PODER, n_min=N_MIN,
+                       n_max=N_MAX, **kwargs):
+    """Menor n em [n_min, n_max] com poder >= alvo (None se não atingir)"""
+    for n in range(n_min, n_max + 1):
+        if poder_simulado(res_ref, res_trat, n, efeito, **kwargs) >= poder:
+            return n
+    return None
+
+def dimensionar(df, efeito=EFEITO, poder=PODER, alpha=ALPHA, simulacoes=SIMULACOES,
+                testes=TESTES, teste=None):
+    """Tabela com n mínimo por hipótese (as estratégias precisam estar no histórico)"""
+    linhas = []
+    for spec in testes:
+        try:
+            res_ref = residuos_relativos(df, spec['referencia'], spec['metrica'])
+            res_trat = residuos_relativos(df, spec['tratamento'], spec['metrica'])
+        except ValueError as e:
+            print(f"⚠️ {spec['hipotese']}: {e}")
+            continue
+        nome_teste = teste or spec['teste']
+        n = repeticoes_minimas(res_ref, res_trat, efeito, poder, teste=nome_teste,
+                               alternative=spec['alternative'], alpha=alpha,
+                               simulacoes=simulacoes)
+        linhas.append({'hipotese': spec['hipotese'], 'metrica': spec['metrica'],
+                       'teste': nome_teste, 'cv_referencia': res_ref.std(ddof=1),
+                       'cv_tratamento': res_trat.std(ddof=1), 'n_minimo': n})
+    return pd.DataFrame(linhas)
+
+def repeticoes_necessarias(df, efeito=EFEITO, poder=PODER, **kwargs):
+    """Repetições por tratamento que satisfazem todas as hipóteses"""
+    tabela = dimensionar(df, efeito, poder, **kwargs)
+    if tabela.empty or tabela['n_minimo'].isna().any():
+        return None
+    return int(tabela['n_minimo'].max())
+
+def main():
+    parser = argparse.ArgumentParser(description='Análise de poder por simulação')
+    parser.add_argument('dados', nargs='?', default='data/resultados_simple.csv')
+    parser.add_argument('--efeito', type=float, default=EFEITO,
+                        help='diferença relativa alvo entre médias (0.2 = 20%%)')
+    parser.add_argument('--poder', type=float, default=PODER)
+    parser.add_argument('--alpha', type=float, default=ALPHA)
+    parser.add_argument('--simulacoes', type=int, default=SIMULACOES)
+    parser.add_argument('--teste', choices=['mannwhitney', 'wilcoxon'],
+                        help='substitui o teste de cada hipótese')
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.dados)
+    print(f"🔋 Análise de poder: efeito {args.efeito:.0%}, poder {args.poder:.0%}, "
+          f"alpha {args.alpha}, {args.simulacoes} simulações")
+    tabela = dimensionar(df, args.efeito, args.poder, args.alpha, args.simulacoes,
+                         teste=args.teste)
+    if tabela.empty:
+        print("❌ Histórico insuficiente")
+        sys.exit(1)
+    for _, linha in tabela.iterrows():
+        n = linha['n_minimo']
+        texto = f"n = {int(n)} por tratamento" if pd.notna(n) else f"> {N_MAX} (não atingido)"
+        print(f"   {linha['hipotese']} ({linha['metrica']}, {linha['teste']}; "
+              f"CV {linha['cv_referencia']:.1%} / {linha['cv_tratamento']:.1%}): {texto}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Modelo de potência calibrado por host (substitui os 15 W fixos por core).
+
+Calibração: para cada nível de carga (0–100% por core), um processo por
+core roda `cpu_intensive_task` do src/app.py em ciclo de trabalho
+(ocupado `nivel` do período, dormindo o resto) enquanto utilização,
+frequência e potência são amostradas. A potência vem do RAPL ou de um
+log de medidor externo (CSV `t_s,potencia_w` com tempo Unix), alinhado
+às amostras por interpolação.
+
+Modelo (mínimos quadrados):
+    P = ocioso_w + u · (w_por_nucleo + w_por_nucleo_ghz · f)
+com u = cores ocupados (utilização × núcleos) e f = frequência em GHz.
+Sem frequência variável o termo em f é omitido.
+
+Aplicação (calcular_metricas_derivadas):
+  - com serie.csv: P(u(t), f(t)) de todas as execuções em um único passo
+    vetorizado; energia = potência média × tempo de parede;
+  - sem série: ocioso_w × tempo_s + cpu_total_s × (w_por_nucleo +
+    w_por_nucleo_ghz · f_ref);
+  - host sem modelo: cpu_total_s × TDP_POR_CORE (comportamento anterior).
+A parcela ociosa × tempo de parede é o que a estimativa antiga omitia:
+workers paralelos esperando também consomem.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from idle_monitor import delta_energia_j, ler_cpu_tempos, ler_energia_rapl, ler_frequencia_ghz
+from timeseries import INTERVALO_S, TDP_POR_CORE
+
+RAIZ = Path(__file__).resolve().parent.parent
+MODELOS_PATH = 'data/modelos_potencia.json'   # {host: modelo}
+HOST_ENV = 'HOST_EXECUCAO'   # Rótulo do host das execuções (linha Host: do metrics.txt)
+CALIBRACAO_DIR = 'data/calibracao'            # Amostras brutas por host
+NIVEIS = (0.0, 0.25, 0.5, 0.75, 1.0)          # Fração de cada core ocupada
+DURACAO_NIVEL_S = 15
+PERIODO_CARGA_S = 0.05                        # Ciclo ocupado/dormindo
+TAMANHO_FATORIAL = 300                        # Unidade de trabalho (cpu_intensive_task)
+COLUNAS_CALIBRACAO = ['t_unix', 'nivel', 'cpu_util', 'freq_ghz', 'potencia_rapl_w']
+
+def _carga(nivel, fim, periodo=PERIODO_CARGA_S):
+    """Processo de carga: ocupa `nivel` de cada período até `fim` (tempo Unix)"""
+    sys.path.insert(0, str(RAIZ / 'src'))
+    from app import cpu_intensive_task
+    while time.time() < fim:
+        inicio = time.monotonic()
+        while time.monotonic() - inicio < nivel * periodo:
+            cpu_intensive_task(TAMANHO_FATORIAL)
+        time.sleep(max(0.0, periodo - (time.monotonic() - inicio)))
+
+def medir_nivel(nivel, duracao=DURACAO_NIVEL_S, nucleos=None, intervalo=INTERVALO_S):
+    """Amostras (t_unix, nivel, cpu_util, freq_ghz, potencia_rapl_w) sob carga"""
+    nucleos = nucleos or os.cpu_count() or 1
+    fim = time.time() + duracao
+    contexto = multiprocessing.get_context('spawn')
+    processos = [contexto.Process(target=_carga, args=(nivel, fim)) for _ in range(nucleos)]
+    if nivel > 0:
+        for p in processos:
+            p.start()
+        time.sleep(min(1.0, duracao / 4))  # Descarta a subida da carga
+
+    linhas = []
+    cpu_ant, rapl_ant, t_ant = ler_cpu_tempos(), ler_energia_rapl(), time.monotonic()
+    while time.time() < fim:
+        time.sleep(intervalo)
+        cpu, rapl, t = ler_cpu_tempos(), ler_energia_rapl(), time.monotonic()
+        util = np.nan
+        if cpu and cpu_ant and cpu[1] > cpu_ant[1]:
+            util = 1 - (cpu[0] - cpu_ant[0]) / (cpu[1] - cpu_ant[1])
+        energia = delta_energia_j(rapl_ant, rapl)
+        freq = ler_frequencia_ghz()
+        linhas.append((time.time(), nivel, util, np.nan if freq is None else freq,
+                       energia / (t - t_ant) if energia is not None else np.nan))
+        cpu_ant, rapl_ant, t_ant = cpu, rapl, t
+
+    if nivel > 0:
+        for p in processos:
+            p.join()
+    return np.array(linhas, dtype=float).reshape(-1, len(COLUNAS_CALIBRACAO))
+
+def ler_medidor(caminho):
+    """Log do medidor externo: (t_unix, potencia_w) ordenado no tempo"""
+    dados = np.atleast_1d(np.genfromtxt(caminho, delimiter=',', names=True, dtype=np.float64))
+    ordem = np.argsort(dados['t_s'])
+    return dados['t_s'][ordem], dados['potencia_w'][ordem]
+
+def potencia_medida(amostras, medidor=None):
+    """Potência de cada amostra: medidor (interpolado) se houver, senão RAPL"""
+    if medidor is not None:
+        t, p = medidor
+        return np.interp(amostras[:, 0], t, p, left=np.nan, right=np.nan)
+    return amostras[:, 4]
+
+def ajustar(amostras, potencia, nucleos):
+    """Mínimos quadrados de P = ocioso + u·(a + b·f); retorna o dicionário do modelo"""
+    u = amostras[:, 2] * nucleos
+    f = amostras[:, 3]
+    validas = ~(np.isnan(u) | np.isnan(potencia))
+    if validas.sum() < 3:
+        raise ValueError("Amostras insuficientes: sem RAPL nem medidor com potência")
+    usa_freq = bool(np.isfinite(f[validas]).all() and np.ptp(f[validas]) > 0.05)
+    u, p, f = u[validas], potencia[validas], f[validas]
+
+    colunas = [np.ones_like(u), u] + ([u * f] if usa_freq else [])
+    X = np.column_stack(colunas)
+    coef, *_ = np.linalg.lstsq(X, p, rcond=None)
+    residuo = p - X @ coef
+    r2 = 1 - (residuo ** 2).sum() / max(((p - p.mean()) ** 2).sum(), 1e-12)
+
+    ocupadas = u > 0.5 * u.max() if u.max() > 0 else np.ones_like(u, dtype=bool)
+    return {
+        'ocioso_w': float(coef[0]),
+        'w_por_nucleo': float(coef[1]),
+        'w_por_nucleo_ghz': float(coef[2]) if usa_freq else 0.0,
+        'freq_ref_ghz': float(np.nanmedian(f[ocupadas])) if np.isfinite(f).any() else None,
+        'nucleos': int(nucleos),
+        'r2': float(r2),
+        'amostras': int(len(p)),
+    }
+
+def carregar_modelos(caminho=MODELOS_PATH):
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, 'r') as f:
+        return json.load(f)
+
+def salvar_modelo(host, modelo, caminho=MODELOS_PATH):
+    modelos = carregar_modelos(caminho)
+    modelos[host] = modelo
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    with open(caminho, 'w') as f:
+        json.dump(modelos, f, indent=2, sort_keys=True)
+
+def potencia_modelo(modelo, util, freq=None):
+    """P(u, f) vetorizado; `util` é a fração da máquina (0–1), como em /proc/stat"""
+    u = np.asarray(util, dtype=float) * modelo['nucleos']
+    f = np.full_like(u, modelo.get('freq_ref_ghz') or 0.0) if freq is None else \
+        np.where(np.isnan(freq), modelo.get('freq_ref_ghz') or 0.0, freq)
+    return modelo['ocioso_w'] + u * (modelo['w_por_nucleo'] + modelo['w_por_nucleo_ghz'] * f)
+
+def _energia_series(df, modelos, raw_dir):
+    """
+    Energia pelas séries (NaN onde não há serie.csv ou modelo): todas as
+    séries concatenadas e a potência média de cada execução por reduceat.
+    """
+    energia = np.full(len(df), np.nan)
+    linhas, utils, freqs = [], [], []
+    for i, (estrategia, run_id, host) in enumerate(zip(df['estrategia'], df['run_id'], df['host'])):
+        caminho = os.path.join(raw_dir, f'{estrategia}-{run_id}', 'serie.csv')
+        if host not in modelos or not os.path.exists(caminho):
+            continue
+        dados = np.atleast_1d(np.genfromtxt(caminho, delimiter=',', names=True,
+                                            dtype=np.float64))
+        if not len(dados) or np.isnan(dados['cpu_util']).all():
+            continue
+        linhas.append(i)
+        utils.append(np.nan_to_num(dados['cpu_util']))
+        freqs.append(dados['freq_ghz'] if 'freq_ghz' in dados.dtype.names
+                     else np.full(len(dados), np.nan))
+    if not linhas:
+        return energia
+
+    hosts = df['host'].to_numpy()[linhas]
+    tamanhos = np.array([len(u) for u in utils])
+    por_amostra = np.repeat(hosts, tamanhos)
+    inicios = np.concatenate([[0], np.cumsum(tamanhos)[:-1]])
+    util, freq = np.concatenate(utils), np.concatenate(freqs)
+    potencia = np.empty_like(util)
+    for host in np.unique(hosts):
+        sel = por_amostra == host
+        potencia[sel] = potencia_modelo(modelos[host], util[sel], freq[sel])
+    media = np.add.reduceat(potencia, inicios) / tamanhos
+    energia[linhas] = media * df['tempo_s'].to_numpy()[linhas]
+    return energia
+
+def energia_execucoes(df, modelos=None, raw_dir='data/raw'):
+    """
+    (energia_j, método) por execução: 'serie', 'agregado' (modelo sem
+    série) ou 'tdp' (host sem calibração).
+    """
+    modelos = carregar_modelos() if modelos is None else modelos
+    host = df['host'].fillna('desconhecido') if 'host' in df.columns else \
+        np.full(len(df), 'desconhecido')
+    host = np.asarray(host, dtype=object)
+    tempo = df['tempo_s'].to_numpy(dtype=float)
+    cpu = df['cpu_total_s'].to_numpy(dtype=float)
+
+    energia = cpu * TDP_POR_CORE
+    metodo = np.full(len(df), 'tdp', dtype=object)
+    for h, modelo in modelos.items():
+        sel = host == h
+        if not sel.any():
+            continue
+        por_nucleo = modelo['w_por_nucleo'] + modelo['w_por_nucleo_ghz'] * (modelo.get('freq_ref_ghz') or 0.0)
+        energia[sel] = modelo['ocioso_w'] * tempo[sel] + cpu[sel] * por_nucleo
+        metodo[sel] = 'agregado'
+
+    if modelos and 'run_id' in df.columns:
+        series = _energia_series(df.assign(host=host), modelos, raw_dir)
+        com_serie = ~np.isnan(series)
+        energia[com_serie] = series[com_serie]
+        metodo[com_serie] = 'serie'
+    return energia, metodo
+
+def host_atual():
+    """
+    Rótulo deste host como aparece nas execuções (runner.name no GitHub,
+    --host no backend local): $HOST_EXECUCAO, senão o hostname
+    """
+    return os.environ.get(HOST_ENV) or socket.gethostname()
+
+def calibrar(niveis=NIVEIS, duracao=DURACAO_NIVEL_S, host=None):
+    """Roda os níveis de carga e grava as amostras em data/calibracao/<host>.csv"""
+    host = host or host_atual()
+    nucleos = os.cpu_count() or 1
+    blocos = []
+    for nivel in niveis:
+        print(f"🔥 Carga {nivel * 100:.0f}% × {nucleos} core(s) por {duracao}s...")
+        blocos.append(medir_nivel(nivel, duracao, nucleos))
+        util = np.nanmean(blocos[-1][:, 2]) if len(blocos[-1]) else np.nan
+        print(f"   CPU medida: {util * 100:.0f}%")
+    amostras = np.vstack(blocos)
+    os.makedirs(CALIBRACAO_DIR, exist_ok=True)
+    caminho = os.path.join(CALIBRACAO_DIR, f'{host}.csv')
+    np.savetxt(caminho, amostras, delimiter=',', header=','.join(COLUNAS_CALIBRACAO),
+               comments='', fmt='%.6f')
+    print(f"✅ Amostras salvas: {caminho}")
+    return caminho
+
+def ajustar_host(host, medidor=None, nucleos=None):
+    """Ajusta e salva o modelo a partir das amostras de calibração do host"""
+    caminho = os.path.join(CALIBRACAO_DIR, f'{host}.csv')
+    amostras = np.loadtxt(caminho, delimiter=',', skiprows=1, ndmin=2)
+    potencia = potencia_medida(amostras, ler_medidor(medidor) if medidor else None)
+    modelo = ajustar(amostras, potencia, nucleos or os.cpu_count() or 1)
+    modelo['fonte'] = 'medidor' if medidor else 'rapl'
+    modelo['calibrado_em'] = datetime.now().isoformat(timespec='seconds')
+    salvar_modelo(host, modelo)
+    return modelo
+
+def imprimir_modelo(host, modelo):
+    print(f"🖥️  {host} ({modelo['fonte']}, {modelo['amostras']} amostras, R²={modelo['r2']:.3f})")
+    termo_f = (f" + {modelo['w_por_nucleo_ghz']:.2f}·f" if modelo['w_por_nucleo_ghz'] else '')
+    print(f"   P = {modelo['ocioso_w']:.2f} W + u·({modelo['w_por_nucleo']:.2f}{termo_f}) W"
+          f"  [u em cores, f em GHz, f_ref={modelo.get('freq_ref_ghz')}]")
+
+def main():
+    parser = argparse.ArgumentParser(description='Modelo de potência calibrado por host')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    cal = sub.add_parser('calibrar', help='Roda os níveis de carga e ajusta o modelo')
+    cal.add_argument('--niveis', type=float, nargs='+', default=list(NIVEIS))
+    cal.add_argument('--duracao', type=float, default=DURACAO_NIVEL_S, help='Segundos por nível')
+    cal.add_argument('--medidor', help='CSV t_s,potencia_w (tempo Unix) em vez do RAPL')
+    aj = sub.add_parser('ajustar', help='Reajusta a partir das amostras já coletadas')
+    aj.add_argument('--medidor', help='CSV t_s,potencia_w (tempo Unix) em vez do RAPL')
+    for p in (cal, aj):
+        p.add_argument('--host', default=host_atual(),
+                       help=f'Rótulo do host nas execuções (padrão: ${HOST_ENV} ou o hostname)')
+    sub.add_parser('mostrar', help='Lista os modelos salvos')
+    args = parser.parse_args()
+
+    if args.comando == 'mostrar':
+        modelos = carregar_modelos()
+        if not modelos:
+            print(f"⚠️  Nenhum modelo em {MODELOS_PATH}: a análise usa {TDP_POR_CORE} W por core")
+        for host, modelo in modelos.items():
+            imprimir_modelo(host, modelo)
+        return
+
+    if args.comando == 'calibrar':
+        calibrar(args.niveis, args.duracao, args.host)
+    try:
+        modelo = ajustar_host(args.host, args.medidor)
+    except ValueError as e:
+        print(f"❌ {e}")
+        print("   Rode no host com RAPL legível ou passe --medidor com o log do medidor")
+        sys.exit(1)
+    imprimir_modelo(args.host, modelo)
+    print(f"✅ Modelo salvo: {MODELOS_PATH}")
+
+if __name__ == "__main__":
+    main()
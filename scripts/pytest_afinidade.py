@@ -0,0 +1,32 @@
+"""
+Plugin pytest: fixa cada worker do pytest-xdist num núcleo do conjunto
+de afinidade herdado, para que os workers não migrem entre núcleos.
+
+    PYTEST_PLUGINS=scripts.pytest_afinidade taskset -c 0-3 python -m pytest -n auto src/test_app.py
+
+O backend local liga o plugin pela variável de ambiente quando roda com
+`--cpus`/`--sem-smt` (ver cpu_pinning.py), o que também alcança o pytest
+lançado pelo tia_parallel.py. O worker gwK fica no K-ésimo núcleo do
+conjunto (circular se houver mais workers que núcleos); o controlador
+continua no conjunto inteiro. `-n auto` passa a contar os núcleos do
+conjunto, e não os da máquina (o psutil, se instalado, ignora a
+afinidade).
+"""
+
+import os
+
+import pytest
+
+def _conjunto():
+    return sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else []
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_auto_num_workers(config):
+    return len(_conjunto()) or None
+
+def pytest_configure(config):
+    cpus = _conjunto()
+    if not hasattr(config, 'workerinput') or len(cpus) < 2:
+        return
+    indice = int(config.workerinput['workerid'].lstrip('gw'))
+    os.sched_setaffinity(0, {cpus[indice % len(cpus)]})
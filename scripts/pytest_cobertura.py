@@ -0,0 +1,200 @@
+"""
+Plugin pytest: cobertura de linhas por teste com sys.monitoring (PEP 669,
+Python 3.12+) e um bitmap compacto por teste.
+
+    python -m pytest -p scripts.pytest_cobertura --cobertura=data/cobertura.npz src/test_app.py
+
+O custo do rastreamento com sys.settrace (pytest-cov/coverage.py) vem de
+chamar o rastreador em toda linha executada. Aqui:
+  - PY_START liga o evento LINE só nos code objects dos arquivos de
+    `--cobertura-fonte` (os demais devolvem DISABLE e não voltam a
+    disparar no teste);
+  - cada callback de LINE marca o bit da linha e devolve DISABLE: a
+    linha não custa mais nada até o próximo teste;
+  - no início de cada teste `sys.monitoring.restart_events()` reativa
+    os eventos desligados, para que o bitmap seja do teste.
+
+O .npz tem o índice das linhas executáveis (`arquivos`, `arquivo` e
+`linha` de cada bit), os `nodeids` e `bitmaps` (np.packbits, uma linha
+por teste), além de `sessao` com o que rodou fora dos testes (imports e
+coleta). Com pytest-xdist cada worker grava o próprio arquivo
+(cobertura-gw0.npz, ...) e o controlador junta tudo no arquivo pedido.
+Ler com `carregar()`.
+"""
+
+import glob
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+FERRAMENTAS = (5, 4, 3)   # IDs livres do sys.monitoring tentados em ordem (1 é do coverage.py)
+NOME_FERRAMENTA = 'greense-cobertura'
+
+def linhas_executaveis(arquivo):
+    """Linhas com código do arquivo, pelos co_lines() de todos os code objects"""
+    pendentes = [compile(Path(arquivo).read_text(), arquivo, 'exec')]
+    linhas = set()
+    while pendentes:
+        code = pendentes.pop()
+        linhas.update(l for _, _, l in code.co_lines() if l is not None and l > 0)
+        pendentes.extend(c for c in code.co_consts if hasattr(c, 'co_lines'))
+    return sorted(linhas)
+
+def arquivos_fonte(fonte):
+    """Arquivos .py de `fonte` que não são testes nem conftest"""
+    return sorted(str(p.absolute()) for p in Path(fonte).rglob('*.py')
+                  if not p.name.startswith('test_') and p.name != 'conftest.py')
+
+def carregar(caminho):
+    """(nodeids, DataFrame arquivo/linha por bit, matriz booleana testes × linhas)"""
+    import pandas as pd
+    dados = np.load(caminho)
+    n = len(dados['linha'])
+    bits = np.unpackbits(dados['bitmaps'], axis=1, count=n).astype(bool)
+    indice = pd.DataFrame({'arquivo': dados['arquivos'][dados['arquivo']], 'linha': dados['linha']})
+    return list(dados['nodeids']), indice, bits
+
+def salvar(caminho, arquivos, arquivo, linha, nodeids, bitmaps, sessao):
+    """Grava o .npz; retorna (linhas cobertas, linhas executáveis, testes)"""
+    bitmaps = np.asarray(bitmaps, dtype=np.uint8).reshape(len(nodeids), (len(linha) + 7) // 8)
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    np.savez_compressed(caminho, arquivos=np.asarray(arquivos, dtype=str), arquivo=arquivo,
+                        linha=linha, nodeids=np.asarray(nodeids, dtype=str), bitmaps=bitmaps,
+                        sessao=np.packbits(sessao))
+    coberto = np.unpackbits(bitmaps, axis=1, count=len(linha)).any(axis=0) | sessao
+    return int(coberto.sum()), len(linha), len(nodeids)
+
+def juntar(partes, caminho):
+    """Junta os arquivos dos workers do xdist (mesmo índice de linhas)"""
+    dados = [np.load(p) for p in partes]
+    n = len(dados[0]['linha'])
+    sessao = np.zeros(n, dtype=bool)
+    for d in dados:
+        sessao |= np.unpackbits(d['sessao'], count=n).astype(bool)
+    return salvar(caminho, dados[0]['arquivos'], dados[0]['arquivo'], dados[0]['linha'],
+                  np.concatenate([d['nodeids'] for d in dados]),
+                  np.concatenate([d['bitmaps'] for d in dados]), sessao)
+
+def _escrever_resumo(terminalreporter, resumo, caminho):
+    cobertas, total, testes = resumo
+    pct = 100 * cobertas / total if total else 0.0
+    terminalreporter.write_line(
+        f"Cobertura (sys.monitoring): {cobertas}/{total} linhas ({pct:.1f}%), "
+        f"{testes} testes → {caminho}")
+
+def pytest_addoption(parser):
+    parser.addoption('--cobertura', metavar='ARQUIVO',
+                     help='Bitmap de linhas cobertas por teste (.npz) via sys.monitoring')
+    parser.addoption('--cobertura-fonte', metavar='DIR', default='src',
+                     help='Diretório do código medido (padrão: src)')
+
+class Cobertura:
+    """Callbacks do sys.monitoring e bitmaps por teste"""
+
+    def __init__(self, caminho, fonte):
+        self.caminho = caminho
+        self.arquivos = arquivos_fonte(fonte)
+        arquivo, linha = [], []
+        self.bits = {}   # {co_filename: {linha: bit}}
+        for i, nome in enumerate(self.arquivos):
+            linhas = linhas_executaveis(nome)
+            self.bits[nome] = {l: len(linha) + k for k, l in enumerate(linhas)}
+            arquivo += [i] * len(linhas)
+            linha += linhas
+        self.arquivo, self.linha = np.array(arquivo, dtype=np.int32), np.array(linha, dtype=np.int32)
+        self.sessao = np.zeros(len(self.linha), dtype=bool)
+        self.atual = self.sessao
+        self.nodeids, self.bitmaps = [], []
+        self.ferramenta = None
+
+    def iniciar(self):
+        monitoring = sys.monitoring
+        for ferramenta in FERRAMENTAS:
+            if monitoring.get_tool(ferramenta) is None:
+                break
+        else:
+            raise pytest.UsageError('--cobertura: nenhum ID livre no sys.monitoring')
+        monitoring.use_tool_id(ferramenta, NOME_FERRAMENTA)
+        monitoring.register_callback(ferramenta, monitoring.events.PY_START, self._inicio)
+        monitoring.register_callback(ferramenta, monitoring.events.LINE, self._linha)
+        monitoring.set_events(ferramenta, monitoring.events.PY_START)
+        self.ferramenta = ferramenta
+
+    def parar(self):
+        if self.ferramenta is not None:
+            sys.monitoring.set_events(self.ferramenta, 0)
+            sys.monitoring.free_tool_id(self.ferramenta)
+            self.ferramenta = None
+
+    def _inicio(self, code, offset):
+        if code.co_filename in self.bits:
+            sys.monitoring.set_local_events(self.ferramenta, code, sys.monitoring.events.LINE)
+        return sys.monitoring.DISABLE
+
+    def _linha(self, code, linha):
+        bit = self.bits[code.co_filename].get(linha)
+        if bit is not None:
+            self.atual[bit] = True
+        return sys.monitoring.DISABLE
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        self.atual = np.zeros(len(self.linha), dtype=bool)
+        sys.monitoring.restart_events()
+        yield
+        self.nodeids.append(item.nodeid)
+        self.bitmaps.append(np.packbits(self.atual))
+        self.atual = self.sessao
+        sys.monitoring.restart_events()
+
+    def pytest_sessionfinish(self, session):
+        self.parar()
+        self.resumo = salvar(self.caminho, self.arquivos, self.arquivo, self.linha,
+                             self.nodeids, self.bitmaps, self.sessao)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        _escrever_resumo(terminalreporter, self.resumo, self.caminho)
+
+class CoberturaControlador:
+    """Controlador do xdist: junta os arquivos dos workers ao fim da sessão"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.resumo = None
+
+    def pytest_sessionfinish(self, session):
+        raiz, ext = os.path.splitext(self.caminho)
+        partes = sorted(glob.glob(f'{glob.escape(raiz)}-gw*{ext}'))
+        if partes:
+            self.resumo = juntar(partes, self.caminho)
+            for parte in partes:
+                os.remove(parte)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.resumo is not None:
+            _escrever_resumo(terminalreporter, self.resumo, self.caminho)
+
+def pytest_configure(config):
+    caminho = config.getoption('cobertura')
+    if not caminho:
+        return
+    if not hasattr(sys, 'monitoring'):
+        raise pytest.UsageError('--cobertura requer Python 3.12+ (sys.monitoring)')
+    if hasattr(config, 'workerinput'):
+        raiz, ext = os.path.splitext(caminho)
+        caminho = f"{raiz}-{config.workerinput['workerid']}{ext}"
+    elif config.getoption('numprocesses', None):
+        config.pluginmanager.register(CoberturaControlador(caminho), 'cobertura_controlador')
+        return   # Os testes rodam nos workers
+    fonte = os.path.join(str(config.rootpath), config.getoption('cobertura_fonte'))
+    cobertura = Cobertura(caminho, fonte)
+    cobertura.iniciar()
+    config.pluginmanager.register(cobertura, 'cobertura')
+
+def pytest_unconfigure(config):
+    cobertura = config.pluginmanager.get_plugin('cobertura')
+    if cobertura is not None:
+        cobertura.parar()
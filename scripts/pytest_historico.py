@@ -0,0 +1,62 @@
+"""
+Plugin pytest: grava duração e CPU de cada teste em JSONL para o
+history_store.py.
+
+    PYTHONPATH=scripts python -m pytest -p pytest_historico --historico=testes.jsonl
+
+Uma linha por teste executado: {"nodeid", "host", "duracao_s", "cpu_s"}.
+O host é $HOST_EXECUCAO (o mesmo rótulo da linha Host: do metrics.txt,
+posto pelos workflows e pelo backend local), senão o hostname.
+A CPU é a da thread que roda o teste (time.thread_time), então o valor
+continua correto com execução em threads. Com pytest-xdist cada worker
+escreve no próprio arquivo (testes-gw0.jsonl, ...).
+"""
+
+import json
+import os
+import socket
+import time
+
+import pytest
+
+def pytest_addoption(parser):
+    parser.addoption('--historico', metavar='ARQUIVO',
+                     help='JSONL com duração e CPU por teste (history_store.py)')
+
+def pytest_configure(config):
+    caminho = config.getoption('historico')
+    if not caminho:
+        return
+    worker = os.environ.get('PYTEST_XDIST_WORKER')
+    if worker:
+        raiz, ext = os.path.splitext(caminho)
+        caminho = f'{raiz}-{worker}{ext}'
+    config._historico = caminho   # Aberto na primeira escrita (o controlador do xdist não escreve)
+    config._historico_cpu = {}
+    config._historico_host = os.environ.get('HOST_EXECUCAO') or socket.gethostname()
+
+def pytest_unconfigure(config):
+    arquivo = getattr(config, '_historico', None)
+    if arquivo is not None and not isinstance(arquivo, str):
+        arquivo.close()
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    cpu = getattr(item.config, '_historico_cpu', None)
+    inicio = time.thread_time()
+    yield
+    if cpu is not None:
+        cpu[item.nodeid] = time.thread_time() - inicio
+
+def pytest_runtest_makereport(item, call):
+    arquivo = getattr(item.config, '_historico', None)
+    if arquivo is None or call.when != 'call':
+        return
+    if isinstance(arquivo, str):
+        arquivo = item.config._historico = open(arquivo, 'a', buffering=1)
+    arquivo.write(json.dumps({
+        'nodeid': item.nodeid,
+        'host': item.config._historico_host,
+        'duracao_s': call.duration,
+        'cpu_s': item.config._historico_cpu.pop(item.nodeid, None),
+    }) + '\n')
@@ -0,0 +1,200 @@
+"""
+Plugin pytest: perfil de memória por teste com tracemalloc.
+
+    python -m pytest -p scripts.pytest_memoria --memoria=data/memoria.npz src/test_app.py
+    python -m pytest -p scripts.pytest_memoria --memoria=memoria.npz --memoria-top=10 --memoria-frames=3 ...
+
+Por teste:
+  - pico_b: pico de memória rastreada durante a chamada
+    (tracemalloc.reset_peak no início);
+  - retido_b / blocos: bytes e blocos ainda vivos quando a função de teste
+    retorna (o que ela segurava: listas ordenadas, resultados...);
+  - os N maiores sítios de alocação (arquivo:linha) desses blocos.
+
+Para que o snapshot seja barato, o tracemalloc só fica ligado durante a
+chamada de cada teste (start/stop; se já estava ligado, os rastros são
+zerados com clear_traces): o snapshot só copia o que o teste alocou e
+ainda está vivo, e coleta, setup e relatórios não pagam o rastreio. Ele
+é tirado no evento `return` do frame do teste (sys.settrace só com
+eventos de chamada; o rastreio de linhas fica desligado), antes que as
+variáveis locais sejam liberadas. O agrupamento por linha é feito com o
+rastreio já desligado, e os sítios do pytest/pluggy são descartados
+depois de agrupados (filtrar rastro a rastro custaria mais que o teste).
+Se outro rastreador já estiver ativo (coverage, testmon), o snapshot é
+tirado logo depois da chamada e `retido_b` cai para o que sobreviveu a
+ela.
+
+O .npz é colunar: `nodeids`, `pico_b`, `retido_b`, `blocos` (um valor
+por teste) e a tabela longa dos sítios (`site_teste`, `site`, `site_b`,
+`site_blocos`, com os nomes em `sites`). Com pytest-xdist cada worker
+grava o próprio arquivo e o controlador junta tudo no arquivo pedido.
+Ler com `carregar()`; a análise por estratégia e as regressões entre
+execuções estão em memoria_testes.py.
+"""
+
+import glob
+import os
+from fnmatch import fnmatch
+import sys
+import tracemalloc
+
+import numpy as np
+import pytest
+
+TOP_PADRAO = 5
+FRAMES_PADRAO = 1
+COLUNAS_TESTE = ('pico_b', 'retido_b', 'blocos')
+COLUNAS_SITIO = ('site_teste', 'site', 'site_b', 'site_blocos')
+IGNORADOS = (tracemalloc.__file__, __file__, '<unknown>', '*/_pytest/*', '*/pluggy/*')
+
+def carregar(caminho):
+    """(DataFrame por teste, DataFrame longo dos sítios de alocação)"""
+    import pandas as pd
+    dados = np.load(caminho)
+    testes = pd.DataFrame({'nodeid': dados['nodeids'],
+                           **{c: dados[c] for c in COLUNAS_TESTE}})
+    sitios = pd.DataFrame({'nodeid': dados['nodeids'][dados['site_teste']],
+                           'site': dados['sites'][dados['site']],
+                           'bytes': dados['site_b'], 'blocos': dados['site_blocos']})
+    return testes, sitios
+
+def salvar(caminho, nodeids, testes, sites, sitios):
+    """Grava o .npz colunar; `testes` e `sitios` são listas de tuplas"""
+    testes = np.array(testes, dtype=np.int64).reshape(-1, len(COLUNAS_TESTE))
+    sitios = np.array(sitios, dtype=np.int64).reshape(-1, len(COLUNAS_SITIO))
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    np.savez_compressed(caminho, nodeids=np.asarray(nodeids, dtype=str),
+                        sites=np.asarray(sites, dtype=str),
+                        **{c: testes[:, k] for k, c in enumerate(COLUNAS_TESTE)},
+                        **{c: sitios[:, k].astype(np.int32 if k < 2 else np.int64)
+                           for k, c in enumerate(COLUNAS_SITIO)})
+
+def juntar(partes, caminho):
+    """Junta os arquivos dos workers do xdist (reindexando testes e sítios)"""
+    nodeids, testes, sites, sitios = [], [], {}, []
+    for parte in partes:
+        dados = np.load(parte)
+        base = len(nodeids)
+        nodeids += list(dados['nodeids'])
+        testes += zip(*(dados[c] for c in COLUNAS_TESTE))
+        indice = [sites.setdefault(s, len(sites)) for s in dados['sites']]
+        sitios += [(base + t, indice[s], b, n) for t, s, b, n in
+                   zip(*(dados[c] for c in COLUNAS_SITIO))]
+    salvar(caminho, nodeids, testes, list(sites), sitios)
+    return nodeids, testes
+
+def pytest_addoption(parser):
+    parser.addoption('--memoria', metavar='ARQUIVO',
+                     help='Perfil de memória por teste (.npz) com tracemalloc')
+    parser.addoption('--memoria-top', type=int, default=TOP_PADRAO, metavar='N',
+                     help=f'Sítios de alocação guardados por teste (padrão: {TOP_PADRAO})')
+    parser.addoption('--memoria-frames', type=int, default=FRAMES_PADRAO, metavar='N',
+                     help='Frames por rastro do tracemalloc (mais frames, mais custo)')
+
+def _escrever_resumo(terminalreporter, nodeids, testes, caminho):
+    if not nodeids:
+        return
+    picos = [t[0] for t in testes]
+    k = int(np.argmax(picos))
+    terminalreporter.write_line(
+        f"Memória (tracemalloc): {len(nodeids)} testes, pico máximo "
+        f"{picos[k] / 1024 ** 2:.1f} MB ({nodeids[k]}) → {caminho}")
+
+class Memoria:
+    """Snapshots por teste e tabelas colunares"""
+
+    def __init__(self, caminho, top, frames, raiz=''):
+        self.caminho, self.top, self.frames = caminho, top, frames
+        self.raiz = raiz   # Prefixo tirado dos sítios (caminhos iguais entre hosts)
+        self.nodeids, self.testes, self.sitios = [], [], []
+        self.sites = {}
+        self.codigo = self.snapshot = None
+        self.externo = tracemalloc.is_tracing()   # Ligado por outro (-X tracemalloc)
+
+    def _chamada(self, frame, event, arg):
+        """Rastreador global: só o frame da função de teste recebe o local"""
+        if frame.f_code is self.codigo:
+            frame.f_trace_lines = False
+            return self._retorno
+        return None
+
+    def _retorno(self, frame, event, arg):
+        if event == 'return' and self.snapshot is None:
+            self.snapshot = tracemalloc.take_snapshot()
+        return self._retorno
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        self.snapshot = None
+        self.codigo = getattr(getattr(item, 'function', None), '__code__', None)
+        rastreia = self.codigo is not None and sys.gettrace() is None
+        if self.externo:
+            tracemalloc.clear_traces()
+        else:
+            tracemalloc.start(self.frames)
+        tracemalloc.reset_peak()
+        if rastreia:
+            sys.settrace(self._chamada)
+        try:
+            yield
+        finally:
+            if rastreia:
+                sys.settrace(None)
+            pico = tracemalloc.get_traced_memory()[1]
+            snapshot, self.snapshot = self.snapshot or tracemalloc.take_snapshot(), None
+            if not self.externo:
+                tracemalloc.stop()
+            self._registrar(item.nodeid, pico, snapshot)
+
+    def _registrar(self, nodeid, pico, snapshot):
+        estatisticas = [s for s in snapshot.statistics('lineno')
+                        if not any(fnmatch(s.traceback[0].filename, p) for p in IGNORADOS)]
+        teste = len(self.nodeids)
+        self.nodeids.append(nodeid)
+        self.testes.append((pico, sum(s.size for s in estatisticas),
+                            sum(s.count for s in estatisticas)))
+        for s in estatisticas[:self.top]:
+            quadro = s.traceback[0]
+            arquivo = quadro.filename
+            if self.raiz and arquivo.startswith(self.raiz):
+                arquivo = arquivo[len(self.raiz):]
+            site = self.sites.setdefault(f'{arquivo}:{quadro.lineno}', len(self.sites))
+            self.sitios.append((teste, site, s.size, s.count))
+
+    def pytest_sessionfinish(self, session):
+        salvar(self.caminho, self.nodeids, self.testes, list(self.sites), self.sitios)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        _escrever_resumo(terminalreporter, self.nodeids, self.testes, self.caminho)
+
+class MemoriaControlador:
+    """Controlador do xdist: junta os arquivos dos workers ao fim da sessão"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.nodeids, self.testes = [], []
+
+    def pytest_sessionfinish(self, session):
+        raiz, ext = os.path.splitext(self.caminho)
+        partes = sorted(glob.glob(f'{glob.escape(raiz)}-gw*{ext}'))
+        if partes:
+            self.nodeids, self.testes = juntar(partes, self.caminho)
+            for parte in partes:
+                os.remove(parte)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        _escrever_resumo(terminalreporter, self.nodeids, self.testes, self.caminho)
+
+def pytest_configure(config):
+    caminho = config.getoption('memoria')
+    if not caminho:
+        return
+    if hasattr(config, 'workerinput'):
+        raiz, ext = os.path.splitext(caminho)
+        caminho = f"{raiz}-{config.workerinput['workerid']}{ext}"
+    elif config.getoption('numprocesses', None):
+        config.pluginmanager.register(MemoriaControlador(caminho), 'memoria_controlador')
+        return   # Os testes rodam nos workers
+    memoria = Memoria(caminho, config.getoption('memoria_top'), config.getoption('memoria_frames'),
+                      raiz=str(config.rootpath) + os.sep)
+    config.pluginmanager.register(memoria, 'memoria')
@@ -0,0 +1,87 @@
+"""
+Plugin pytest: aplica a seleção com orçamento de energia do
+energy_budget.py e registra os testes pulados.
+
+    # CI antes do merge: só os selecionados; os pulados vão para os pendentes
+    python -m pytest -p scripts.pytest_orcamento --orcamento=data/selecao_orcamento.json \
+        --pendentes=data/pendentes_noturno.json src/test_app.py
+    # Execução completa (noturna): tira dos pendentes o que rodou
+    python -m pytest -p scripts.pytest_orcamento --pendentes=data/pendentes_noturno.json src/test_app.py
+
+Só os testes listados em `pulados` são desmarcados: testes que não
+existiam quando a seleção foi feita rodam normalmente. Os pendentes são
+{nodeid: vezes que foi pulado desde a última execução}.
+"""
+
+import json
+import os
+
+def _carregar(caminho, padrao):
+    if not os.path.exists(caminho):
+        return padrao
+    with open(caminho, 'r') as f:
+        return json.load(f)
+
+def _salvar(dados, caminho):
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    tmp = f'{caminho}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(dados, f, indent=1)
+    os.replace(tmp, caminho)
+
+def pytest_addoption(parser):
+    parser.addoption('--orcamento', metavar='ARQUIVO',
+                     help='Seleção do energy_budget.py: desmarca os testes pulados')
+    parser.addoption('--pendentes', metavar='ARQUIVO',
+                     help='Testes pulados aguardando a execução completa')
+
+class Orcamento:
+    """Desmarca os pulados e mantém o arquivo de pendentes"""
+
+    def __init__(self, selecao, pendentes):
+        self.pulados = set(_carregar(selecao, {}).get('pulados', [])) if selecao else set()
+        self.caminho_pendentes = pendentes
+        self.desmarcados, self.executados = [], set()
+        self.coletou = False
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        self.coletou = True
+        if not self.pulados:
+            return
+        manter = [i for i in items if i.nodeid not in self.pulados]
+        self.desmarcados = [i.nodeid for i in items if i.nodeid in self.pulados]
+        if self.desmarcados:
+            config.hook.pytest_deselected(items=[i for i in items if i.nodeid in self.pulados])
+            items[:] = manter
+
+    def pytest_runtest_logreport(self, report):
+        if report.when == 'call' and report.passed:
+            self.executados.add(report.nodeid)
+
+    def pytest_sessionfinish(self, session):
+        if not self.caminho_pendentes:
+            return
+        if not self.coletou:   # Controlador do xdist: a coleta foi nos workers
+            self.desmarcados = sorted(self.pulados - self.executados)
+        pendentes = _carregar(self.caminho_pendentes, {})
+        for nodeid in self.executados:
+            pendentes.pop(nodeid, None)
+        for nodeid in self.desmarcados:
+            pendentes[nodeid] = pendentes.get(nodeid, 0) + 1
+        _salvar(pendentes, self.caminho_pendentes)
+        self.n_pendentes = len(pendentes)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.pulados and not self.caminho_pendentes:
+            return
+        linha = f"Orçamento de energia: {len(self.desmarcados)} testes pulados"
+        if self.caminho_pendentes:
+            linha += f"; {self.n_pendentes} pendentes para a execução completa"
+        terminalreporter.write_line(linha)
+
+def pytest_configure(config):
+    selecao, pendentes = config.getoption('orcamento'), config.getoption('pendentes')
+    if hasattr(config, 'workerinput'):
+        pendentes = None   # Workers do xdist só desmarcam; o controlador registra
+    if selecao or pendentes:
+        config.pluginmanager.register(Orcamento(selecao, pendentes), 'orcamento')
@@ -0,0 +1,156 @@
+"""
+Plugin pytest: ordena a suíte por probabilidade de falha / custo, para
+que as falhas prováveis rodem primeiro e `-x` interrompa cedo.
+
+    python -m pytest -p scripts.pytest_priorizacao --priorizar=.prioridade.json -x src/test_app.py
+
+O arquivo guarda, por teste, execuções e falhas com decaimento
+exponencial (o passado recente pesa mais) e a média móvel da duração, e
+é atualizado ao fim de cada sessão. A probabilidade de falha usa
+suavização de Laplace, (falhas + 1) / (execuções + 2): um teste novo tem
+p = 0,5 e vai para o início.
+
+Com falhas independentes, ordenar por p/custo decrescente minimiza o
+custo esperado até a primeira falha
+    E[T] = Σ_i c_i · Π_{j<i} (1 - p_j)
+(trocar dois vizinhos só reduz E[T] se p_i/c_i > p_j/c_j).
+
+No resumo do terminal o plugin escreve a duração da sessão e o instante
+da primeira falha, lidos por analyze_simple_metrics.py.
+
+    python scripts/pytest_priorizacao.py .prioridade.json   # E[T] pelo histórico
+"""
+
+import json
+import os
+import sys
+import time
+
+import pytest
+
+DECAIMENTO = 0.9        # Peso das execuções anteriores a cada nova sessão
+SUAVIZACAO = 0.3        # Peso da nova duração na média móvel
+CUSTO_MINIMO_S = 1e-4   # Evita razões infinitas em testes instantâneos
+
+def carregar(caminho):
+    """{nodeid: {'execucoes', 'falhas', 'duracao_s'}} (vazio se não existe)"""
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, 'r') as f:
+        return json.load(f)
+
+def salvar(historico, caminho):
+    tmp = f'{caminho}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(historico, f)
+    os.replace(tmp, caminho)
+
+def probabilidade(registro):
+    return (registro['falhas'] + 1) / (registro['execucoes'] + 2)
+
+def custo_padrao(historico):
+    """Custo de um teste sem histórico: mediana das durações conhecidas"""
+    duracoes = sorted(r['duracao_s'] for r in historico.values())
+    return duracoes[len(duracoes) // 2] if duracoes else CUSTO_MINIMO_S
+
+def prioridades(historico, nodeids):
+    """(p, custo, p/custo) de cada nodeid"""
+    padrao = custo_padrao(historico)
+    vazio = {'execucoes': 0, 'falhas': 0, 'duracao_s': padrao}
+    resultado = []
+    for nodeid in nodeids:
+        registro = historico.get(nodeid, vazio)
+        p, custo = probabilidade(registro), max(registro['duracao_s'], CUSTO_MINIMO_S)
+        resultado.append((p, custo, p / custo))
+    return resultado
+
+def tempo_esperado_primeira_falha(p, custos):
+    """E[T] até a primeira falha (ou o fim da suíte) executando na ordem dada"""
+    esperado, sobrevive = 0.0, 1.0
+    for p_i, c_i in zip(p, custos):
+        esperado += sobrevive * c_i
+        sobrevive *= 1 - p_i
+    return esperado
+
+def atualizar(historico, resultados):
+    """Incorpora {nodeid: (falhou, duracao_s)} de uma sessão"""
+    for nodeid, (falhou, duracao) in resultados.items():
+        registro = historico.get(nodeid)
+        if registro is None:
+            historico[nodeid] = {'execucoes': 1, 'falhas': int(falhou), 'duracao_s': duracao}
+            continue
+        registro['execucoes'] = registro['execucoes'] * DECAIMENTO + 1
+        registro['falhas'] = registro['falhas'] * DECAIMENTO + falhou
+        registro['duracao_s'] += SUAVIZACAO * (duracao - registro['duracao_s'])
+    return historico
+
+def pytest_addoption(parser):
+    parser.addoption('--priorizar', metavar='ARQUIVO',
+                     help='Histórico JSON de falhas e durações; ordena por p(falha)/custo')
+
+class Priorizacao:
+    """Estado de uma sessão: histórico, resultados e instante da primeira falha"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.historico = carregar(caminho)
+        self.resultados = {}
+        self.inicio = self.fim = None
+        self.primeira_falha = None
+
+    def pytest_sessionstart(self, session):
+        self.inicio = time.perf_counter()
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, session, config, items):
+        """Depois de seleções como a do testmon: ordena só o que vai rodar"""
+        razoes = [r for _, _, r in prioridades(self.historico, [i.nodeid for i in items])]
+        ordem = sorted(range(len(items)), key=lambda k: -razoes[k])
+        items[:] = [items[k] for k in ordem]
+
+    def pytest_runtest_logreport(self, report):
+        """Uma falha em setup, call ou teardown conta como falha do teste"""
+        falhou, duracao = self.resultados.get(report.nodeid, (False, 0.0))
+        self.resultados[report.nodeid] = (falhou or report.failed, duracao + report.duration)
+        if report.failed and self.primeira_falha is None:
+            self.primeira_falha = (time.perf_counter() - self.inicio, report.nodeid,
+                                   len(self.resultados))
+
+    def pytest_sessionfinish(self, session):
+        self.fim = time.perf_counter()
+        salvar(atualizar(self.historico, self.resultados), self.caminho)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        terminalreporter.write_line(
+            f"Priorização: {len(self.resultados)} testes por p(falha)/custo")
+        terminalreporter.write_line(f"Sessão de testes: {self.fim - self.inicio:.3f}s")
+        if self.primeira_falha is not None:
+            t, nodeid, k = self.primeira_falha
+            terminalreporter.write_line(f"Primeira falha: {t:.3f}s (teste {k}: {nodeid})")
+
+def pytest_configure(config):
+    caminho = config.getoption('priorizar')
+    # Workers do xdist não reordenam (as coletas precisam coincidir)
+    if caminho and not hasattr(config, 'workerinput'):
+        config.pluginmanager.register(Priorizacao(caminho), 'priorizacao')
+
+def main():
+    caminho = sys.argv[1] if len(sys.argv) > 1 else '.prioridade.json'
+    historico = carregar(caminho)
+    if not historico:
+        print(f"❌ Histórico vazio: {caminho}")
+        return
+    nodeids = list(historico)   # Ordem de inserção ≈ ordem de coleta
+    p, custos, razoes = zip(*prioridades(historico, nodeids))
+    ordem = sorted(range(len(nodeids)), key=lambda k: -razoes[k])
+    coleta = tempo_esperado_primeira_falha(p, custos)
+    priorizada = tempo_esperado_primeira_falha([p[k] for k in ordem], [custos[k] for k in ordem])
+    print(f"📋 {len(nodeids)} testes; custo total {sum(custos):.3f}s")
+    print(f"   E[tempo até a 1ª falha], ordem de coleta: {coleta:.3f}s")
+    print(f"   E[tempo até a 1ª falha], p/custo:         {priorizada:.3f}s")
+    print("\n🔝 Primeiros da ordem priorizada:")
+    for k in ordem[:10]:
+        print(f"   {p[k]:.3f} / {custos[k] * 1000:8.2f}ms  {nodeids[k]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Plugin pytest: executa os testes independentes num pool de threads do
+próprio processo, sem os interpretadores extras do pytest-xdist.
+
+    python -m pytest -p scripts.pytest_threads --threads=auto src/test_app.py -v
+    python3.13t -X gil=0 -m pytest -p scripts.pytest_threads --threads=auto src/test_app.py -v
+
+No CPython free-threaded (3.13t+) as threads rodam em paralelo de fato;
+com GIL só se sobrepõem as esperas (io_simulation, sleeps, E/S). Cada
+processo do xdist paga interpretador, import do pytest e coleta; aqui a
+coleta é uma só e a memória é compartilhada.
+
+Antes do laço normal do pytest, o corpo dos testes elegíveis roda no
+pool e o resultado (retorno ou exceção, duração e CPU da thread) fica
+guardado; depois o laço normal faz setup, relatório e teardown de cada
+teste na thread principal e repete o resultado guardado no lugar da
+chamada. Assim relatórios, captura e os demais plugins não precisam ser
+thread-safe. Só é elegível um teste sem fixtures (argumentos apenas de
+parametrize), sem marcas skip/skipif/xfail e sem a marca `serial`:
+
+    @pytest.mark.serial
+    def test_usa_recurso_global(): ...
+
+Os demais rodam em sequência, depois do pool. Saídas impressas pelos
+testes do pool não entram nas seções capturadas do relatório; com `-x`
+o pool já terá executado todos os elegíveis e só o relatório é
+interrompido. Não combina com --testmon (o rastreamento por teste
+acontece na chamada) nem com -n (desativado nos processos do xdist).
+"""
+
+import inspect
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+MARCAS_SEQUENCIAIS = ('serial', 'skip', 'skipif', 'xfail')
+
+def gil_ativo():
+    """False só em build free-threaded com o GIL desligado"""
+    verificar = getattr(sys, '_is_gil_enabled', None)
+    return True if verificar is None else verificar()
+
+def elegivel(item):
+    """O teste pode rodar no pool? (sem fixtures, marcas ou corrotinas)"""
+    if not isinstance(item, pytest.Function) or inspect.iscoroutinefunction(item.obj):
+        return False
+    if any(item.get_closest_marker(m) for m in MARCAS_SEQUENCIAIS):
+        return False
+    params = item.callspec.params if hasattr(item, 'callspec') else {}
+    return set(item.fixturenames) <= set(params)
+
+def _executar(item):
+    """(exceção ou None, duração, CPU da thread) do corpo do teste"""
+    params = item.callspec.params if hasattr(item, 'callspec') else {}
+    argumentos = {nome: params[nome] for nome in item._fixtureinfo.argnames}
+    inicio, cpu = time.perf_counter(), time.thread_time()
+    try:
+        item.obj(**argumentos)
+        excecao = None
+    except BaseException as e:   # Skip/fail do pytest também são repetidos
+        excecao = e
+    return excecao, time.perf_counter() - inicio, time.thread_time() - cpu
+
+def pytest_addoption(parser):
+    parser.addoption('--threads', metavar='N',
+                     help="Executa os testes independentes em N threads ('auto': nº de núcleos)")
+
+class PoolThreads:
+    """Pré-execução dos elegíveis no pool e repetição dos resultados"""
+
+    def __init__(self, threads):
+        self.threads = threads
+        self.resultados = {}
+        self.no_pool = self.sequenciais = 0
+        self.tempo_pool = 0.0
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtestloop(self, session):
+        config = session.config
+        if not config.option.collectonly and not config.pluginmanager.has_plugin('dsession'):
+            itens = [i for i in session.items if elegivel(i)]
+            self.no_pool, self.sequenciais = len(itens), len(session.items) - len(itens)
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.threads) as pool:
+                for item, resultado in zip(itens, pool.map(_executar, itens)):
+                    self.resultados[item.nodeid] = resultado
+            self.tempo_pool = time.perf_counter() - inicio
+        yield
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_pyfunc_call(self, pyfuncitem):
+        resultado = self.resultados.get(pyfuncitem.nodeid)
+        if resultado is None:
+            return None   # Sequencial: chamada normal
+        excecao = resultado[0]
+        if excecao is not None:
+            raise excecao
+        return True
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        """Duração (e CPU do pytest_historico) medidas no pool, não na repetição"""
+        resultado = self.resultados.pop(item.nodeid, None) if call.when == 'call' else None
+        if resultado is not None:
+            _, call.duration, cpu = resultado
+            if getattr(item.config, '_historico_cpu', None) is not None:
+                item.config._historico_cpu[item.nodeid] = cpu
+        yield
+
+    def pytest_terminal_summary(self, terminalreporter):
+        gil = 'ativo' if gil_ativo() else 'desativado'
+        terminalreporter.write_line(
+            f"Threads: {self.threads} (GIL {gil}); {self.no_pool} testes no pool em "
+            f"{self.tempo_pool:.3f}s, {self.sequenciais} sequenciais")
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'serial: não executar no pool de threads (pytest_threads)')
+    threads = config.getoption('threads')
+    if not threads or hasattr(config, 'workerinput'):
+        return
+    if threads == 'auto':   # Núcleos da afinidade (--cpus do backend local), senão todos
+        threads = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') \
+            else os.cpu_count() or 1
+    else:
+        threads = int(threads)
+    config.pluginmanager.register(PoolThreads(threads), 'pool_threads')
@@ -1,17 +1,13 @@
-import os
-import time
+import asyncio
+
+from idle_monitor import MonitorOcioso
+from orchestrator import GitHubBackend, WORKFLOWS, executar_experimento
 
 # ========================================
 # CONFIGURAÇÃO PARA TESTE RÁPIDO (10 MIN)
 # ========================================
-REPETICOES = 3  # Reduzido de 10 para 3
-COOLDOWN = 20   # Reduzido de 60s para 20s
-
-WORKFLOWS = [
-    "baseline.yml",
-    "parallel.yml",
-    "tia.yml"
-]
+REPETICOES = 3     # Reduzido de 10 para 3
+MAX_COOLDOWN = 20  # Teto da espera pela ociosidade (s)
 
 print("="*60)
 print("🧪 TESTE RÁPIDO - Engenharia de Software Verde")
@@ -20,20 +16,16 @@ print(f"⚙️  {REPETICOES} repetições × {len(WORKFLOWS)} workflows = {REPET
 print(f"⏱️  Tempo estimado: ~10 minutos")
 print("="*60)
 
-for i in range(1, REPETICOES + 1):
-    print(f"\n{'='*60}")
-    print(f"🔄 RODADA {i} de {REPETICOES}")
-    print(f"{'='*60}")
-    
-    for wf in WORKFLOWS:
-        print(f"   ▶️  Disparando: {wf}")
-        os.system(f"gh workflow run {wf}")
-        
-        print(f"   ⏳ Aguardando {COOLDOWN}s...")
-        time.sleep(COOLDOWN)
+async def _rodar():
+    monitor = MonitorOcioso()
+    await monitor.calibrar(10)
+    return await executar_experimento(GitHubBackend(), list(WORKFLOWS), REPETICOES,
+                                      monitor, MAX_COOLDOWN)
+
+asyncio.run(_rodar())
 
 print("\n" + "="*60)
 print("✅ Experimento Concluído!")
 print("="*60)
 print("📍 Verifique a aba Actions no GitHub")
-print("📊 Aguarde as execuções finalizarem e baixe os artifacts")
\ No newline at end of file
+print("📊 Baixe os artifacts: python3 scripts/download_simple.py")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Teste sequencial em grupo para encerrar o experimento assim que as
+hipóteses estiverem decididas.
+
+Após cada rodada, os p-values de analyze_simple_metrics.teste_hipoteses
+são convertidos em estatísticas z e comparados com fronteiras de
+Lan-DeMets (gasto de erro tipo O'Brien-Fleming): a de eficácia controla
+o erro tipo I (alpha) e a de futilidade, não vinculante, o erro tipo II
+(beta). Na última rodada as duas fronteiras coincidem, então toda
+hipótese termina decidida.
+"""
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from analyze_simple_metrics import calcular_metricas_derivadas, parse_time_output, teste_hipoteses
+
+ALPHA = 0.05
+BETA = 0.20
+N_SIMULACOES = 200_000  # Caminhos de Monte Carlo para as fronteiras
+
+# Hipótese -> estratégias envolvidas (as duas precisam estar no experimento).
+# Só estas entram na parada, uma métrica cada; a H4 de teste_hipoteses
+# (três métricas) é descritiva e fica de fora.
+HIPOTESES = {
+    'H1': ('baseline', 'tia'),
+    'H2': ('baseline', 'parallel'),
+}
+
+REJEITA = 'rejeita H0'
+FUTIL = 'não rejeita H0'
+ABERTA = 'em aberto'
+
+def gasto_obf(t, erro):
+    """Função de gasto tipo O'Brien-Fleming: erro acumulado até a fração t"""
+    t = np.clip(np.asarray(t, dtype=float), 1e-12, 1.0)
+    return 2 - 2 * norm.cdf(norm.isf(erro / 2) / np.sqrt(t))
+
+def fronteiras(fracoes, alpha=ALPHA, beta=BETA, n_sim=N_SIMULACOES, seed=0):
+    """
+    Fronteiras (eficácia, futilidade) em escala z para as frações de
+    informação observadas, por simulação do movimento browniano.
+
+    As colunas são sorteadas uma a uma com a mesma semente, então as
+    fronteiras das análises anteriores não mudam quando uma nova entra.
+    """
+    t = np.asarray(fracoes, dtype=float)
+    k = len(t)
+    rng = np.random.default_rng(seed)
+    dt = np.diff(np.concatenate([[0.0], t]))
+    w = np.cumsum(np.column_stack([rng.standard_normal(n_sim) * np.sqrt(d) for d in dt]), axis=1)
+
+    drift = norm.isf(alpha) + norm.isf(beta)  # Deriva sob H1 com informação total
+    z0 = w / np.sqrt(t)
+    z1 = (w + drift * t) / np.sqrt(t)
+    gasto_a = np.diff(np.concatenate([[0.0], gasto_obf(t, alpha)]))
+    gasto_b = np.diff(np.concatenate([[0.0], gasto_obf(t, beta)]))
+
+    eficacia = np.full(k, np.inf)
+    futilidade = np.full(k, -np.inf)
+    vivos0 = np.ones(n_sim, dtype=bool)
+    vivos1 = np.ones(n_sim, dtype=bool)
+    for j in range(k):
+        # Eficácia: fração de caminhos H0 que cruzam pela primeira vez = gasto de alpha
+        m = int(round(gasto_a[j] * n_sim))
+        candidatos = z0[vivos0, j]
+        if 0 < m <= len(candidatos):
+            eficacia[j] = np.partition(candidatos, len(candidatos) - m)[len(candidatos) - m]
+        vivos0 &= z0[:, j] < eficacia[j]
+
+        # Futilidade: fração de caminhos H1 que param por futilidade = gasto de beta
+        m = int(round(gasto_b[j] * n_sim))
+        candidatos = z1[vivos1, j]
+        if 0 < m <= len(candidatos):
+            futilidade[j] = np.partition(candidatos, m - 1)[m - 1]
+        futilidade[j] = min(futilidade[j], eficacia[j])
+        vivos1 &= (z1[:, j] > futilidade[j]) & (z1[:, j] < eficacia[j])
+
+    if t[-1] >= 1:
+        futilidade[-1] = eficacia[-1]
+    return eficacia, futilidade
+
+def p_para_z(p_value, alternative):
+    """Estatística z equivalente ao p-value (|z| para testes bilaterais)"""
+    p = min(max(p_value, 1e-300), 1.0)
+    return norm.isf(p / 2) if alternative == 'two-sided' else norm.isf(p)
+
+class MonitorSequencial:
+    """Acompanha as análises interinas de cada hipótese até a decisão"""
+
+    def __init__(self, n_max, alpha=ALPHA, beta=BETA):
+        self.n_max = n_max
+        self.alpha = alpha
+        self.beta = beta
+        self.fracoes = {}
+        self.decisoes = {}
+
+    def avaliar(self, testes):
+        """
+        Atualiza as decisões com os testes da rodada (saída de teste_hipoteses)
+        das hipóteses de HIPOTESES; as demais são ignoradas.
+        Retorna {hipotese: {'decisao', 'z', 'eficacia', 'futilidade', 't'}}.
+        """
+        for teste in testes:
+            h = teste['hipotese']
+            if h not in HIPOTESES:
+                continue  # Sem fronteira própria (ex.: H4, várias métricas na mesma chave)
+            if self.decisoes.get(h, {}).get('decisao') in (REJEITA, FUTIL):
+                continue  # Decisões são definitivas
+            t = min(teste['n'] / self.n_max, 1.0)
+            fracoes = self.fracoes.setdefault(h, [])
+            if fracoes and t <= fracoes[-1]:
+                continue  # Sem informação nova
+            fracoes.append(t)
+
+            # Bilateral: metade de alpha em cada cauda
+            alpha = self.alpha / 2 if teste['alternative'] == 'two-sided' else self.alpha
+            eficacia, futilidade = fronteiras(fracoes, alpha, self.beta)
+            z = p_para_z(teste['p_value'], teste['alternative'])
+            if z >= eficacia[-1]:
+                decisao = REJEITA
+            elif z <= futilidade[-1]:
+                decisao = FUTIL
+            else:
+                decisao = ABERTA
+            self.decisoes[h] = {'decisao': decisao, 'z': z, 't': t,
+                                'eficacia': eficacia[-1], 'futilidade': futilidade[-1]}
+        return self.decisoes
+
+def carregar_execucoes(resultados):
+    """DataFrame com as execuções bem-sucedidas deste experimento"""
+    caminhos = [r['metrics'] for r in resultados
+                if r.get('conclusion') == 'success' and r.get('metrics')]
+    df = pd.DataFrame([parse_time_output(c) for c in caminhos])
+    if df.empty:
+        return df
+    return calcular_metricas_derivadas(df)
+
+def criar_parada_sequencial(estrategias, n_max, alpha=ALPHA, beta=BETA):
+    """
+    Callback para o orquestrador: recebe os resultados acumulados ao fim
+    de cada rodada e retorna True quando todas as hipóteses aplicáveis
+    estiverem decididas.
+    """
+    monitor = MonitorSequencial(n_max, alpha, beta)
+    hipoteses = [h for h, (a, b) in HIPOTESES.items() if a in estrategias and b in estrategias]
+
+    def parar(resultados):
+        df = carregar_execucoes(resultados)
+        if df.empty:
+            return False
+        with contextlib.redirect_stdout(io.StringIO()):
+            testes = teste_hipoteses(df)
+        decisoes = monitor.avaliar(testes)
+
+        print("\n🧮 Análise interina (sequencial em grupo):")
+        for h in hipoteses:
+            d = decisoes.get(h)
+            if d is None:
+                print(f"   {h}: dados insuficientes")
+            else:
+                print(f"   {h}: z={d['z']:.2f} (futilidade ≤ {d['futilidade']:.2f}, "
+                      f"eficácia ≥ {d['eficacia']:.2f}, t={d['t']:.2f}) → {d['decisao']}")
+        return bool(hipoteses) and all(
+            decisoes.get(h, {}).get('decisao') in (REJEITA, FUTIL) for h in hipoteses)
+
+    return parar
+
+if __name__ == "__main__":
+    print("📐 Fronteiras para 10 análises igualmente espaçadas "
+          f"(alpha={ALPHA}, beta={BETA}, unilateral):")
+    t = np.arange(1, 11) / 10
+    eficacia, futilidade = fronteiras(t)
+    for ti, e, f in zip(t, eficacia, futilidade):
+        print(f"   t={ti:.1f}  futilidade ≤ {f:6.2f}  eficácia ≥ {e:6.2f}")
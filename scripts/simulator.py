@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Simulador offline de eventos discretos das estratégias de teste.
+
+Repete custos por teste registrados (history_store.py, ou a duração alvo
+de uma suíte sintética) e o modelo de potência do host (power_model.py)
+sobre um modelo de cada estratégia, sem rodar a CI:
+
+  sequencial: P0 + c·n + Σ (duração + e)
+  xdist:      P0 + k·(w0 + c·n) + makespan do escalonamento de (duração + e)
+              em N workers (cada worker importa e coleta a suíte inteira;
+              k = N/núcleos quando há mais workers que núcleos)
+  TIA:        P0 + T + c·n + Σ (duração + e) dos testes selecionados
+  TIA+xdist:  T + o modelo xdist só sobre os selecionados (os workers
+              ainda coletam os n testes)
+
+com n testes coletados, c a coleta por teste, e o custo fixo de executar
+e reportar um teste, w0 a partida de um worker e T a leitura da base do
+testmon.
+
+O escalonamento é uma simulação de eventos: cada unidade (teste, ou
+módulo inteiro em `loadfile`) vai para o worker que fica livre primeiro
+(heap de N instantes de término). `load` segue a ordem de coleta como o
+xdist; `lpt` ordena do mais longo para o mais curto (o que um escalonador
+com histórico faria). Com mais workers que núcleos o makespan não fica
+abaixo de Σ duração / núcleos.
+
+Saídas por configuração: makespan, CPU-segundos (inclui a partida e a
+coleta de cada worker), energia pelo modelo do host (ociosa × makespan +
+CPU × potência por core) e EDP. As sobrecargas P0, c, e, w0 e T são
+ajustadas por mínimos quadrados não negativos em execuções reais
+(`validar`), com validação em execuções separadas das usadas no ajuste.
+"""
+
+import argparse
+import glob
+import heapq
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import nnls
+
+from power_model import energia_execucoes
+
+SIMULACAO_PATH = 'data/simulacao.csv'
+RESULTADOS_PATH = 'data/resultados_simple.csv'
+RAW_DIR = 'data/raw'
+ESTRATEGIAS_MODELADAS = ('baseline', 'parallel', 'tia')   # Com linha em _caracteristicas
+SOBRECARGAS_PATH = 'data/sobrecargas_simulador.json'
+POLITICAS = ['load', 'loadfile', 'lpt']
+WORKERS = (1, 2, 4, 8, 16, 32)
+SELECOES = (0.05, 0.1, 0.3)
+
+# Sobrecargas padrão (s), substituídas pelas ajustadas em SOBRECARGAS_PATH
+SOBRECARGAS = {
+    'partida_s': 0.3,             # P0: interpretador + pytest + plugins
+    'coleta_por_teste_s': 8e-4,   # c: importar e coletar um teste
+    'execucao_por_teste_s': 2e-3, # e: fixtures, hooks e relatório de um teste
+    'partida_worker_s': 0.8,      # w0: processo do worker do xdist
+    'tia_base_s': 0.1,            # T: leitura da base do testmon
+}
+
+class Custos:
+    """Custo por teste na ordem de coleta: duração, CPU e módulo (arquivo)"""
+
+    def __init__(self, nodeids, duracao, cpu=None):
+        self.nodeids = np.asarray(nodeids, dtype=object)
+        self.duracao = np.asarray(duracao, dtype=float)
+        cpu = self.duracao if cpu is None else np.asarray(cpu, dtype=float)
+        self.cpu = np.where(np.isnan(cpu), self.duracao, cpu)
+        self.modulos = pd.factorize(pd.Series(self.nodeids).str.split('::').str[0])[0]
+
+    def __len__(self):
+        return len(self.duracao)
+
+    def subconjunto(self, indices):
+        return Custos(self.nodeids[indices], self.duracao[indices], self.cpu[indices])
+
+def custos_historico(host=None, caminho=None):
+    """Mediana de duração e CPU por teste do history_store"""
+    from history_store import HISTORICO_PATH, HistoricoTestes
+    historico = HistoricoTestes.carregar(caminho or HISTORICO_PATH)
+    duracao = historico.tabela('duracao_s')
+    cpu = historico.tabela('cpu_s')
+    if host is not None:
+        duracao, cpu = duracao[duracao['host'] == host], cpu[cpu['host'] == host]
+    duracao = duracao.groupby('nodeid', sort=True)['p50'].median()
+    cpu = cpu.groupby('nodeid')['p50'].median().reindex(duracao.index)
+    return Custos(duracao.index, duracao.to_numpy(), cpu.to_numpy())
+
+def custos_suite(suite):
+    """Durações alvo de uma suíte do generate_suite.py (I/O não usa CPU)"""
+    from generate_suite import nome_modulo
+    manifesto = json.loads((Path(suite) / 'suite.json').read_text())
+    testes = manifesto['testes']
+    nodeids, contagem = [], {}
+    for t in testes:
+        k = contagem[t['modulo']] = contagem.get(t['modulo'], -1) + 1
+        nodeids.append(f"tests/test_{nome_modulo(t['modulo'])}.py::test_{t['modulo']:04d}_{k:03d}")
+    duracao = np.array([t['duracao_alvo_s'] for t in testes])
+    cpu = np.where(np.array([t['tipo'] for t in testes]) == 'io', 0.0, duracao)
+    return Custos(nodeids, duracao, cpu)
+
+def carregar_sobrecargas(caminho=SOBRECARGAS_PATH):
+    if os.path.exists(caminho):
+        with open(caminho, 'r') as f:
+            return {**SOBRECARGAS, **json.load(f)}
+    return dict(SOBRECARGAS)
+
+def escalonar(duracoes, n_workers, inicio=0.0):
+    """Makespan do escalonamento guloso (próximo worker livre) na ordem dada"""
+    if n_workers <= 1 or len(duracoes) == 0:
+        return inicio + float(np.sum(duracoes))
+    if n_workers >= len(duracoes):
+        return inicio + float(np.max(duracoes))
+    livres = [inicio] * n_workers
+    for d in duracoes.tolist():
+        heapq.heapreplace(livres, livres[0] + d)
+    return max(livres)
+
+def unidades(custos, politica):
+    """Unidades de despacho na ordem em que o escalonador as entrega"""
+    if politica == 'loadfile':
+        return np.bincount(custos.modulos, weights=custos.duracao)
+    if politica == 'lpt':
+        return np.sort(custos.duracao)[::-1]
+    return custos.duracao
+
+def simular(custos, estrategia, workers=1, politica='load', selecao=None,
+            sobrecargas=None, nucleos=None, rng=None, coletados=None):
+    """
+    Uma configuração: {'makespan_s', 'cpu_s', 'testes'}. `selecao` (TIA):
+    fração dos testes ou array de índices selecionados. `coletados`: testes
+    coletados por processo, se diferente dos executados.
+    """
+    s = sobrecargas or SOBRECARGAS
+    nucleos = nucleos or os.cpu_count() or 1
+    n = len(custos)
+    coleta = s['coleta_por_teste_s'] * (coletados or n)
+    e = s['execucao_por_teste_s']
+
+    if estrategia in ('tia', 'tia_parallel'):
+        if selecao is not None and np.ndim(selecao) == 0:
+            rng = rng or np.random.default_rng(0)
+            selecao = rng.choice(n, size=int(round(float(selecao) * n)), replace=False)
+        escolhidos = custos.subconjunto(np.sort(selecao)) if selecao is not None else custos
+        if estrategia == 'tia_parallel' and workers > 1:
+            resultado = simular(escolhidos, 'parallel', workers, politica, None, s, nucleos,
+                                coletados=coletados or n)
+            resultado['makespan_s'] += s['tia_base_s']
+            resultado['cpu_s'] += s['tia_base_s']
+            return resultado
+        fixo = s['partida_s'] + s['tia_base_s'] + coleta + e * len(escolhidos)
+        return {'makespan_s': fixo + escolhidos.duracao.sum(),
+                'cpu_s': fixo + escolhidos.cpu.sum(), 'testes': len(escolhidos)}
+
+    if estrategia == 'baseline':
+        fixo = s['partida_s'] + coleta + e * n
+        return {'makespan_s': fixo + custos.duracao.sum(),
+                'cpu_s': fixo + custos.cpu.sum(), 'testes': n}
+
+    k = workers / min(workers, nucleos)   # Partidas que disputam o mesmo núcleo
+    partida = s['partida_worker_s'] + coleta
+    fila = unidades(custos, politica)
+    fila = fila + e * (np.bincount(custos.modulos) if politica == 'loadfile' else 1)
+    makespan = max(escalonar(fila, workers), (custos.cpu.sum() + e * n) / nucleos)
+    return {'makespan_s': s['partida_s'] + k * partida + makespan,
+            'cpu_s': s['partida_s'] + workers * partida + custos.cpu.sum() + e * n,
+            'testes': n}
+
+def configuracoes(workers=WORKERS, politicas=POLITICAS, selecoes=SELECOES):
+    """Grade padrão: sequencial, xdist (workers × política), TIA e TIA+xdist (frações)"""
+    grade = [{'estrategia': 'baseline', 'workers': 1, 'politica': None, 'selecao': None}]
+    grade += [{'estrategia': 'parallel', 'workers': w, 'politica': p, 'selecao': None}
+              for w, p in itertools.product(workers, politicas)]
+    grade += [{'estrategia': 'tia', 'workers': 1, 'politica': None, 'selecao': f}
+              for f in selecoes]
+    grade += [{'estrategia': 'tia_parallel', 'workers': w, 'politica': 'load', 'selecao': f}
+              for f, w in itertools.product(selecoes, workers) if w > 1]
+    return grade
+
+def varrer(custos, grade, sobrecargas=None, nucleos=None, host='simulado', modelos=None,
+           seed=0):
+    """DataFrame com makespan, CPU, energia e EDP de cada configuração"""
+    linhas = []
+    for config in grade:
+        resultado = simular(custos, config['estrategia'], config['workers'],
+                            config['politica'] or 'load', config['selecao'], sobrecargas,
+                            nucleos, np.random.default_rng(seed))
+        linhas.append({**config, **resultado})
+    df = pd.DataFrame(linhas)
+    df['host'] = host
+    energia, _ = energia_execucoes(
+        df.rename(columns={'makespan_s': 'tempo_s', 'cpu_s': 'cpu_total_s'}), modelos)
+    df['energia_j'] = energia
+    df['edp'] = df['energia_j'] * df['makespan_s']
+    return df
+
+def _caracteristicas(estrategia, n, executados, workers, nucleos):
+    """Linha da regressão, na ordem de SOBRECARGAS: [P0, c, e, w0, T]"""
+    if estrategia == 'parallel':
+        k = workers / min(workers, nucleos)
+        return [1.0, k * n, n / min(workers, nucleos), k, 0.0]
+    if estrategia == 'tia':
+        return [1.0, n, executados, 0.0, 1.0]
+    return [1.0, n, n, 0.0, 0.0]
+
+def _trabalho(custos, estrategia, workers, politica, selecao, nucleos):
+    """Parte do tempo que vem dos custos dos testes (sem sobrecargas)"""
+    zero = dict.fromkeys(SOBRECARGAS, 0.0)
+    return simular(custos, estrategia, workers, politica, selecao, zero, nucleos)['makespan_s']
+
+def ajustar_sobrecargas(observacoes, nucleos):
+    """
+    Mínimos quadrados não negativos das sobrecargas a partir
+    de observações [(estrategia, custos, workers, selecao, tempo_s)].
+    """
+    X, y = [], []
+    for estrategia, custos, workers, selecao, tempo in observacoes:
+        executados = len(custos) if selecao is None else len(selecao)
+        X.append(_caracteristicas(estrategia, len(custos), executados, workers, nucleos))
+        y.append(tempo - _trabalho(custos, estrategia, workers, 'load', selecao, nucleos))
+    # Pesos 1/tempo: minimiza o erro relativo, senão as suítes grandes dominam
+    pesos = 1 / np.array([o[4] for o in observacoes])[:, None]
+    X, y = np.array(X) * pesos, np.array(y) * pesos[:, 0]
+    usados = X.any(axis=0)   # Sem execuções TIA/paralelas, mantém o padrão
+    coef = nnls(X[:, usados], y)[0]
+    ajustadas = dict(SOBRECARGAS)
+    for nome, valor in zip(np.array(list(SOBRECARGAS))[usados], coef):
+        ajustadas[nome] = float(valor)
+    return ajustadas
+
+def observacoes_escalabilidade(resultados, suites_dir):
+    """
+    Execuções do generate_suite.py bench com os custos das suítes: a
+    seleção do TIA de cada rodada são os testes afetados pelo commit.
+    """
+    from generate_suite import dependentes
+    if not os.path.exists(resultados):
+        return []
+    df = pd.read_csv(resultados)
+    df = df[df['cache_tia'].fillna('hit') != 'miss']
+    obs = []
+    for n, grupo in df.groupby('n_testes'):
+        suites = sorted(Path(suites_dir).glob(f'n{n}-s*'))
+        if not suites:
+            continue
+        custos = custos_suite(suites[0])
+        manifesto = json.loads((suites[0] / 'suite.json').read_text())
+        modulo = np.array([t['modulo'] for t in manifesto['testes']])
+        selecoes = {c['commit']: np.flatnonzero(np.isin(
+            modulo, dependentes(manifesto['dependencias'], c['alterados'])))
+            for c in manifesto['commits']}
+        for _, linha in grupo.iterrows():
+            selecao, rodada = None, linha.get('rodada')
+            if linha['estrategia'] == 'tia':
+                selecao = selecoes.get(int(rodada)) if pd.notna(rodada) else None
+                if selecao is None:
+                    continue
+            workers = 1
+            if linha['estrategia'] == 'parallel':
+                workers = int(linha.get('workers') or os.cpu_count() or 1)
+            obs.append((linha['estrategia'], custos, workers, selecao, linha['tempo_s'],
+                        linha['cpu_total_s'], n))
+    return obs
+
+def observacoes_execucoes(resultados=RESULTADOS_PATH, raw_dir=RAW_DIR, host=None):
+    """
+    Execuções reais da suíte (pipeline.py) com os custos do
+    history_store: a seleção do TIA de cada execução são os testes do
+    testes.jsonl gravado ao lado do seu metrics.txt.
+    """
+    from history_store import ler_jsonl
+    if not os.path.exists(resultados):
+        return []
+    custos = custos_historico(host)
+    if not len(custos):
+        return []
+    df = pd.read_csv(resultados, dtype={'run_id': str})
+    df = df[df['estrategia'].isin(ESTRATEGIAS_MODELADAS)]
+    if 'cache_tia' in df.columns:
+        df = df[df['cache_tia'].fillna('hit') != 'miss']
+    if 'excluido' in df.columns:
+        df = df[~df['excluido'].astype(bool)]
+    if host is not None and 'host' in df.columns:
+        df = df[df['host'] == host]
+    indices = {nodeid: i for i, nodeid in enumerate(custos.nodeids)}
+    obs = []
+    for _, linha in df.iterrows():
+        selecao = None
+        if linha['estrategia'] == 'tia':
+            arquivos = glob.glob(os.path.join(raw_dir, f"tia-{linha['run_id']}", 'testes*.jsonl'))
+            if not arquivos and linha.get('testes_executados', 0) > 0:
+                continue   # Execução anterior ao pytest_historico: seleção desconhecida
+            executados = {r[0] for a in arquivos for r in ler_jsonl(a, None)}
+            selecao = np.array(sorted(indices[n] for n in executados if n in indices), dtype=int)
+        workers = 1
+        if linha['estrategia'] == 'parallel':
+            workers = int(linha['workers']) if pd.notna(linha.get('workers')) \
+                else os.cpu_count() or 1
+        obs.append((linha['estrategia'], custos, workers, selecao, linha['tempo_s'],
+                    linha['cpu_total_s'], len(custos)))
+    return obs
+
+def validar(observacoes, nucleos=None):
+    """
+    Ajusta as sobrecargas em metade das execuções (alternadas) e mede o
+    erro relativo de makespan e CPU nas demais. Retorna (sobrecargas, erros).
+    """
+    nucleos = nucleos or os.cpu_count() or 1
+    ajuste = [o[:5] for o in observacoes[::2]]
+    sobrecargas = ajustar_sobrecargas(ajuste, nucleos)
+    linhas = []
+    for estrategia, custos, workers, selecao, tempo, cpu, n in observacoes[1::2]:
+        previsto = simular(custos, estrategia, workers, 'load', selecao, sobrecargas, nucleos)
+        linhas.append({'estrategia': estrategia, 'n_testes': n,
+                       'tempo_obs_s': tempo, 'tempo_prev_s': previsto['makespan_s'],
+                       'cpu_obs_s': cpu, 'cpu_prev_s': previsto['cpu_s']})
+    erros = pd.DataFrame(linhas)
+    erros['erro_tempo_pct'] = (erros['tempo_prev_s'] / erros['tempo_obs_s'] - 1) * 100
+    erros['erro_cpu_pct'] = (erros['cpu_prev_s'] / erros['cpu_obs_s'] - 1) * 100
+    return sobrecargas, erros
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulador offline das estratégias de teste')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    sim = sub.add_parser('simular', help='Varre configurações sobre os custos registrados')
+    fonte = sim.add_mutually_exclusive_group()
+    fonte.add_argument('--suite', help='Suíte do generate_suite.py (durações alvo)')
+    fonte.add_argument('--historico', action='store_true',
+                       help='Custos do history_store.py (padrão)')
+    sim.add_argument('--host', help='Host do histórico e do modelo de potência')
+    sim.add_argument('--workers', type=int, nargs='+', default=list(WORKERS))
+    sim.add_argument('--politicas', nargs='+', choices=POLITICAS, default=POLITICAS)
+    sim.add_argument('--selecoes', type=float, nargs='+', default=list(SELECOES),
+                     help='Frações selecionadas pelo TIA')
+    sim.add_argument('--nucleos', type=int, default=os.cpu_count())
+    val = sub.add_parser('validar', help='Ajusta as sobrecargas e compara com execuções reais')
+    val.add_argument('--fonte', choices=['escalabilidade', 'execucoes'], default='escalabilidade',
+                     help='generate_suite.py bench ou as execuções reais de data/raw')
+    val.add_argument('--resultados', help='CSV das execuções (padrão: data/escalabilidade.csv '
+                                          f'ou {RESULTADOS_PATH}, conforme a fonte)')
+    val.add_argument('--suites', default='suites')
+    val.add_argument('--host', help='Host das execuções reais e do histórico')
+    args = parser.parse_args()
+
+    if args.comando == 'validar':
+        if args.fonte == 'execucoes':
+            observacoes = observacoes_execucoes(args.resultados or RESULTADOS_PATH,
+                                                host=args.host)
+            dica = "rode as estratégias e o `pipeline.py` (histórico por teste) antes"
+        else:
+            observacoes = observacoes_escalabilidade(
+                args.resultados or 'data/escalabilidade.csv', args.suites)
+            dica = "rode `generate_suite.py bench` antes"
+        if len(observacoes) < 4:
+            print(f"❌ Execuções insuficientes: {dica}")
+            return
+        sobrecargas, erros = validar(observacoes)
+        print("⚙️  Sobrecargas ajustadas:")
+        for nome, valor in sobrecargas.items():
+            print(f"   {nome:<20} {valor:.4g}")
+        resumo = erros.groupby(['estrategia', 'n_testes'])[['erro_tempo_pct', 'erro_cpu_pct']]
+        print("\n📏 Erro relativo nas execuções de validação (mediana, %):")
+        print(resumo.median().round(1).to_string())
+        print(f"   Erro absoluto mediano: tempo {erros['erro_tempo_pct'].abs().median():.1f}%, "
+              f"CPU {erros['erro_cpu_pct'].abs().median():.1f}%")
+        with open(SOBRECARGAS_PATH, 'w') as f:
+            json.dump(sobrecargas, f, indent=2)
+        print(f"\n✅ Sobrecargas salvas: {SOBRECARGAS_PATH}")
+        return
+
+    custos = custos_suite(args.suite) if args.suite else custos_historico(args.host)
+    if not len(custos):
+        print("❌ Sem custos por teste: rode `history_store.py ingerir` ou use --suite")
+        return
+    grade = configuracoes(args.workers, args.politicas, args.selecoes)
+    inicio = time.perf_counter()
+    df = varrer(custos, grade, carregar_sobrecargas(), args.nucleos,
+                host=args.host or 'simulado')
+    print(f"⏱️  {len(grade)} configurações × {len(custos)} testes em "
+          f"{time.perf_counter() - inicio:.2f}s")
+    colunas = ['estrategia', 'workers', 'politica', 'selecao', 'makespan_s', 'cpu_s',
+               'energia_j', 'edp']
+    print(df[colunas].round(3).to_string(index=False))
+    df.to_csv(SIMULACAO_PATH, index=False)
+    print(f"✅ Dados salvos: {SIMULACAO_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Estratégia combinada TIA + xdist com número de workers escolhido pelo
+conjunto afetado.
+
+    python scripts/tia_parallel.py src/test_app.py -v
+
+1. Seleção: `pytest --testmon --collect-only` lista os testes afetados
+   sem executá-los (nem atualizar a base do testmon); tempo e CPU dessa
+   etapa são medidos à parte.
+2. Estimativa: a duração p50 de cada afetado vem do history_store.py
+   (teste sem histórico: a mediana dos conhecidos; histórico vazio: a
+   média por teste do baseline, com aviso) e o simulator.py prevê
+   tempo, CPU e energia rodando no próprio processo (k = 1) ou com
+   k workers, com as sobrecargas ajustadas por `simulator.py validar`.
+3. Execução: `pytest --testmon [-n k]` com o k de menor custo pelo
+   critério (energia, tempo ou EDP). Sem testes afetados, não executa.
+
+A saída traz as linhas lidas por analyze_simple_metrics.py (`Seleção
+TIA`, `Workers escolhidos`), que separa a energia da seleção da energia
+da execução. Usa uma base do testmon própria (sufixo `-paralelo`) para
+não interferir no tratamento `tia`.
+"""
+
+import argparse
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from cpu_pinning import disponiveis
+from power_model import carregar_modelos, energia_execucoes, host_atual
+from simulator import Custos, carregar_sobrecargas, simular
+
+CRITERIOS = ['energia', 'tempo', 'edp']
+DATAFILE_PADRAO = '.testmondata'
+SUFIXO_DATAFILE = '-paralelo'
+RESULTADOS_PATH = 'data/resultados_simple.csv'
+
+def _medir(cmd, env):
+    """(saida, tempo_s, cpu_s) de um subprocesso, CPU pelo rusage dos filhos"""
+    antes = resource.getrusage(resource.RUSAGE_CHILDREN)
+    inicio = time.monotonic()
+    saida = subprocess.run(cmd, env=env, capture_output=True, text=True).stdout
+    tempo = time.monotonic() - inicio
+    depois = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (depois.ru_utime - antes.ru_utime) + (depois.ru_stime - antes.ru_stime)
+    return saida, tempo, cpu
+
+def afetados(suite, env):
+    """(nodeids afetados, total coletado, tempo_s, cpu_s) da seleção do testmon"""
+    saida, tempo, cpu = _medir([sys.executable, '-m', 'pytest', '--testmon', '--collect-only',
+                                '-q', suite], env)
+    nodeids = [l for l in saida.splitlines() if '::' in l and not l.startswith(' ')]
+    deselecionados = re.findall(r'(\d+) deselected', saida)
+    return nodeids, len(nodeids) + int(deselecionados[-1] if deselecionados else 0), tempo, cpu
+
+def _duracao_media_baseline(caminho=RESULTADOS_PATH, host=None):
+    """Duração média por teste das execuções baseline (tempo_s / testes_executados)"""
+    if not os.path.exists(caminho):
+        return None
+    df = pd.read_csv(caminho)
+    if not {'estrategia', 'tempo_s', 'testes_executados'} <= set(df.columns):
+        return None
+    df = df[(df['estrategia'] == 'baseline') & (df['testes_executados'] > 0)]
+    if host is not None and 'host' in df.columns and (df['host'] == host).any():
+        df = df[df['host'] == host]
+    return (df['tempo_s'] / df['testes_executados']).median() if len(df) else None
+
+def custos_afetados(nodeids, host=None):
+    """
+    Custos dos afetados pela duração/CPU p50 do histórico. Sem histórico
+    (pipeline.py ainda não ingeriu nenhum testes*.jsonl), todos recebem a
+    duração média por teste do baseline em resultados_simple.csv.
+    """
+    from history_store import HistoricoTestes
+    historico = HistoricoTestes.carregar()
+    duracao, cpu = historico.tabela('duracao_s'), historico.tabela('cpu_s')
+    if not len(duracao):
+        media = _duracao_media_baseline(host=host)
+        if media is None:
+            print("⚠️  Sem histórico por teste nem execuções baseline: custos zerados, k = 1")
+            media = 0.0
+        else:
+            print(f"⚠️  Sem histórico por teste: {media * 1000:.1f} ms por teste "
+                  f"(média do baseline em {RESULTADOS_PATH})")
+        return Custos(nodeids, [media] * len(nodeids))
+    if host is not None and (duracao['host'] == host).any():
+        duracao, cpu = duracao[duracao['host'] == host], cpu[cpu['host'] == host]
+    duracao = duracao.groupby('nodeid')['p50'].median()
+    cpu = cpu.groupby('nodeid')['p50'].median()
+    d = duracao.reindex(nodeids).fillna(duracao.median()).to_numpy(dtype=float)
+    return Custos(nodeids, d, cpu.reindex(nodeids).to_numpy(dtype=float))
+
+def candidatos(nucleos):
+    """k = 1 (no processo), potências de 2 e o número de núcleos"""
+    ks = {1, nucleos}
+    k = 2
+    while k < nucleos:
+        ks.add(k)
+        k *= 2
+    return sorted(ks)
+
+def escolher_workers(custos, coletados, criterio='energia', host=None, nucleos=None,
+                     modelos=None):
+    """DataFrame das previsões por k e o k escolhido"""
+    nucleos = nucleos or len(disponiveis())
+    sobrecargas = carregar_sobrecargas()
+    linhas = []
+    for k in candidatos(nucleos):
+        # Só os afetados executam; os demais pesam na coleta de cada processo
+        previsto = simular(custos, 'tia_parallel', k, sobrecargas=sobrecargas, nucleos=nucleos,
+                           coletados=coletados)
+        linhas.append({'workers': k, 'tempo_s': previsto['makespan_s'],
+                       'cpu_total_s': previsto['cpu_s']})
+    df = pd.DataFrame(linhas)
+    df['host'] = host or host_atual()
+    df['energia_j'], _ = energia_execucoes(df, modelos)
+    df['edp'] = df['energia_j'] * df['tempo_s']
+    coluna = {'energia': 'energia_j', 'tempo': 'tempo_s', 'edp': 'edp'}[criterio]
+    return df, int(df.loc[df[coluna].idxmin(), 'workers'])
+
+def main():
+    parser = argparse.ArgumentParser(description='TIA + xdist com workers pelo conjunto afetado')
+    parser.add_argument('suite', nargs='?', default='src/test_app.py')
+    parser.add_argument('--criterio', choices=CRITERIOS, default='energia')
+    parser.add_argument('--host', default=host_atual(),
+                        help='Host do histórico e do modelo de potência '
+                             '(padrão: $HOST_EXECUCAO ou o hostname)')
+    args, extras = parser.parse_known_args()
+
+    env = dict(os.environ)
+    env['TESTMON_DATAFILE'] = env.get('TESTMON_DATAFILE', DATAFILE_PADRAO) + SUFIXO_DATAFILE
+    print(f"Cache TIA: {'hit' if os.path.exists(env['TESTMON_DATAFILE']) else 'miss'}")
+
+    nodeids, coletados, tempo_sel, cpu_sel = afetados(args.suite, env)
+    print(f"Seleção TIA: {tempo_sel:.2f}s (CPU {cpu_sel:.2f}s), "
+          f"{len(nodeids)}/{coletados} testes afetados")
+    if not nodeids:
+        print("Workers escolhidos: 0 (nenhum teste afetado)")
+        return
+
+    previsoes, k = escolher_workers(custos_afetados(nodeids, args.host), coletados,
+                                    args.criterio, args.host, modelos=carregar_modelos())
+    for _, linha in previsoes.iterrows():
+        marca = '→' if linha['workers'] == k else ' '
+        print(f"  {marca} k={int(linha['workers']):<3} previsto {linha['tempo_s']:.2f}s "
+              f"{linha['energia_j']:.1f} J")
+    print(f"Workers escolhidos: {k} (critério: {args.criterio})")
+    sys.stdout.flush()
+
+    cmd = [sys.executable, '-m', 'pytest', '--testmon', *(['-n', str(k)] if k > 1 else []),
+           args.suite, *extras]
+    sys.exit(subprocess.run(cmd, env=env).returncode)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Séries temporais de potência e CPU durante as execuções.
+
+- AmostradorSerie: thread que amostra /proc/stat e RAPL em intervalo
+  fixo enquanto o comando roda e grava serie.csv ao lado do metrics.txt.
+  Sem RAPL, a potência do gráfico vem do modelo calibrado do host
+  (power_model.py) aplicado à utilização e à frequência, na leitura.
+  Com `raiz` (pid do comando medido) soma também a memória de toda a
+  árvore de processos (PSS, que não conta duas vezes as páginas
+  compartilhadas entre os workers); o ru_maxrss do wait4 é só o do
+  maior processo e não cresce com o número de workers do xdist.
+- lttb: Largest-Triangle-Three-Buckets, reduz uma série a um orçamento
+  de pontos proporcional à largura do gráfico em pixels preservando picos.
+- bandas_percentis: percentis entre execuções alinhadas no início,
+  calculados em blocos da grade de tempo (memória limitada a
+  n_execucoes × bloco, independente da duração).
+"""
+
+import glob
+import os
+import threading
+import time
+
+import numpy as np
+
+from idle_monitor import delta_energia_j, ler_cpu_tempos, ler_energia_rapl, ler_frequencia_ghz
+
+INTERVALO_S = 0.1        # Período de amostragem
+TDP_POR_CORE = 15        # W por core ocupado: energia de hosts sem modelo (power_model.py)
+PONTOS_POR_PIXEL = 2     # Orçamento do LTTB por pixel de largura do eixo
+BLOCO_GRADE = 4096       # Colunas da grade por bloco nas bandas de percentis
+PERCENTIS = (5, 50, 95)
+COLUNAS = ['t_s', 'cpu_util', 'potencia_rapl_w', 'freq_ghz', 'mem_arvore_mb']
+
+def descendentes(pid):
+    """`pid` e todos os seus descendentes (/proc/<pid>/task/*/children)"""
+    pids, pendentes = [], [pid]
+    while pendentes:
+        atual = pendentes.pop()
+        pids.append(atual)
+        for arquivo in glob.glob(f'/proc/{atual}/task/*/children'):
+            try:
+                with open(arquivo) as f:
+                    pendentes += [int(p) for p in f.read().split()]
+            except OSError:
+                continue   # Thread ou processo terminou durante a leitura
+    return pids
+
+def _memoria_kb(pid):
+    """PSS do processo em kB (RSS se não houver smaps_rollup), ou None se terminou"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for linha in f:
+                if linha.startswith('Pss:'):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, IndexError, ValueError):
+        return None
+
+def memoria_arvore_mb(pid):
+    """Memória somada do processo e dos descendentes (MB), ou NaN se a árvore acabou"""
+    valores = [v for v in map(_memoria_kb, descendentes(pid)) if v is not None]
+    return sum(valores) / 1024 if valores else np.nan
+
+def linha_memoria(pico):
+    """Linha do metrics.txt com o pico de memória da árvore de processos"""
+    return '' if pico is None else f"Memória da árvore (MB): pico {pico:.1f}\n"
+
+class AmostradorSerie(threading.Thread):
+    """
+    Amostra CPU e potência até `parar()`; `salvar(caminho)` grava o CSV.
+    A frequência é a média dos `nucleos` (todos se None); a memória é a
+    da árvore de `raiz`, definido por executar_medido ao criar o processo.
+    """
+
+    def __init__(self, intervalo=INTERVALO_S, nucleos=None):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.nucleos = nucleos
+        self.raiz = None
+        self.linhas = []
+        self._parar = threading.Event()
+
+    def run(self):
+        t0 = time.monotonic()
+        cpu_ant, rapl_ant, t_ant = ler_cpu_tempos(), ler_energia_rapl(), t0
+        while not self._parar.wait(self.intervalo):
+            cpu, rapl, t = ler_cpu_tempos(), ler_energia_rapl(), time.monotonic()
+            util = np.nan
+            if cpu and cpu_ant and cpu[1] > cpu_ant[1]:
+                util = 1 - (cpu[0] - cpu_ant[0]) / (cpu[1] - cpu_ant[1])
+            energia = delta_energia_j(rapl_ant, rapl)
+            rapl_w = energia / (t - t_ant) if energia is not None else np.nan
+            freq = ler_frequencia_ghz(self.nucleos)
+            memoria = memoria_arvore_mb(self.raiz) if self.raiz is not None else np.nan
+            self.linhas.append((t - t0, util, rapl_w, np.nan if freq is None else freq, memoria))
+            cpu_ant, rapl_ant, t_ant = cpu, rapl, t
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+    def resumo_frequencia(self):
+        """(mín., média, máx.) da frequência amostrada em GHz, ou None"""
+        freqs = np.array([linha[3] for linha in self.linhas], dtype=float)
+        freqs = freqs[~np.isnan(freqs)]
+        if not len(freqs):
+            freq = ler_frequencia_ghz(self.nucleos)   # Execução mais curta que o intervalo
+            return None if freq is None else (freq, freq, freq)
+        return freqs.min(), freqs.mean(), freqs.max()
+
+    def pico_memoria(self):
+        """Maior memória da árvore amostrada (MB), ou None sem amostras"""
+        memorias = np.array([linha[-1] for linha in self.linhas], dtype=float)
+        return None if np.isnan(memorias).all() else float(np.nanmax(memorias))
+
+    def salvar(self, caminho):
+        tmp = f'{caminho}.tmp'
+        np.savetxt(tmp, np.array(self.linhas, dtype=float).reshape(-1, len(COLUNAS)),
+                   delimiter=',', header=','.join(COLUNAS), comments='', fmt='%.6g')
+        os.replace(tmp, caminho)
+
+def carregar_serie(caminho, coluna, modelos=None):
+    """
+    (t, y) de um serie.csv; sem RAPL, a potência vem do modelo do host
+    da execução em `modelos` (NaN se o host não foi calibrado)
+    """
+    dados = np.genfromtxt(caminho, delimiter=',', names=True, dtype=np.float64)
+    dados = np.atleast_1d(dados)
+    if coluna not in dados.dtype.names:  # serie.csv anterior à coluna
+        return dados['t_s'], np.full(len(dados), np.nan)
+    y = dados[coluna]
+    if coluna == 'potencia_rapl_w' and np.isnan(y).all():
+        from history_store import _host_da_execucao
+        from power_model import potencia_modelo
+        modelo = (modelos or {}).get(_host_da_execucao(caminho))
+        if modelo is not None:
+            freq = dados['freq_ghz'] if 'freq_ghz' in dados.dtype.names else None
+            y = potencia_modelo(modelo, dados['cpu_util'], freq)
+    return dados['t_s'], y
+
+def arquivos_series(data_dir='data/raw', ordem=None):
+    """{estrategia: [(caminho, mtime_ns, tamanho), ...]} dos serie.csv"""
+    arquivos = {}
+    for caminho in sorted(glob.glob(os.path.join(data_dir, '*-*', 'serie.csv'))):
+        estrategia = os.path.basename(os.path.dirname(caminho)).rsplit('-', 1)[0]
+        st = os.stat(caminho)
+        arquivos.setdefault(estrategia, []).append((caminho, st.st_mtime_ns, st.st_size))
+    if ordem:
+        arquivos = {e: arquivos[e] for e in ordem if e in arquivos}
+    return arquivos
+
+def lttb(x, y, n_saida):
+    """
+    Índices dos pontos mantidos pelo Largest-Triangle-Three-Buckets.
+
+    Os baldes são montados de uma vez em uma matriz (n_baldes, tamanho)
+    com NaN de preenchimento, e as médias do balde seguinte saem todas de
+    uma vez; a área de cada candidato é vetorizada dentro do balde e só a
+    escolha do vértice anterior (de que o balde seguinte depende) é
+    sequencial, com O(n_saida) passos.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    n = len(x)
+    if n_saida >= n or n_saida < 3:
+        return np.arange(n)
+
+    # Primeiro e último ponto fixos; n_saida - 2 baldes no meio
+    limites = np.linspace(1, n - 1, n_saida - 1).astype(int)
+    tamanhos = np.diff(limites)
+    largura = tamanhos.max()
+    idx = limites[:-1, None] + np.arange(largura)
+    valido = np.arange(largura) < tamanhos[:, None]
+    idx = np.where(valido, idx, limites[:-1, None])
+    bx, by = np.where(valido, x[idx], np.nan), np.where(valido, y[idx], np.nan)
+
+    with np.errstate(invalid='ignore'):
+        media_x = np.append(np.nanmean(bx, axis=1)[1:], x[-1])  # Balde seguinte
+        media_y = np.append(np.nanmean(by, axis=1)[1:], y[-1])
+
+    escolhidos = np.empty(n_saida, dtype=int)
+    escolhidos[0], escolhidos[-1] = 0, n - 1
+    ax_, ay_ = x[0], y[0]
+    for i in range(len(tamanhos)):
+        area = np.abs((ax_ - media_x[i]) * (by[i] - ay_) - (ax_ - bx[i]) * (media_y[i] - ay_))
+        area = np.where(np.isnan(area), -1.0, area)  # NaN em y: escolhe outro ponto
+        j = int(np.argmax(area))
+        escolhidos[i + 1] = idx[i, j]
+        ax_, ay_ = x[idx[i, j]], y[idx[i, j]]
+    return escolhidos
+
+def orcamento_pontos(ax, pontos_por_pixel=PONTOS_POR_PIXEL):
+    """Pontos por série proporcionais à largura do eixo em pixels"""
+    return max(3, int(ax.get_window_extent().width * pontos_por_pixel))
+
+def bandas_percentis(series, grade, percentis=PERCENTIS, bloco=BLOCO_GRADE):
+    """
+    Percentis entre as execuções em cada instante da grade.
+    series: lista de (t, y) alinhadas no início (t relativo). Fora do
+    intervalo de uma execução ela não conta (NaN). Retorna
+    (len(percentis), len(grade)); a matriz intermediária tem no máximo
+    len(series) × bloco valores.
+    """
+    saida = np.full((len(percentis), len(grade)), np.nan)
+    for inicio in range(0, len(grade), bloco):
+        trecho = grade[inicio:inicio + bloco]
+        matriz = np.stack([np.interp(trecho, t, y, left=np.nan, right=np.nan)
+                           for t, y in series])
+        cobertos = ~np.isnan(matriz).all(axis=0)
+        if cobertos.any():
+            saida[:, inicio:inicio + bloco][:, cobertos] = np.nanpercentile(
+                matriz[:, cobertos], percentis, axis=0)
+    return saida
+
+def painel_series(ax, series, cor, orcamento, max_execucoes=20, percentis=PERCENTIS):
+    """
+    Sobreposição de execuções alinhadas no início (LTTB) com a banda de
+    percentis (extremos) e a mediana entre execuções.
+    """
+    if not series:
+        return
+    duracao = max(t[-1] for t, _ in series if len(t))
+    grade = np.linspace(0, duracao, orcamento)
+    for t, y in series[-max_execucoes:]:  # Execuções mais recentes
+        manter = lttb(t, y, orcamento)
+        ax.plot(t[manter], y[manter], color=cor, alpha=0.25, linewidth=0.6)
+    bandas = bandas_percentis(series, grade, percentis)
+    ax.fill_between(grade, bandas[0], bandas[-1], color=cor, alpha=0.25,
+                    label=f'p{percentis[0]}–p{percentis[-1]}')
+    ax.plot(grade, bandas[len(percentis) // 2], color=cor, linewidth=1.5,
+            label=f'p{percentis[len(percentis) // 2]} (n={len(series)})')
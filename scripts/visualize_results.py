@@ -5,299 +5,203 @@ Gera visualizações profissionais para o artigo
 
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
-import os
+import sys
 
-# Configurações globais
-plt.rcParams['figure.dpi'] = 300
-plt.rcParams['font.size'] = 11
-plt.rcParams['font.family'] = 'serif'
-plt.rcParams['axes.labelsize'] = 12
-plt.rcParams['axes.titlesize'] = 14
-plt.rcParams['xtick.labelsize'] = 11
-plt.rcParams['ytick.labelsize'] = 11
-plt.rcParams['legend.fontsize'] = 10
+from plot_panels import (COLORS, LABELS, ORDER, agrupar, painel_barras_variacao,
+                         painel_cpu, painel_edp, painel_tempo, presentes, renderizar,
+                         rotulo_n, variacoes)
+from power_model import carregar_modelos
+from timeseries import arquivos_series, carregar_serie, orcamento_pontos, painel_series
 
-# Paleta de cores profissional
-COLORS = {
-    'baseline': '#7fb3d5',  # Azul suave
-    'parallel': '#e74c3c',  # Vermelho (alerta)
-    'tia': '#27ae60'        # Verde (sucesso)
+# Configurações globais (aplicadas em cada figura; entram no hash do cache)
+ESTILO = {
+    'figure.dpi': 300,
+    'font.size': 11,
+    'font.family': 'serif',
+    'axes.labelsize': 12,
+    'axes.titlesize': 14,
+    'xtick.labelsize': 11,
+    'ytick.labelsize': 11,
+    'legend.fontsize': 10,
 }
 
-ORDER = ['baseline', 'parallel', 'tia']
-LABELS = {
-    'baseline': 'Baseline\n(Sequencial)',
-    'parallel': 'Paralelo\n(xdist)',
-    'tia': 'TIA\n(Testmon)'
-}
-
-def load_data(filepath='data/resultados_simple.csv'):
-    """Carrega dados"""
+def load_data(filepath='data/resultados_simple.csv', filtrado=False):
+    """Carrega dados (filtrado: sem as execuções marcadas como excluídas)"""
     df = pd.read_csv(filepath)
+    if filtrado and 'excluido' in df.columns:
+        df = df[~df['excluido']]
     return df
 
-def create_tempo_plot(df, output_dir='data/plots'):
+def create_tempo_plot(grupos):
     """Gráfico de Tempo de Execução"""
     fig, ax = plt.subplots(figsize=(10, 6))
-    
-    # Criar boxplot com cores customizadas
-    bp = ax.boxplot(
-        [df[df['estrategia'] == s]['tempo_s'].values for s in ORDER],
-        labels=[LABELS[s] for s in ORDER],
-        patch_artist=True,
-        widths=0.6,
-        showmeans=True,
-        meanprops=dict(marker='D', markerfacecolor='white', 
-                      markeredgecolor='black', markersize=6)
-    )
-    
-    # Colorir boxes
-    for patch, estrategia in zip(bp['boxes'], ORDER):
-        patch.set_facecolor(COLORS[estrategia])
-        patch.set_alpha(0.7)
-    
-    # Adicionar valores médios como texto
-    for i, estrategia in enumerate(ORDER, 1):
-        mean_val = df[df['estrategia'] == estrategia]['tempo_s'].mean()
-        ax.text(i, mean_val, f'{mean_val:.2f}s', 
-               ha='center', va='bottom', fontweight='bold', fontsize=10)
-    
-    # Linha de referência do baseline
-    baseline_mean = df[df['estrategia'] == 'baseline']['tempo_s'].mean()
-    ax.axhline(baseline_mean, color='gray', linestyle='--', 
-               alpha=0.5, linewidth=1, label='Baseline médio')
-    
+    painel_tempo(ax, grupos)
+
     ax.set_ylabel('Tempo de Execução (segundos)', fontweight='bold')
     ax.set_xlabel('Estratégia de Teste', fontweight='bold')
-    ax.set_title('Comparação de Tempo de Execução por Estratégia', 
+    ax.set_title('Comparação de Tempo de Execução por Estratégia',
                 fontweight='bold', pad=20)
-    ax.grid(axis='y', alpha=0.3, linestyle='--')
     ax.legend(loc='upper right')
-    
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/tempo_profissional.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print(f"✅ Gráfico salvo: {output_dir}/tempo_profissional.png")
+    fig.tight_layout()
+    return fig
 
-def create_edp_plot(df, output_dir='data/plots'):
+def create_edp_plot(grupos):
     """Gráfico de Energy-Delay Product (escala log)"""
     fig, ax = plt.subplots(figsize=(10, 6))
-    
-    # Boxplot
-    bp = ax.boxplot(
-        [df[df['estrategia'] == s]['edp'].values for s in ORDER],
-        labels=[LABELS[s] for s in ORDER],
-        patch_artist=True,
-        widths=0.6,
-        showmeans=True,
-        meanprops=dict(marker='D', markerfacecolor='white', 
-                      markeredgecolor='black', markersize=6)
-    )
-    
-    # Colorir
-    for patch, estrategia in zip(bp['boxes'], ORDER):
-        patch.set_facecolor(COLORS[estrategia])
-        patch.set_alpha(0.7)
-    
-    # Valores médios
-    for i, estrategia in enumerate(ORDER, 1):
-        mean_val = df[df['estrategia'] == estrategia]['edp'].mean()
-        ax.text(i, mean_val, f'{mean_val:.1f}', 
-               ha='center', va='bottom', fontweight='bold', fontsize=10)
-    
-    # Escala logarítmica
-    ax.set_yscale('log')
-    
+    painel_edp(ax, grupos)
+
     ax.set_ylabel('Energy-Delay Product (J·s) [escala log]', fontweight='bold')
     ax.set_xlabel('Estratégia de Teste', fontweight='bold')
-    ax.set_title('Comparação de Energy-Delay Product (EDP)', 
+    ax.set_title('Comparação de Energy-Delay Product (EDP)',
                 fontweight='bold', pad=20)
-    ax.grid(axis='y', alpha=0.3, linestyle='--', which='both')
-    
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/edp_profissional.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print(f"✅ Gráfico salvo: {output_dir}/edp_profissional.png")
+    fig.tight_layout()
+    return fig
 
-def create_cpu_plot(df, output_dir='data/plots'):
+def create_cpu_plot(grupos):
     """Gráfico de Utilização de CPU"""
     fig, ax = plt.subplots(figsize=(10, 6))
-    
-    bp = ax.boxplot(
-        [df[df['estrategia'] == s]['cpu_pct'].values for s in ORDER],
-        labels=[LABELS[s] for s in ORDER],
-        patch_artist=True,
-        widths=0.6,
-        showmeans=True,
-        meanprops=dict(marker='D', markerfacecolor='white', 
-                      markeredgecolor='black', markersize=6)
-    )
-    
-    for patch, estrategia in zip(bp['boxes'], ORDER):
-        patch.set_facecolor(COLORS[estrategia])
-        patch.set_alpha(0.7)
-    
-    for i, estrategia in enumerate(ORDER, 1):
-        mean_val = df[df['estrategia'] == estrategia]['cpu_pct'].mean()
-        ax.text(i, mean_val, f'{mean_val:.0f}%', 
-               ha='center', va='bottom', fontweight='bold', fontsize=10)
-    
-    # Linha de 100% (1 core)
-    ax.axhline(100, color='orange', linestyle='--', 
-               alpha=0.6, linewidth=1.5, label='1 core (100%)')
-    
+    painel_cpu(ax, grupos)
+
     ax.set_ylabel('Utilização de CPU (%)', fontweight='bold')
     ax.set_xlabel('Estratégia de Teste', fontweight='bold')
-    ax.set_title('Comparação de Utilização de CPU', 
+    ax.set_title('Comparação de Utilização de CPU',
                 fontweight='bold', pad=20)
-    ax.grid(axis='y', alpha=0.3, linestyle='--')
     ax.legend(loc='upper right')
-    
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/cpu_profissional.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print(f"✅ Gráfico salvo: {output_dir}/cpu_profissional.png")
+    fig.tight_layout()
+    return fig
 
-def create_comparison_bars(df, output_dir='data/plots'):
+def create_comparison_bars(grupos):
     """Gráfico de barras: Redução/Aumento vs Baseline"""
-    baseline_tempo = df[df['estrategia'] == 'baseline']['tempo_s'].mean()
-    baseline_energia = df[df['estrategia'] == 'baseline']['energia_estimada_j'].mean()
-    baseline_edp = df[df['estrategia'] == 'baseline']['edp'].mean()
-    
-    estrategias = ['parallel', 'tia']
-    labels_estrategias = ['Paralelo', 'TIA']
-    
-    # Calcular variações percentuais
-    tempo_var = []
-    energia_var = []
-    edp_var = []
-    
-    for est in estrategias:
-        subset = df[df['estrategia'] == est]
-        tempo_var.append(((subset['tempo_s'].mean() - baseline_tempo) / baseline_tempo) * 100)
-        energia_var.append(((subset['energia_estimada_j'].mean() - baseline_energia) / baseline_energia) * 100)
-        edp_var.append(((subset['edp'].mean() - baseline_edp) / baseline_edp) * 100)
-    
-    # Criar gráfico
+    tratamentos = [e for e in presentes(grupos) if e != 'baseline']
+    labels_estrategias = [LABELS[e].split('\n')[0] for e in tratamentos]
+    cores = [COLORS[e] for e in tratamentos]
+    paineis = [
+        ('tempo_s', 'Tempo de Execução', '{:+.1f}%'),
+        ('energia_estimada_j', 'Consumo de Energia', '{:+.1f}%'),
+        ('edp', 'Energy-Delay Product', '{:+.0f}%'),
+    ]
+
     fig, axes = plt.subplots(1, 3, figsize=(15, 5))
-    
-    # Tempo
-    bars1 = axes[0].bar(labels_estrategias, tempo_var, 
-                        color=[COLORS['parallel'], COLORS['tia']], alpha=0.7)
-    axes[0].axhline(0, color='black', linewidth=0.8)
-    axes[0].set_ylabel('Variação vs Baseline (%)', fontweight='bold')
-    axes[0].set_title('Tempo de Execução', fontweight='bold')
-    axes[0].grid(axis='y', alpha=0.3)
-    
-    # Adicionar valores
-    for bar, val in zip(bars1, tempo_var):
-        height = bar.get_height()
-        axes[0].text(bar.get_x() + bar.get_width()/2., height,
-                    f'{val:+.1f}%', ha='center', 
-                    va='bottom' if val > 0 else 'top', fontweight='bold')
-    
-    # Energia
-    bars2 = axes[1].bar(labels_estrategias, energia_var, 
-                        color=[COLORS['parallel'], COLORS['tia']], alpha=0.7)
-    axes[1].axhline(0, color='black', linewidth=0.8)
-    axes[1].set_ylabel('Variação vs Baseline (%)', fontweight='bold')
-    axes[1].set_title('Consumo de Energia', fontweight='bold')
-    axes[1].grid(axis='y', alpha=0.3)
-    
-    for bar, val in zip(bars2, energia_var):
-        height = bar.get_height()
-        axes[1].text(bar.get_x() + bar.get_width()/2., height,
-                    f'{val:+.1f}%', ha='center', 
-                    va='bottom' if val > 0 else 'top', fontweight='bold')
-    
-    # EDP
-    bars3 = axes[2].bar(labels_estrategias, edp_var, 
-                        color=[COLORS['parallel'], COLORS['tia']], alpha=0.7)
-    axes[2].axhline(0, color='black', linewidth=0.8)
-    axes[2].set_ylabel('Variação vs Baseline (%)', fontweight='bold')
-    axes[2].set_title('Energy-Delay Product', fontweight='bold')
-    axes[2].grid(axis='y', alpha=0.3)
-    
-    for bar, val in zip(bars3, edp_var):
-        height = bar.get_height()
-        axes[2].text(bar.get_x() + bar.get_width()/2., height,
-                    f'{val:+.0f}%', ha='center', 
-                    va='bottom' if val > 0 else 'top', fontweight='bold')
-    
-    plt.suptitle('Variação Percentual em Relação ao Baseline', 
+    for ax, (coluna, titulo, formato) in zip(axes, paineis):
+        painel_barras_variacao(ax, labels_estrategias, variacoes(grupos, coluna, tratamentos), cores,
+                               formato, alpha=0.7)
+        ax.axhline(0, color='black', linewidth=0.8)
+        ax.set_ylabel('Variação vs Baseline (%)', fontweight='bold')
+        ax.set_title(titulo, fontweight='bold')
+        ax.grid(axis='y', alpha=0.3)
+
+    fig.suptitle('Variação Percentual em Relação ao Baseline',
                 fontweight='bold', fontsize=14, y=1.02)
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/comparacao_barras.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print(f"✅ Gráfico salvo: {output_dir}/comparacao_barras.png")
+    fig.tight_layout()
+    return fig
 
-def create_summary_table(df, output_dir='data/plots'):
+def create_summary_table(grupos):
     """Tabela resumo das métricas"""
     fig, ax = plt.subplots(figsize=(12, 4))
     ax.axis('tight')
     ax.axis('off')
-    
+
     # Preparar dados
+    def media_dp(valores, casas):
+        return f"{np.mean(valores):.{casas}f} ± {np.std(valores, ddof=1):.{casas}f}"
+
+    ordem = presentes(grupos)
     data = []
-    for estrategia in ORDER:
-        subset = df[df['estrategia'] == estrategia]
+    for estrategia in ordem:
+        g = grupos[estrategia]
         data.append([
             LABELS[estrategia].replace('\n', ' '),
-            f"{subset['tempo_s'].mean():.3f} ± {subset['tempo_s'].std():.3f}",
-            f"{subset['energia_estimada_j'].mean():.1f} ± {subset['energia_estimada_j'].std():.1f}",
-            f"{subset['edp'].mean():.1f} ± {subset['edp'].std():.1f}",
-            f"{subset['cpu_pct'].mean():.0f} ± {subset['cpu_pct'].std():.0f}",
-            f"{subset['mem_max_mb'].mean():.1f} ± {subset['mem_max_mb'].std():.1f}"
+            media_dp(g['tempo_s'], 3),
+            media_dp(g['energia_estimada_j'], 1),
+            media_dp(g['edp'], 1),
+            media_dp(g['cpu_pct'], 0),
+            media_dp(g['mem_max_mb'], 1),
         ])
-    
+
     columns = ['Estratégia', 'Tempo (s)', 'Energia (J)', 'EDP (J·s)', 'CPU (%)', 'Memória (MB)']
-    
-    table = ax.table(cellText=data, colLabels=columns, 
+
+    table = ax.table(cellText=data, colLabels=columns,
                     cellLoc='center', loc='center',
                     colWidths=[0.2, 0.16, 0.16, 0.16, 0.16, 0.16])
-    
+
     table.auto_set_font_size(False)
     table.set_fontsize(10)
     table.scale(1, 2)
-    
+
     # Colorir cabeçalho
     for i in range(len(columns)):
         table[(0, i)].set_facecolor('#4472C4')
         table[(0, i)].set_text_props(weight='bold', color='white')
-    
+
     # Colorir linhas
-    for i, estrategia in enumerate(ORDER, 1):
+    for i, estrategia in enumerate(ordem, 1):
         table[(i, 0)].set_facecolor(COLORS[estrategia])
         table[(i, 0)].set_text_props(weight='bold', color='white')
         table[(i, 0)].set_alpha(0.7)
-    
-    plt.title('Resumo das Métricas Coletadas (n=10)', 
-             fontweight='bold', fontsize=14, pad=20)
-    plt.savefig(f'{output_dir}/tabela_resumo.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print(f"✅ Tabela salva: {output_dir}/tabela_resumo.png")
+
+    ax.set_title(f'Resumo das Métricas Coletadas ({rotulo_n(grupos)})',
+                fontweight='bold', fontsize=14, pad=20)
+    return fig
+
+def create_series_plot(arquivos, coluna, rotulo, modelos=None):
+    """
+    Série temporal por estratégia: execuções sobrepostas alinhadas no
+    início (LTTB) e banda de percentis entre execuções.
+    `arquivos` vem de timeseries.arquivos_series (caminho, mtime, tamanho),
+    que também entra no hash do cache; as séries são lidas aqui. Os
+    `modelos` de potência (power_model.py) cobrem as séries sem RAPL.
+    """
+    estrategias = list(arquivos)
+    fig, axes = plt.subplots(len(estrategias), 1, figsize=(10, 2.6 * len(estrategias)),
+                             sharex=True, squeeze=False)
+    for ax, estrategia in zip(axes[:, 0], estrategias):
+        series = [carregar_serie(caminho, coluna, modelos) for caminho, _, _ in arquivos[estrategia]]
+        painel_series(ax, series, COLORS.get(estrategia, 'gray'), orcamento_pontos(ax))
+        ax.set_ylabel(rotulo, fontweight='bold')
+        ax.set_title(LABELS.get(estrategia, estrategia).replace('\n', ' '),
+                     fontweight='bold', loc='left')
+        ax.grid(alpha=0.3, linestyle='--')
+        ax.legend(loc='upper right')
+    axes[-1, 0].set_xlabel('Tempo desde o início da execução (s)', fontweight='bold')
+    fig.tight_layout()
+    return fig
+
+# Séries temporais: arquivo -> (coluna do serie.csv, rótulo do eixo)
+SERIES = {
+    'potencia_series.png': ('potencia_rapl_w', 'Potência (W)'),
+    'cpu_series.png': ('cpu_util', 'Utilização de CPU (0–1)'),
+}
+
+FIGURAS = [
+    ('tempo_profissional.png', create_tempo_plot),
+    ('edp_profissional.png', create_edp_plot),
+    ('cpu_profissional.png', create_cpu_plot),
+    ('comparacao_barras.png', create_comparison_bars),
+    ('tabela_resumo.png', create_summary_table),
+]
 
 def main():
     print("📊 Gerando Visualizações Profissionais...")
     print("")
-    
-    # Criar diretório de saída
-    os.makedirs('data/plots', exist_ok=True)
-    
-    # Carregar dados
-    df = load_data()
+
+    # Carregar dados e agrupar uma única vez por estratégia
+    df = load_data(filtrado='--filtrado' in sys.argv)
     print(f"✅ {len(df)} execuções carregadas")
     print("")
-    
-    # Gerar todos os gráficos
-    create_tempo_plot(df)
-    create_edp_plot(df)
-    create_cpu_plot(df)
-    create_comparison_bars(df)
-    create_summary_table(df)
-    
+    grupos = agrupar(df)
+
+    # Gerar todos os gráficos (em paralelo; figuras sem mudança são puladas)
+    tarefas = [(arquivo, funcao, {'grupos': grupos}) for arquivo, funcao in FIGURAS]
+    arquivos = arquivos_series(ordem=ORDER)
+    if arquivos:
+        modelos = carregar_modelos()
+        tarefas += [(arquivo, create_series_plot,
+                     {'arquivos': arquivos, 'coluna': coluna, 'rotulo': rotulo,
+                      'modelos': modelos})
+                    for arquivo, (coluna, rotulo) in SERIES.items()]
+    renderizar(tarefas, ESTILO, 'data/plots', forcar='--forcar' in sys.argv)
+
     print("")
     print("=" * 60)
     print("✅ Todas as visualizações foram geradas!")
@@ -309,8 +213,10 @@ def main():
     print("   • cpu_profissional.png      - Figura suplementar")
     print("   • comparacao_barras.png     - Análise comparativa")
     print("   • tabela_resumo.png         - Tabela para artigo")
+    print("   • potencia_series.png       - Potência ao longo da execução (se houver serie.csv)")
+    print("   • cpu_series.png            - CPU ao longo da execução (se houver serie.csv)")
     print("")
     print("🎨 Use estas figuras no artigo!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()